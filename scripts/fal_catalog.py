@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+Helpers for the fal.ai model catalog artifacts in data/
+Content-addressed deduplication of parameter definitions, a lazy loader and
+an indexed query engine (`Catalog`, also usable as a CLI)
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import sys
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent.parent / 'data' / 'fal_models_schemas.json'
+
+DEDUPLICATED_FORMAT = 'fal-models-catalog/1'
+PARAMETER_SECTIONS = ('inputParameters', 'outputParameters')
+
+# Length of the hex digest prefix used as a definition key
+DEFINITION_KEY_LENGTH = 16
+
+
+def canonical_json(data: Any) -> str:
+    """Stable JSON encoding used for content hashing"""
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+class DefinitionTable:
+    """Shared table of parameter definitions keyed by content hash
+
+    Identical definitions (the same `image_size`, `seed` or
+    `enable_safety_checker` block repeated across hundreds of models) are
+    stored once; interning returns the shared object so parsed and loaded
+    models do not keep their own copies.
+    """
+
+    def __init__(self):
+        self.definitions: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.definitions)
+
+    def intern(self, definition: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Return the key and the shared copy of a definition
+
+        Keys hash the definition with its key order preserved, so a shared
+        copy serializes exactly like the definition it replaces.
+        """
+        text = json.dumps(definition, separators=(',', ':'), ensure_ascii=False)
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        key = digest[:DEFINITION_KEY_LENGTH]
+        shared = self.definitions.get(key)
+        if shared is None:
+            self.definitions[key] = definition
+            return key, definition
+        if json.dumps(shared, separators=(',', ':'), ensure_ascii=False) != text:
+            # Prefix collision: fall back to the full digest
+            key = digest
+            shared = self.definitions.setdefault(key, definition)
+        return key, shared
+
+    def intern_parameters(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace every definition in a parameter map by its shared copy"""
+        return {name: self.intern(definition)[1] for name, definition in parameters.items()}
+
+    def intern_model(self, model: Dict[str, Any]) -> Dict[str, Any]:
+        """Intern the parameter sections of a model record in place"""
+        for section in PARAMETER_SECTIONS:
+            if isinstance(model.get(section), dict):
+                model[section] = self.intern_parameters(model[section])
+        return model
+
+    def deduplicate(self, models: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the deduplicated catalog document for `models`
+
+        Parameter sections become `{name: key}` maps into `definitions`,
+        which only holds the definitions referenced by these models.
+        """
+        used: Dict[str, Dict[str, Any]] = {}
+        records = []
+        for model in models:
+            record = dict(model)
+            for section in PARAMETER_SECTIONS:
+                parameters = model.get(section)
+                if not isinstance(parameters, dict):
+                    continue
+                refs = {}
+                for name, definition in parameters.items():
+                    key, shared = self.intern(definition)
+                    used[key] = shared
+                    refs[name] = key
+                record[section] = refs
+            records.append(record)
+
+        return {
+            'format': DEDUPLICATED_FORMAT,
+            'definitions': dict(sorted(used.items())),
+            'models': records,
+        }
+
+
+def dump_deduplicated(document: Dict[str, Any]) -> str:
+    """Serialize a deduplicated catalog with one definition/model per line"""
+    dumps = partial(json.dumps, ensure_ascii=False, separators=(',', ':'))
+    definitions = ',\n'.join(
+        f"{dumps(key)}:{dumps(value)}" for key, value in document['definitions'].items()
+    )
+    models = ',\n'.join(dumps(model) for model in document['models'])
+    return (
+        '{\n'
+        f'"format":{dumps(document["format"])},\n'
+        f'"definitions":{{\n{definitions}\n}},\n'
+        f'"models":[\n{models}\n]\n'
+        '}\n'
+    )
+
+
+class LazyParameters(Mapping):
+    """Read-only parameter map that resolves definition keys on access"""
+
+    __slots__ = ('_refs', '_definitions')
+
+    def __init__(self, refs: Dict[str, str], definitions: Dict[str, Dict[str, Any]]):
+        self._refs = refs
+        self._definitions = definitions
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        return self._definitions[self._refs[name]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._refs)
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def ref(self, name: str) -> str:
+        """Definition key of a parameter, e.g. to group models sharing it"""
+        return self._refs[name]
+
+    def __repr__(self) -> str:
+        return f"LazyParameters({list(self._refs)!r})"
+
+
+def load_deduplicated(path: Path) -> List[Dict[str, Any]]:
+    """Load a deduplicated catalog
+
+    Parameter sections are returned as `LazyParameters`, so definitions are
+    only looked up when a parameter is actually read and shared definitions
+    exist once in memory. Use `expand_model` for plain, JSON-ready records.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+
+    if document.get('format') != DEDUPLICATED_FORMAT:
+        raise ValueError(f"Unsupported catalog format in {path}: {document.get('format')!r}")
+
+    definitions = document['definitions']
+    models = document['models']
+    for model in models:
+        for section in PARAMETER_SECTIONS:
+            if isinstance(model.get(section), dict):
+                model[section] = LazyParameters(model[section], definitions)
+    return models
+
+
+def expand_model(model: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a plain copy of a model with its parameter sections expanded"""
+    record = dict(model)
+    for section in PARAMETER_SECTIONS:
+        if isinstance(record.get(section), Mapping):
+            record[section] = dict(record[section])
+    return record
+
+
+def load_catalog_records(path: Path) -> List[Dict[str, Any]]:
+    """Load model records from `fal_models_schemas.json` or the deduplicated catalog"""
+    with open(path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    if isinstance(document, dict) and 'format' in document:
+        return load_deduplicated(path)
+    return document
+
+
+def normalize_unit(unit: Optional[str]) -> str:
+    """Billing unit key: lowercase, trailing plural `s` dropped ("Videos" -> "video")"""
+    unit = (unit or '').strip().lower()
+    return unit[:-1] if unit.endswith('s') and not unit.endswith('ss') else unit
+
+
+def _positions(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Query(ABC):
+    """A filter over the catalog; combine with `&`, `|` and `~`
+
+    Queries are hashable values, so `Catalog` caches the result of every
+    query and sub-query it evaluates.
+    """
+
+    @abstractmethod
+    def mask(self, catalog: 'Catalog') -> int:
+        """Bit set of the matching model positions"""
+
+    def __and__(self, other: 'Query') -> 'Query':
+        return And((self, other))
+
+    def __or__(self, other: 'Query') -> 'Query':
+        return Or((self, other))
+
+    def __invert__(self) -> 'Query':
+        return Not(self)
+
+
+@dataclass(frozen=True)
+class Field(Query):
+    """Models whose indexed field (category, tag, parameter, unit, license) has a value"""
+
+    index: str
+    value: str
+
+    def mask(self, catalog: 'Catalog') -> int:
+        return catalog.indexes[self.index].get(catalog.index_key(self.index, self.value), 0)
+
+
+def Category(name: str) -> Query:
+    return Field('category', name)
+
+
+def Tag(name: str) -> Query:
+    return Field('tag', name)
+
+
+def Parameter(name: str) -> Query:
+    """Models accepting an input parameter"""
+    return Field('parameter', name)
+
+
+def BillingUnit(unit: str) -> Query:
+    return Field('unit', unit)
+
+
+def License(kind: str) -> Query:
+    return Field('license', kind)
+
+
+@dataclass(frozen=True)
+class Price(Query):
+    """Models priced within [low, high] per billing unit; unpriced models never match"""
+
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+    def mask(self, catalog: 'Catalog') -> int:
+        start = 0 if self.low is None else bisect.bisect_left(catalog.prices, self.low)
+        end = len(catalog.prices) if self.high is None else bisect.bisect_right(catalog.prices, self.high)
+        if start >= end:
+            return 0
+        return catalog.price_prefix[end] ^ catalog.price_prefix[start]
+
+
+@dataclass(frozen=True)
+class EnumValue(Query):
+    """Models whose input parameter offers `value` among its enum options"""
+
+    parameter: str
+    value: Any
+
+    def mask(self, catalog: 'Catalog') -> int:
+        return catalog.enum_index(self.parameter).get(str(self.value), 0)
+
+
+@dataclass(frozen=True)
+class And(Query):
+    parts: Tuple[Query, ...]
+
+    def mask(self, catalog: 'Catalog') -> int:
+        mask = catalog.all_mask
+        for part in self.parts:
+            mask &= catalog.mask(part)
+            if not mask:
+                break
+        return mask
+
+
+@dataclass(frozen=True)
+class Or(Query):
+    parts: Tuple[Query, ...]
+
+    def mask(self, catalog: 'Catalog') -> int:
+        mask = 0
+        for part in self.parts:
+            mask |= catalog.mask(part)
+        return mask
+
+
+@dataclass(frozen=True)
+class Not(Query):
+    part: Query
+
+    def mask(self, catalog: 'Catalog') -> int:
+        return catalog.all_mask & ~catalog.mask(self.part)
+
+
+@dataclass(frozen=True)
+class Everything(Query):
+    def mask(self, catalog: 'Catalog') -> int:
+        return catalog.all_mask
+
+
+class Catalog:
+    """fal model catalog with secondary indexes
+
+    Every model has a position; each index maps a value (category, tag,
+    input parameter name, normalized billing unit, license) to the bit set
+    of the positions having it, so combining conditions is integer
+    arithmetic. Prices are kept sorted with prefix bit sets, which makes a
+    price range two bisections and one XOR. Enum option indexes are built
+    per parameter on first use. Results are cached per query; the catalog
+    is read-only once built.
+    """
+
+    # Cached query results; the caches are cleared when they grow past this
+    CACHE_SIZE = 4096
+
+    INDEXES = ('category', 'tag', 'parameter', 'unit', 'license')
+
+    def __init__(self, models: List[Dict[str, Any]]):
+        self.models = models
+        self.by_id = {model['id']: model for model in models}
+        self.all_mask = (1 << len(models)) - 1
+        self.indexes: Dict[str, Dict[str, int]] = {name: {} for name in self.INDEXES}
+        self._enum_indexes: Dict[str, Dict[str, int]] = {}
+        self._masks: Dict[Query, int] = {}
+        self._results: Dict[Query, Tuple[Dict[str, Any], ...]] = {}
+
+        priced = []
+        for position, model in enumerate(models):
+            bit = 1 << position
+            pricing = model.get('pricing') or {}
+            values = {
+                'category': [model.get('category', '')],
+                'tag': model.get('tags') or [],
+                'parameter': list(model.get('inputParameters') or {}),
+                'unit': [pricing.get('billing_unit')] if pricing else [],
+                'license': [model.get('licenseType', '')],
+            }
+            for name, keys in values.items():
+                index = self.indexes[name]
+                for key in keys:
+                    key = self.index_key(name, key)
+                    index[key] = index.get(key, 0) | bit
+            if isinstance(pricing.get('price'), (int, float)):
+                priced.append((pricing['price'], position))
+
+        priced.sort()
+        self.prices = [price for price, _ in priced]
+        self.price_prefix = [0]
+        for _, position in priced:
+            self.price_prefix.append(self.price_prefix[-1] | 1 << position)
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_CATALOG_PATH) -> 'Catalog':
+        return cls(load_catalog_records(path))
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    @staticmethod
+    def index_key(index: str, value: Any) -> str:
+        if index == 'unit':
+            return normalize_unit(value)
+        return str(value or '')
+
+    def enum_index(self, parameter: str) -> Dict[str, int]:
+        """Enum option -> models offering it, for one input parameter"""
+        index = self._enum_indexes.get(parameter)
+        if index is None:
+            index = {}
+            for position in _positions(self.indexes['parameter'].get(parameter, 0)):
+                definition = self.models[position]['inputParameters'][parameter]
+                for option in (definition or {}).get('enum') or ():
+                    index[str(option)] = index.get(str(option), 0) | 1 << position
+            self._enum_indexes[parameter] = index
+        return index
+
+    def mask(self, query: Query) -> int:
+        mask = self._masks.get(query)
+        if mask is None:
+            mask = query.mask(self)
+            if len(self._masks) >= self.CACHE_SIZE:
+                self._masks.clear()
+            self._masks[query] = mask
+        return mask
+
+    def select(self, query: Query = Everything()) -> Tuple[Dict[str, Any], ...]:
+        """Matching models, in catalog order"""
+        result = self._results.get(query)
+        if result is None:
+            result = tuple(self.models[position] for position in _positions(self.mask(query)))
+            if len(self._results) >= self.CACHE_SIZE:
+                self._results.clear()
+            self._results[query] = result
+        return result
+
+    def ids(self, query: Query = Everything()) -> List[str]:
+        return [model['id'] for model in self.select(query)]
+
+    def count(self, query: Query = Everything()) -> int:
+        return bin(self.mask(query)).count('1')
+
+    def values(self, index: str) -> Dict[str, int]:
+        """Indexed values of a field with their model counts"""
+        return {value: bin(mask).count('1') for value, mask in sorted(self.indexes[index].items())}
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path: Path = DEFAULT_CATALOG_PATH) -> Catalog:
+    """The `Catalog` of a file, loaded once per process"""
+    return Catalog.load(Path(path))
+
+
+def _any_of(queries: List[Query]) -> Optional[Query]:
+    if not queries:
+        return None
+    return queries[0] if len(queries) == 1 else Or(tuple(queries))
+
+
+def build_query(args: argparse.Namespace) -> Query:
+    """Query from CLI options: repeated options are OR-ed, different options AND-ed"""
+    parts = [
+        _any_of([Category(value) for value in args.category or []]),
+        _any_of([Tag(value) for value in args.tag or []]),
+        _any_of([BillingUnit(value) for value in args.unit or []]),
+        _any_of([License(value) for value in args.license or []]),
+    ]
+    parts.extend(Parameter(name) for name in args.param or [])
+    for option in args.enum or []:
+        name, _, value = option.partition('=')
+        parts.append(EnumValue(name, value))
+    if args.min_price is not None or args.max_price is not None:
+        parts.append(Price(args.min_price, args.max_price))
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return Everything()
+    query = parts[0] if len(parts) == 1 else And(tuple(parts))
+    return ~query if args.exclude else query
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Query the fal model catalog')
+    parser.add_argument('--catalog', type=Path, default=DEFAULT_CATALOG_PATH,
+                        help='fal_models_schemas.json or the deduplicated catalog (default: data/fal_models_schemas.json)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    query = commands.add_parser('query', help='List the models matching every given condition')
+    query.add_argument('--category', action='append', help='Category, e.g. image-to-video (repeatable)')
+    query.add_argument('--tag', action='append', help='Tag (repeatable)')
+    query.add_argument('--param', action='append', help='Input parameter the model must accept (repeatable)')
+    query.add_argument('--enum', action='append', metavar='PARAM=VALUE',
+                       help='Input parameter whose enum must include VALUE, e.g. duration=10 (repeatable)')
+    query.add_argument('--unit', action='append', help='Billing unit, e.g. video or videos (repeatable)')
+    query.add_argument('--license', action='append', help='License type, e.g. commercial (repeatable)')
+    query.add_argument('--min-price', type=float, help='Minimum price per billing unit (inclusive)')
+    query.add_argument('--max-price', type=float, help='Maximum price per billing unit (inclusive)')
+    query.add_argument('--exclude', action='store_true', help='List the models not matching instead')
+    query.add_argument('--json', action='store_true', help='Print the full records as JSON')
+    query.add_argument('--count', action='store_true', help='Only print the number of matches')
+
+    values = commands.add_parser('values', help='List the indexed values of a field with model counts')
+    values.add_argument('index', choices=Catalog.INDEXES)
+
+    args = parser.parse_args(argv)
+    catalog = load_catalog(args.catalog)
+
+    if args.command == 'values':
+        for value, count in catalog.values(args.index).items():
+            print(f"{count:5d}  {value or '(none)'}")
+        return
+
+    query_filter = build_query(args)
+    if args.count:
+        print(catalog.count(query_filter))
+        return
+    models = catalog.select(query_filter)
+    if args.json:
+        json.dump([expand_model(model) for model in models], sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return
+    for model in models:
+        pricing = model.get('pricing') or {}
+        price = f"${pricing['price']}/{pricing.get('billing_unit', '')}" if 'price' in pricing else '-'
+        print(f"{model['id']:60s} {model.get('category', ''):20s} {price}")
+    print(f"\n{len(models)} models")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Change reports between two snapshots of the fal model catalog
+Records are matched by id and compared through per-record and per-field
+content hashes; the result is a structured changelog (JSON and markdown).
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fal_catalog import PARAMETER_SECTIONS, canonical_json, expand_model, load_catalog_records
+
+# Record fields that describe the fetch rather than the model
+IGNORED_FIELDS = ('freshness',)
+
+
+def fingerprint(data: Any) -> str:
+    return hashlib.sha256(canonical_json(data).encode('utf-8')).hexdigest()
+
+
+class Snapshot:
+    """Catalog records by id with a content hash of each record
+
+    Field and parameter hashes are only computed for records whose record
+    hash differs from the other snapshot's.
+    """
+
+    def __init__(self, models: List[Dict[str, Any]]):
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.hashes: Dict[str, str] = {}
+        for model in models:
+            record = {key: value for key, value in expand_model(model).items() if key not in IGNORED_FIELDS}
+            self.records[record['id']] = record
+            self.hashes[record['id']] = fingerprint(record)
+
+    @classmethod
+    def load(cls, path: Path) -> 'Snapshot':
+        """Load `fal_models_schemas.json` or a deduplicated catalog"""
+        return cls(load_catalog_records(path))
+
+    def field_hashes(self, model_id: str) -> Dict[str, str]:
+        return {key: fingerprint(value) for key, value in self.records[model_id].items()}
+
+
+def _summary(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': record['id'],
+        'title': record.get('title', ''),
+        'category': record.get('category', ''),
+        'pricing': record.get('pricing'),
+    }
+
+
+def _parameter_changes(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, List[str]]:
+    old = old or {}
+    new = new or {}
+    return {
+        'added': sorted(new.keys() - old.keys()),
+        'removed': sorted(old.keys() - new.keys()),
+        'changed': sorted(name for name in old.keys() & new.keys()
+                          if fingerprint(old[name]) != fingerprint(new[name])),
+    }
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Dict[str, Any]:
+    """Changelog between two snapshots
+
+    `changed` lists, per model, the fields whose hash differs with their
+    old and new values; parameter sections are reduced to the names of the
+    added, removed and changed parameters.
+    """
+    added = [_summary(new.records[model_id]) for model_id in new.hashes if model_id not in old.hashes]
+    removed = [_summary(old.records[model_id]) for model_id in old.hashes if model_id not in new.hashes]
+
+    changed = []
+    unchanged = 0
+    for model_id, new_hash in new.hashes.items():
+        old_hash = old.hashes.get(model_id)
+        if old_hash is None:
+            continue
+        if old_hash == new_hash:
+            unchanged += 1
+            continue
+        old_fields, new_fields = old.field_hashes(model_id), new.field_hashes(model_id)
+        old_record, new_record = old.records[model_id], new.records[model_id]
+        fields = {}
+        for key in sorted(old_fields.keys() | new_fields.keys()):
+            if old_fields.get(key) == new_fields.get(key):
+                continue
+            if key in PARAMETER_SECTIONS:
+                fields[key] = _parameter_changes(old_record.get(key), new_record.get(key))
+            else:
+                fields[key] = {'old': old_record.get(key), 'new': new_record.get(key)}
+        changed.append({'id': model_id, 'category': new_record.get('category', ''), 'fields': fields})
+
+    return {
+        'summary': {
+            'added': len(added),
+            'removed': len(removed),
+            'changed': len(changed),
+            'unchanged': unchanged,
+        },
+        'added': sorted(added, key=lambda entry: entry['id']),
+        'removed': sorted(removed, key=lambda entry: entry['id']),
+        'changed': sorted(changed, key=lambda entry: entry['id']),
+    }
+
+
+def affected_ids(changelog: Dict[str, Any]) -> List[str]:
+    """Ids of every added, removed or changed model, for targeted rebuilds"""
+    return sorted({entry['id'] for key in ('added', 'removed', 'changed') for entry in changelog[key]})
+
+
+def _price(pricing: Optional[Dict[str, Any]]) -> str:
+    if not pricing or 'price' not in pricing:
+        return '-'
+    return f"${pricing['price']}/{pricing.get('billing_unit', '')}"
+
+
+def changelog_markdown(changelog: Dict[str, Any], title: str = 'fal catalog changes') -> str:
+    """Render a changelog for humans: additions, removals, pricing, deprecations, parameters"""
+    summary = changelog['summary']
+    lines = [
+        f"# {title}",
+        '',
+        f"{summary['added']} added, {summary['removed']} removed, "
+        f"{summary['changed']} changed, {summary['unchanged']} unchanged",
+    ]
+
+    def section(heading: str, entries: List[str], header: Sequence[str] = ()) -> None:
+        if entries:
+            lines.extend(['', f"## {heading} ({len(entries)})", '', *header])
+            lines.extend(entries)
+
+    section('Added', [f"- `{e['id']}` {e['title']} ({e['category']}, {_price(e['pricing'])})"
+                      for e in changelog['added']])
+    section('Removed', [f"- `{e['id']}` {e['title']} ({e['category']})" for e in changelog['removed']])
+
+    pricing, deprecations, parameters, other = [], [], [], []
+    for entry in changelog['changed']:
+        fields = entry['fields']
+        if 'pricing' in fields:
+            pricing.append(f"| `{entry['id']}` | {_price(fields['pricing']['old'])} | "
+                           f"{_price(fields['pricing']['new'])} |")
+        if 'deprecated' in fields:
+            state = 'deprecated' if fields['deprecated']['new'] else 'no longer deprecated'
+            deprecations.append(f"- `{entry['id']}` {state}")
+        for section_name in PARAMETER_SECTIONS:
+            if section_name in fields:
+                changes = fields[section_name]
+                parts = [f"{sign}{name}" for sign, key in (('+', 'added'), ('-', 'removed'), ('~', 'changed'))
+                         for name in changes[key]]
+                parameters.append(f"- `{entry['id']}` {section_name}: {', '.join(parts)}")
+        rest = sorted(set(fields) - {'pricing', 'deprecated', *PARAMETER_SECTIONS})
+        if rest:
+            other.append(f"- `{entry['id']}`: {', '.join(rest)}")
+
+    section('Pricing', pricing, ('| Model | Old | New |', '|-------|-----|-----|'))
+    section('Deprecations', deprecations)
+    section('Parameters', parameters)
+    section('Other changes', other)
+    return '\n'.join(lines) + '\n'
+
+
+def changelog_paths(path: Path) -> Tuple[Path, Path]:
+    """`<path>.json` and `<path>.md`; the suffixes are appended, not substituted"""
+    path = Path(path)
+    return path.with_name(path.name + '.json'), path.with_name(path.name + '.md')
+
+
+def write_changelog(changelog: Dict[str, Any], path: Path) -> None:
+    """Write `<path>.json` and `<path>.md`"""
+    json_path, markdown_path = changelog_paths(path)
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(changelog, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    with open(markdown_path, 'w', encoding='utf-8') as f:
+        f.write(changelog_markdown(changelog))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Compare two snapshots of the fal model catalog')
+    parser.add_argument('old', type=Path, help='Older fal_models_schemas.json (or deduplicated catalog)')
+    parser.add_argument('new', type=Path, help='Newer fal_models_schemas.json (or deduplicated catalog)')
+    parser.add_argument('--format', choices=('markdown', 'json', 'ids'), default='markdown',
+                        help='Output printed to stdout (default: %(default)s)')
+    parser.add_argument('--output', type=Path, help='Also write the changelog to OUTPUT.json and OUTPUT.md')
+    args = parser.parse_args(argv)
+
+    changelog = diff_snapshots(Snapshot.load(args.old), Snapshot.load(args.new))
+    if args.output:
+        write_changelog(changelog, args.output)
+    if args.format == 'json':
+        json.dump(changelog, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    elif args.format == 'ids':
+        print('\n'.join(affected_ids(changelog)))
+    else:
+        sys.stdout.write(changelog_markdown(changelog))
+
+
+if __name__ == '__main__':
+    main()
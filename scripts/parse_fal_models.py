@@ -4,337 +4,1527 @@ Script to parse all model schemas from fal.ai
 Fetches all models from the API and their OpenAPI schemas
 """
 
+import argparse
+import asyncio
+import calendar
+import codecs
+import hashlib
 import json
-import requests
-import time
+import os
 import re
-import codecs
-from typing import Dict, List, Any, Optional
+import sys
+import time
+from functools import partial
+from json.decoder import scanstring
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
-
-def fetch_all_models() -> List[Dict[str, Any]]:
-    """Fetch all models from fal.ai API with pagination"""
-    all_models = []
-    page = 1
-    
+from urllib.parse import urlparse
+
+import aiohttp
+
+from fal_catalog import DefinitionTable, canonical_json, dump_deduplicated
+from fal_catalog_diff import Snapshot, changelog_paths, diff_snapshots, write_changelog
+
+# Helpers shared with the docs scraper
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools' / 'docs-scraper'))
+from http_cache import (  # noqa: E402
+    DEFAULT_CACHE_DIR,
+    DEFAULT_MAX_BYTES,
+    CacheMiss,
+    CachedResponse,
+    ResponseCache,
+    conditional_headers,
+)
+from rate_limit import (  # noqa: E402
+    DEFAULT_MAX_RETRIES,
+    RETRY_STATUSES,
+    RateLimiter,
+    parse_retry_after,
+)
+from run_metrics import RunMetrics  # noqa: E402
+from search_index import Document, SearchIndex  # noqa: E402
+
+MODELS_API_URL = "https://fal.ai/api/models?page={page}"
+OPENAPI_URL = "https://fal.ai/api/openapi/queue/openapi.json?endpoint_id={endpoint_id}"
+PLAYGROUND_URL = "https://fal.ai/models/{endpoint_id}"
+
+USER_AGENT = "Mozilla/5.0 (compatible; DocsScraper/1.0)"
+REQUEST_TIMEOUT = 30
+KEEPALIVE_TIMEOUT = 60
+DEFAULT_CONCURRENCY_PER_HOST = 10
+DEFAULT_PAGE_FANOUT = 4
+STREAM_CHUNK_SIZE = 16384
+
+# How long cached responses are served without revalidation, per source
+CATALOG_CACHE_TTL = 3600
+SCHEMA_CACHE_TTL = 24 * 3600
+PLAYGROUND_CACHE_TTL = 24 * 3600
+
+DEFAULT_OUTPUT_DIR = Path(__file__).parent.parent / 'data'
+JOURNAL_FILENAME = 'fal_models_schemas.journal.jsonl'
+PRICING_INDEX_FILENAME = 'fal_pricing_index.json'
+DEDUPLICATED_CATALOG_FILENAME = 'fal_models_catalog.json'
+SCHEMA_SHARDS_DIRNAME = 'fal_schemas'
+SEARCH_INDEX_FILENAME = 'fal_models_search.idx'
+
+# Suffixes accepted by --stale-older-than, in seconds
+AGE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+# Input parameters whose defaults the cost calculation in src/lib/pricing.ts reads
+PRICING_INPUT_PARAMETERS = ('duration', 'image_size', 'aspect_ratio')
+
+# Parameter definitions shared by every model parsed or loaded in this run
+DEFINITIONS = DefinitionTable()
+
+
+class Fetched(NamedTuple):
+    """Result of a possibly conditional fetch
+
+    `modified` is False when the server confirmed the stored validators
+    (304 Not Modified) or when the resource could not be checked, in which
+    case callers keep what they already have.
+    """
+    data: Any
+    validators: Dict[str, Optional[str]]
+    modified: bool = True
+
+def response_validators(response: aiohttp.ClientResponse) -> Dict[str, Optional[str]]:
+    """Extract the cache validators of a response"""
+    return {
+        'etag': response.headers.get('ETag'),
+        'lastModified': response.headers.get('Last-Modified'),
+    }
+
+def content_hash(data: Any) -> str:
+    """SHA-256 of the canonical JSON encoding of `data`"""
+    return hashlib.sha256(canonical_json(data).encode('utf-8')).hexdigest()
+
+def utc_timestamp() -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+class AsyncFetcher:
+    """Asyncio HTTP client with one pooled keep-alive session per host
+
+    With a `ResponseCache`, fresh entries are served without a request and
+    stale ones are revalidated with their validators. `ttl_override`
+    replaces the per-source TTLs passed by callers (0 revalidates
+    everything). Every request is recorded in `metrics` under its `kind`
+    (catalog, schema, pricing), including the time it waited for a pooled
+    connection.
+
+    Requests are paced per host by a `RateLimiter` that backs off on
+    429/5xx and connection errors; those are retried up to `max_retries`
+    times with Retry-After or jittered exponential backoff.
+    """
+
+    def __init__(self, concurrency_per_host: int = DEFAULT_CONCURRENCY_PER_HOST,
+                 timeout: float = REQUEST_TIMEOUT,
+                 cache: Optional[ResponseCache] = None,
+                 ttl_override: Optional[float] = None,
+                 metrics: Optional[RunMetrics] = None,
+                 max_rate: Optional[float] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        self.concurrency_per_host = concurrency_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.cache = cache
+        self.ttl_override = ttl_override
+        self.metrics = metrics or RunMetrics('parse_fal_models')
+        self.limiter = RateLimiter(rate=max_rate, max_rate=max_rate,
+                                   max_concurrency=concurrency_per_host)
+        self.max_retries = max_retries
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._trace_config = aiohttp.TraceConfig()
+        self._trace_config.on_connection_queued_start.append(self._on_queued_start)
+        self._trace_config.on_connection_queued_end.append(self._on_queued_end)
+
+    async def __aenter__(self) -> 'AsyncFetcher':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @staticmethod
+    async def _on_queued_start(session, context, params) -> None:
+        context.queued_at = time.perf_counter()
+
+    @staticmethod
+    async def _on_queued_end(session, context, params) -> None:
+        record = context.trace_request_ctx
+        if record is not None:
+            record.queue_wait += time.perf_counter() - context.queued_at
+
+    def session_for(self, url: str) -> aiohttp.ClientSession:
+        """Return the pooled session for the URL's host, creating it on first use"""
+        host = urlparse(url).netloc
+        session = self._sessions.get(host)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self.concurrency_per_host,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={'User-Agent': USER_AGENT},
+                trace_configs=[self._trace_config],
+            )
+            self._sessions[host] = session
+        return session
+
+    async def _open(self, url: str, headers: Dict[str, str], record: Any) -> aiohttp.ClientResponse:
+        """Send a GET through the host's rate limiter, retrying transient failures
+
+        Returns the response once its status is final (not retryable or out
+        of retries); the caller reads and releases it.
+        """
+        attempt = 0
+        while True:
+            record.queue_wait += await self.limiter.acquire_async(url)
+            try:
+                response = await self.session_for(url).get(url, headers=headers,
+                                                           trace_request_ctx=record)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                self.limiter.release(url, None)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.limiter.retry_delay(attempt)
+            except BaseException:
+                # Cancelled tasks, redirect loops, bad URLs...: the slot must not leak
+                self.limiter.cancel(url)
+                raise
+            else:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                self.limiter.release(url, response.status, retry_after)
+                if response.status not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                self.metrics.count(f"retry_status_{response.status}")
+                delay = self.limiter.retry_delay(attempt, retry_after)
+                response.release()
+            attempt += 1
+            record.retries = attempt
+            await asyncio.sleep(delay)
+
+    def _cached(self, url: str, ttl: Optional[float],
+                allow_partial: bool = False) -> Tuple[Optional[CachedResponse], bool]:
+        """Look up `url` in the cache; returns the entry and whether it is fresh"""
+        if self.cache is None:
+            return None, False
+        entry = self.cache.lookup(url, allow_partial)
+        if self.ttl_override is not None:
+            ttl = self.ttl_override
+        if entry is not None and self.cache.is_fresh(entry, ttl):
+            return entry, True
+        if self.cache.offline:
+            raise CacheMiss(url)
+        return entry, False
+
+    async def get_json(self, url: str, ttl: Optional[float] = None, kind: str = 'http') -> Any:
+        """GET a URL and decode the JSON body"""
+        return (await self.get_json_conditional(url, ttl=ttl, kind=kind)).data
+
+    async def get_json_conditional(self, url: str,
+                                   validators: Optional[Dict[str, Optional[str]]] = None,
+                                   ttl: Optional[float] = None,
+                                   kind: str = 'http') -> Fetched:
+        """Conditional GET of a JSON document using stored validators"""
+        with self.metrics.request(url, kind) as record:
+            entry, fresh = self._cached(url, ttl)
+            if fresh:
+                record.cached = True
+                if entry.matches(validators):
+                    return Fetched(None, dict(validators), modified=False)
+                return Fetched(json.loads(entry.body), entry.validators())
+
+            headers = conditional_headers(validators) or conditional_headers(entry and entry.validators())
+            async with await self._open(url, headers, record) as response:
+                record.status = response.status
+                if response.status == 304:
+                    if entry is not None and (not validators or entry.matches(validators)):
+                        entry = self.cache.revalidated(entry, response.headers)
+                        if not validators:
+                            return Fetched(json.loads(entry.body), entry.validators())
+                    return Fetched(None, dict(validators or {}), modified=False)
+                response.raise_for_status()
+                body = await response.read()
+                record.bytes = len(body)
+                if self.cache is not None:
+                    self.cache.store(url, response.status, response.headers, body)
+            with self.metrics.timer(f"{kind}_decode"):
+                return Fetched(json.loads(body), response_validators(response))
+
+    async def stream_text(self, url: str, consume: Callable[[str, bool], bool],
+                          chunk_size: int = STREAM_CHUNK_SIZE,
+                          validators: Optional[Dict[str, Optional[str]]] = None,
+                          ttl: Optional[float] = None,
+                          kind: str = 'http') -> Fetched:
+        """GET a URL and feed the decoded body to `consume` chunk by chunk
+
+        `consume(text, final)` returns True to stop reading; the rest of the
+        body is then discarded and the connection is closed. Nothing is fed
+        when the server answers 304 to the conditional request. Bodies cut
+        short this way are cached as partial entries, which are only
+        replayed to streaming readers.
+        """
+        with self.metrics.request(url, kind) as record:
+            entry, fresh = self._cached(url, ttl, allow_partial=True)
+            if fresh:
+                record.cached = True
+                if entry.matches(validators):
+                    return Fetched(None, dict(validators), modified=False)
+                consume(entry.text(), True)
+                return Fetched(None, entry.validators())
+
+            headers = conditional_headers(validators) or conditional_headers(entry and entry.validators())
+            async with await self._open(url, headers, record) as response:
+                record.status = response.status
+                if response.status == 304:
+                    if entry is not None and (not validators or entry.matches(validators)):
+                        entry = self.cache.revalidated(entry, response.headers)
+                        if not validators:
+                            consume(entry.text(), True)
+                            return Fetched(None, entry.validators())
+                    return Fetched(None, dict(validators or {}), modified=False)
+                response.raise_for_status()
+
+                chunks = []
+                complete = True
+                decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    chunks.append(chunk)
+                    record.bytes += len(chunk)
+                    if consume(decoder.decode(chunk), False):
+                        response.close()
+                        complete = False
+                        self.metrics.count(f"{kind}_stopped_early")
+                        break
+                else:
+                    consume(decoder.decode(b'', final=True), True)
+
+                if self.cache is not None:
+                    self.cache.store(url, response.status, response.headers, b''.join(chunks), complete)
+                return Fetched(None, response_validators(response))
+
+    async def close(self) -> None:
+        """Close every pooled session"""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            await session.close()
+
+
+async def fetch_models_page(fetcher: AsyncFetcher, page: int) -> Dict[str, Any]:
+    """Fetch a single page of the fal.ai models catalog"""
+    return await fetcher.get_json(MODELS_API_URL.format(page=page), ttl=CATALOG_CACHE_TTL, kind='catalog')
+
+def merge_model_pages(pages: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Merge catalog pages in page order, keeping the first entry for each id"""
+    merged = []
+    seen_ids = set()
+    for items in pages:
+        for item in items:
+            model_id = item.get('id')
+            if model_id is not None:
+                if model_id in seen_ids:
+                    continue
+                seen_ids.add(model_id)
+            merged.append(item)
+    return merged
+
+async def fetch_all_models(fetcher: AsyncFetcher,
+                           page_fanout: int = DEFAULT_PAGE_FANOUT) -> List[Dict[str, Any]]:
+    """Fetch all models from fal.ai API with pagination
+
+    Page 1 is fetched first to learn the page count. With page_fanout > 1
+    the remaining pages are then requested in parallel, at most page_fanout
+    at a time; otherwise they are walked one by one.
+    """
     print("Fetching models from fal.ai API...")
-    
-    while True:
-        url = f"https://fal.ai/api/models?page={page}"
-        print(f"Fetching page {page}...")
-        
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            items = data.get('items', [])
-            all_models.extend(items)
-            
-            total_pages = data.get('pages', 1)
+
+    try:
+        data = await fetch_models_page(fetcher, 1)
+    except CacheMiss:
+        raise
+    except Exception as e:
+        print(f"Error fetching page 1: {e}")
+        return []
+
+    total_pages = data.get('pages', 1)
+    pages = [data.get('items', [])]
+    print(f"  Got {len(pages[0])} models (page 1/{total_pages})")
+
+    if page_fanout > 1:
+        slots = asyncio.Semaphore(page_fanout)
+
+        async def fetch_page_items(page: int) -> List[Dict[str, Any]]:
+            async with slots:
+                try:
+                    items = (await fetch_models_page(fetcher, page)).get('items', [])
+                except CacheMiss:
+                    raise
+                except Exception as e:
+                    print(f"Error fetching page {page}: {e}")
+                    return []
             print(f"  Got {len(items)} models (page {page}/{total_pages})")
-            
-            if page >= total_pages:
+            return items
+
+        pages.extend(await asyncio.gather(
+            *(fetch_page_items(page) for page in range(2, total_pages + 1))
+        ))
+    else:
+        for page in range(2, total_pages + 1):
+            print(f"Fetching page {page}...")
+            try:
+                items = (await fetch_models_page(fetcher, page)).get('items', [])
+            except CacheMiss:
+                raise
+            except Exception as e:
+                print(f"Error fetching page {page}: {e}")
                 break
-                
-            page += 1
-            time.sleep(0.5)  # Be nice to the API
-            
-        except Exception as e:
-            print(f"Error fetching page {page}: {e}")
-            break
-    
+            pages.append(items)
+            print(f"  Got {len(items)} models (page {page}/{total_pages})")
+
+    all_models = merge_model_pages(pages)
     print(f"\nTotal models fetched: {len(all_models)}")
     return all_models
 
-def fetch_openapi_schema(endpoint_id: str) -> Dict[str, Any]:
-    """Fetch OpenAPI schema for a specific model"""
-    url = f"https://fal.ai/api/openapi/queue/openapi.json?endpoint_id={endpoint_id}"
-    
+async def fetch_openapi_schema(fetcher: AsyncFetcher, endpoint_id: str,
+                               validators: Optional[Dict[str, Optional[str]]] = None) -> Fetched:
+    """Fetch OpenAPI schema for a specific model
+
+    With stored validators the request is conditional. A model without a
+    schema (404 or another client error, or an invalid document) yields an
+    empty schema. Rate limiting, server errors and network failures that
+    persist after retries are raised, so the model is reported as failed
+    rather than dropped.
+    """
+    url = OPENAPI_URL.format(endpoint_id=endpoint_id)
+
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
+        return await fetcher.get_json_conditional(url, validators, ttl=SCHEMA_CACHE_TTL, kind='schema')
+    except aiohttp.ClientResponseError as e:
+        if e.status in RETRY_STATUSES:
+            raise
         print(f"  Error fetching schema for {endpoint_id}: {e}")
-        return {}
+        return Fetched({}, {})
+    except ValueError as e:
+        print(f"  Invalid schema for {endpoint_id}: {e}")
+        return Fetched({}, {})
 
-def parse_input_schema(openapi_schema: Dict[str, Any]) -> Dict[str, Any]:
-    """Extract input schema from OpenAPI spec"""
-    try:
-        components = openapi_schema.get('components', {})
-        schemas = components.get('schemas', {})
-        
-        input_schema = None
-        for schema_name, schema_def in schemas.items():
-            if 'Input' in schema_name:
-                input_schema = schema_def
-                break
-        
-        if not input_schema:
-            return {}
-        
-        properties = input_schema.get('properties', {})
-        required = input_schema.get('required', [])
-        
+# Keywords copied from a schema into its parameter node
+PARAMETER_KEYWORDS = ('enum', 'minimum', 'maximum', 'minLength', 'maxLength', 'minItems', 'maxItems',
+                      'format', 'default', 'examples')
+COMPONENT_REF_PREFIX = '#/components/schemas/'
+
+# Bumped when the parameter trees change shape, so --refresh re-parses
+# records whose schema itself is unchanged
+SCHEMA_PARSER_VERSION = 2
+
+
+class SchemaDocument:
+    """Per-document state of a `SchemaResolver`"""
+
+    def __init__(self, openapi_schema: Dict[str, Any]):
+        self.openapi_schema = openapi_schema
+        self.components = openapi_schema.get('components', {}).get('schemas', {})
+        self.keys: Dict[str, Optional[str]] = {}
+
+
+class SchemaResolver:
+    """Turns OpenAPI schemas into flattened, ready-to-render parameter trees
+
+    `$ref`s are inlined, `allOf` is merged and `anyOf`/`oneOf` with a null
+    variant collapse to the other variant marked `nullable`; real unions
+    keep their resolved variants in `anyOf`. Object properties carry a
+    `required` flag.
+
+    Resolved components are memoized across documents under a hash of their
+    definition and of everything they reference, so the `ImageSize` or
+    `File` blocks repeated in hundreds of models are resolved once per run.
+    A reference back into a component being resolved becomes a
+    `{'recursive': name}` stub instead of recursing forever.
+    """
+
+    def __init__(self):
+        self.resolved: Dict[str, Dict[str, Any]] = {}
+        self._document: Optional[SchemaDocument] = None
+
+    def document(self, openapi_schema: Dict[str, Any]) -> SchemaDocument:
+        if self._document is None or self._document.openapi_schema is not openapi_schema:
+            self._document = SchemaDocument(openapi_schema)
+        return self._document
+
+    def _component_key(self, name: str, document: SchemaDocument, stack: Tuple[str, ...] = ()) -> Optional[str]:
+        """Content key of a component and its references; None if it is part of a cycle"""
+        if name in document.keys:
+            return document.keys[name]
+        schema = document.components.get(name)
+        if schema is None or name in stack:
+            return None
+        refs = sorted(set(_component_refs(schema)))
+        ref_keys = [self._component_key(ref, document, stack + (name,)) for ref in refs]
+        key = None
+        if None not in ref_keys:
+            key = content_hash([schema, dict(zip(refs, ref_keys))])
+        document.keys[name] = key
+        return key
+
+    def _component(self, name: str, document: SchemaDocument, stack: Tuple[str, ...]) -> Dict[str, Any]:
+        if name in stack:
+            return {'type': 'object', 'description': '', 'recursive': name}
+        schema = document.components.get(name)
+        if schema is None:
+            return {'type': None, 'description': '', 'unresolved': COMPONENT_REF_PREFIX + name}
+        key = self._component_key(name, document)
+        if key is not None and key in self.resolved:
+            return self.resolved[key]
+        node = self.resolve(schema, document, stack + (name,))
+        if key is not None:
+            self.resolved[key] = node
+        return node
+
+    def resolve(self, schema: Dict[str, Any], document: SchemaDocument,
+                stack: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """Parameter node for a schema of `document`"""
+        if not isinstance(schema, dict):
+            return {'type': None, 'description': ''}
+
+        ref = schema.get('$ref')
+        if isinstance(ref, str):
+            if ref.startswith(COMPONENT_REF_PREFIX):
+                node = self._component(ref[len(COMPONENT_REF_PREFIX):], document, stack)
+            else:
+                node = {'type': None, 'description': '', 'unresolved': ref}
+            return _override(node, schema)
+
+        if 'allOf' in schema:
+            node: Dict[str, Any] = {'type': None, 'description': ''}
+            for part in schema['allOf']:
+                node = _merge_nodes(node, self.resolve(part, document, stack))
+            rest = {key: value for key, value in schema.items() if key != 'allOf'}
+            return _merge_nodes(node, self.resolve(rest, document, stack)) if rest else node
+
+        variants = schema.get('anyOf') or schema.get('oneOf')
+        if variants:
+            nodes = [self.resolve(variant, document, stack) for variant in variants]
+            values = [node for node in nodes if node.get('type') != 'null']
+            if len(values) == 1:
+                node = dict(values[0])
+            else:
+                types = {value.get('type') for value in values}
+                node = {'type': types.pop() if len(types) == 1 else None, 'description': '', 'anyOf': values}
+            if len(values) < len(nodes):
+                node['nullable'] = True
+            return _override(node, schema)
+
+        schema_type = schema.get('type')
+        nullable = False
+        if isinstance(schema_type, list):
+            types = [t for t in schema_type if t != 'null']
+            nullable = len(types) < len(schema_type)
+            schema_type = types[0] if len(types) == 1 else (types or None)
+        if schema_type is None:
+            schema_type = 'object' if 'properties' in schema else 'array' if 'items' in schema else None
+        node = {'type': schema_type, 'description': schema.get('description', '')}
+        for keyword in PARAMETER_KEYWORDS:
+            if keyword in schema:
+                node[keyword] = schema[keyword]
+        if nullable or schema.get('nullable'):
+            node['nullable'] = True
+        if 'items' in schema:
+            node['items'] = self.resolve(schema['items'], document, stack)
+        if 'properties' in schema:
+            node['properties'] = self.parameters_of(schema, document, stack)
+        return node
+
+    def parameters_of(self, schema: Dict[str, Any], document: SchemaDocument,
+                      stack: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """Resolved properties of an object schema, each with its `required` flag"""
+        required = schema.get('required', [])
         parameters = {}
-        for prop_name, prop_def in properties.items():
-            param_info = {
-                'type': prop_def.get('type'),
-                'description': prop_def.get('description', ''),
-                'required': prop_name in required,
+        for name, definition in schema.get('properties', {}).items():
+            node = self.resolve(definition, document, stack)
+            parameters[name] = {
+                'type': node.get('type'),
+                'description': node.get('description', ''),
+                'required': name in required,
+                **{key: value for key, value in node.items() if key not in ('type', 'description', 'required')},
             }
-            
-            if 'enum' in prop_def:
-                param_info['enum'] = prop_def['enum']
-            if 'minimum' in prop_def:
-                param_info['minimum'] = prop_def['minimum']
-            if 'maximum' in prop_def:
-                param_info['maximum'] = prop_def['maximum']
-            if 'minLength' in prop_def:
-                param_info['minLength'] = prop_def['minLength']
-            if 'maxLength' in prop_def:
-                param_info['maxLength'] = prop_def['maxLength']
-            if 'default' in prop_def:
-                param_info['default'] = prop_def['default']
-            if 'examples' in prop_def:
-                param_info['examples'] = prop_def['examples']
-            if 'items' in prop_def:
-                param_info['items'] = prop_def['items']
-            if 'properties' in prop_def:
-                param_info['properties'] = prop_def['properties']
-            
-            parameters[prop_name] = param_info
-        
         return parameters
+
+    def parameters(self, openapi_schema: Dict[str, Any], schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Top-level parameters of an endpoint's request or response schema"""
+        if not schema:
+            return {}
+        document = self.document(openapi_schema)
+        node = self.resolve(schema, document)
+        if 'properties' in node:
+            return node['properties']
+        return {}
+
+
+def _component_refs(data: Any) -> Iterator[str]:
+    """Names of the components referenced anywhere in a schema"""
+    if isinstance(data, dict):
+        ref = data.get('$ref')
+        if isinstance(ref, str) and ref.startswith(COMPONENT_REF_PREFIX):
+            yield ref[len(COMPONENT_REF_PREFIX):]
+        for value in data.values():
+            yield from _component_refs(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from _component_refs(value)
+
+
+def _override(node: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a schema's own description and keywords on top of a resolved node"""
+    own = {key: schema[key] for key in ('description', *PARAMETER_KEYWORDS) if key in schema}
+    if schema.get('nullable'):
+        own['nullable'] = True
+    return {**node, **own} if own else node
+
+
+def _merge_nodes(base: Dict[str, Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine two `allOf` parts; later non-empty values win, properties are united"""
+    merged = dict(base)
+    for key, value in extra.items():
+        if key == 'properties':
+            merged['properties'] = {**base.get('properties', {}), **value}
+        elif value not in (None, ''):
+            merged[key] = value
+    return merged
+
+
+# Resolved schemas shared by every model parsed in this run
+SCHEMAS = SchemaResolver()
+
+
+def _json_body_schema(content_holder: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    content = (content_holder or {}).get('content', {})
+    media = content.get('application/json') or next(iter(content.values()), {})
+    return media.get('schema')
+
+
+def select_endpoint_schemas(openapi_schema: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]],
+                                                                    Optional[Dict[str, Any]]]:
+    """Input and output schemas of a queue OpenAPI document
+
+    The input is the JSON request body of the submit endpoint (the POST
+    with a request body) and the output the 200 response of the result
+    endpoint (`GET .../requests/{request_id}`). Documents without those
+    fall back to the first component named like `*Input` and
+    `*Output`/`*Response`.
+    """
+    input_schema = output_schema = None
+    for path, operations in openapi_schema.get('paths', {}).items():
+        if not isinstance(operations, dict):
+            continue
+        post = operations.get('post') or {}
+        if input_schema is None and post.get('requestBody'):
+            input_schema = _json_body_schema(post['requestBody'])
+        get = operations.get('get') or {}
+        if output_schema is None and path.rstrip('/').endswith('/requests/{request_id}'):
+            output_schema = _json_body_schema(get.get('responses', {}).get('200'))
+
+    schemas = openapi_schema.get('components', {}).get('schemas', {})
+    if input_schema is None:
+        input_schema = next((definition for name, definition in schemas.items() if 'Input' in name), None)
+    if output_schema is None:
+        output_schema = next((definition for name, definition in schemas.items()
+                              if 'Output' in name or 'Response' in name), None)
+    return input_schema, output_schema
+
+def parse_input_schema(openapi_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract input schema from OpenAPI spec as resolved parameter trees"""
+    try:
+        return SCHEMAS.parameters(openapi_schema, select_endpoint_schemas(openapi_schema)[0])
     except Exception as e:
         print(f"  Error parsing input schema: {e}")
         return {}
 
 def parse_output_schema(openapi_schema: Dict[str, Any]) -> Dict[str, Any]:
-    """Extract output schema from OpenAPI spec"""
+    """Extract output schema from OpenAPI spec as resolved parameter trees"""
     try:
-        components = openapi_schema.get('components', {})
-        schemas = components.get('schemas', {})
-        
-        output_schema = None
-        for schema_name, schema_def in schemas.items():
-            if 'Output' in schema_name or 'Response' in schema_name:
-                output_schema = schema_def
-                break
-        
-        if not output_schema:
-            return {}
-        
-        properties = output_schema.get('properties', {})
-        
-        outputs = {}
-        for prop_name, prop_def in properties.items():
-            output_info = {
-                'type': prop_def.get('type'),
-                'description': prop_def.get('description', ''),
-            }
-            
-            if 'items' in prop_def:
-                output_info['items'] = prop_def['items']
-            if 'properties' in prop_def:
-                output_info['properties'] = prop_def['properties']
-            
-            outputs[prop_name] = output_info
-        
-        return outputs
+        return SCHEMAS.parameters(openapi_schema, select_endpoint_schemas(openapi_schema)[1])
     except Exception as e:
         print(f"  Error parsing output schema: {e}")
         return {}
 
-def extract_escaped_json_object(html: str, key: str) -> Optional[Dict[str, Any]]:
-    """Extract an escaped JSON object from HTML by key using brace counting"""
-    search_str = key + '\\":{' 
-    idx = html.find(search_str)
-    if idx == -1:
-        search_str = '"' + key + '":{' 
-        idx = html.find(search_str)
-    
-    if idx == -1:
-        return None
-    
-    start = html.find('{', idx)
-    if start == -1:
-        return None
-    
-    depth = 0
-    end = None
-    for i in range(start, len(html)):
-        if html[i] == '{':
-            depth += 1
-        elif html[i] == '}':
-            depth -= 1
-            if depth == 0:
-                end = i + 1
-                break
-    
-    if end is None:
-        return None
-    
-    raw_obj = html[start:end]
-    
-    if '\\"' in raw_obj or '\\n' in raw_obj or '\\/' in raw_obj:
+BILLING_KEYS = ('publicEndpointBilling', 'endpointBilling')
+JSON_DECODE_WINDOW = 4096
+
+_json_decoder = json.JSONDecoder()
+_partial_escape = re.compile(r'(\\+)(u[0-9a-fA-F]{0,3})?$')
+
+_json_key_suffix = re.compile(r'(\\?)"\s*:\s*\{')
+
+def _decode_escaped_object(text: str, start: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Decode a JSON object that sits inside a JSON string literal
+
+    Only a window after `start` is unescaped; it grows geometrically until
+    the object decodes or the enclosing string literal ends, so the cost is
+    proportional to the object rather than the page. Returns the object
+    (or None) and whether decoding failed only because `text` ran out.
+    """
+    window = JSON_DECODE_WINDOW
+    while True:
+        end = min(len(text), start + window)
+        chunk = text[start:end]
+
+        # Never cut an escape sequence in half at the window edge
+        partial = _partial_escape.search(chunk)
+        if partial and len(partial.group(1)) % 2:
+            chunk = chunk[:partial.start() + len(partial.group(1)) - 1]
+
         try:
-            unescaped = codecs.decode(raw_obj, 'unicode_escape')
-        except Exception:
-            unescaped = raw_obj.replace('\\"', '"').replace('\\/', '/')
-    else:
-        unescaped = raw_obj
-    
-    try:
-        return json.loads(unescaped)
-    except json.JSONDecodeError:
-        return None
+            decoded, literal_end = scanstring(chunk + '"', 0, False)
+        except ValueError:
+            return None, False
+
+        try:
+            obj, _ = _json_decoder.raw_decode(decoded)
+            return (obj if isinstance(obj, dict) else None), False
+        except json.JSONDecodeError:
+            if literal_end <= len(chunk):
+                return None, False
+            if end >= len(text):
+                return None, True
+            window *= 4
+
+def _find_json_object(text: str, key: str,
+                      complete: bool = True) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+    """Find the first decodable object stored under `key` in `text`
+
+    Returns the object, or None together with the offset of an occurrence
+    that may still decode once more text arrives (only when `complete` is
+    False, i.e. `text` is a prefix of a streamed page).
+    """
+    pos = text.find(key)
+    while pos != -1:
+        quote = pos - 1
+        key_end = pos + len(key)
+        suffix = _json_key_suffix.match(text, key_end)
+        if not suffix and not complete and len(text) - key_end < 16:
+            return None, pos
+        if suffix and quote >= 0 and text[quote] == '"':
+            escaped = quote > 0 and text[quote - 1] == '\\'
+            if escaped == bool(suffix.group(1)):
+                start = suffix.end() - 1
+                truncated = False
+                if escaped:
+                    obj, truncated = _decode_escaped_object(text, start)
+                else:
+                    try:
+                        obj, _ = _json_decoder.raw_decode(text, start)
+                    except json.JSONDecodeError:
+                        obj, truncated = None, True
+                if isinstance(obj, dict):
+                    return obj, None
+                if truncated and not complete:
+                    return None, pos
+        pos = text.find(key, key_end)
+    return None, None
 
-def extract_pricing(model_url: str) -> Optional[Dict[str, Any]]:
-    """Extract pricing information from model page HTML"""
+def scan_json_objects(text: str, keys: Sequence[str],
+                      complete: bool = True) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """Extract the JSON objects stored under `keys` in `text`
+
+    Handles both plain (`"key":{...}`) and JS-string-escaped (`\"key\":{...}`)
+    embeddings, as found in Next.js flight payloads. Key positions are
+    located with `str.find` and objects are decoded with the C JSON scanner,
+    so braces inside string values are handled correctly and the page is
+    never walked character by character in Python. The first decodable
+    occurrence of each key wins; missing keys are absent from the result.
+
+    Also returns the offset from which `text` has to be kept when scanning
+    a stream: the start of an object that is still incomplete, or enough
+    of the tail to catch a key split across chunks.
+    """
+    found: Dict[str, Dict[str, Any]] = {}
+    keep_from = len(text)
+    for key in keys:
+        obj, pending = _find_json_object(text, key, complete)
+        if obj is not None:
+            found[key] = obj
+        elif pending is not None:
+            keep_from = min(keep_from, pending - 2)
+        else:
+            keep_from = min(keep_from, len(text) - len(key) - 2)
+    return found, max(0, keep_from)
+
+def extract_escaped_json_objects(html: str, keys: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """Extract the JSON objects stored under `keys` in a complete HTML page"""
+    return scan_json_objects(html, keys)[0]
+
+class JSONObjectStreamScanner:
+    """Sliding-window scanner for JSON objects in a page that is still downloading
+
+    Only the unscanned tail of the body (or an object that is not complete
+    yet) is kept between chunks. Scanning is finished once the first,
+    preferred key has been found or every key has been found.
+    """
+
+    def __init__(self, keys: Sequence[str]):
+        self.keys = tuple(keys)
+        self.found: Dict[str, Dict[str, Any]] = {}
+        self._window = ''
+
+    def feed(self, text: str, final: bool = False) -> bool:
+        """Scan the next piece of the body; returns True when no more input is needed"""
+        self._window += text
+        pending_keys = [key for key in self.keys if key not in self.found]
+        found, keep_from = scan_json_objects(self._window, pending_keys, complete=final)
+        self.found.update(found)
+        self._window = self._window[keep_from:]
+        return self.keys[0] in self.found or len(self.found) == len(self.keys)
+
+async def fetch_billing_objects(fetcher: AsyncFetcher, model_url: str, stream: bool = True,
+                                validators: Optional[Dict[str, Optional[str]]] = None) -> Fetched:
+    """Fetch the billing objects embedded in a model page
+
+    In streaming mode the page is scanned while it downloads and the
+    connection is dropped as soon as the billing object is complete.
+    """
+    if not stream:
+        parts: List[str] = []
+        fetched = await fetcher.stream_text(
+            model_url, lambda text, final: parts.append(text) or False,
+            validators=validators, ttl=PLAYGROUND_CACHE_TTL, kind='pricing',
+        )
+        if not fetched.modified:
+            return fetched
+        with fetcher.metrics.timer('pricing_extract'):
+            return fetched._replace(data=extract_escaped_json_objects(''.join(parts), BILLING_KEYS))
+
+    scanner = JSONObjectStreamScanner(BILLING_KEYS)
+    fetched = await fetcher.stream_text(model_url, scanner.feed, validators=validators,
+                                        ttl=PLAYGROUND_CACHE_TTL, kind='pricing')
+    return fetched._replace(data=scanner.found) if fetched.modified else fetched
+
+async def extract_pricing(fetcher: AsyncFetcher, model_url: str, stream: bool = True,
+                          validators: Optional[Dict[str, Optional[str]]] = None) -> Fetched:
+    """Extract pricing information from model page HTML
+
+    The pricing dict (or None when the page has none) is returned in
+    `data`. A page that is unchanged or could not be fetched comes back
+    with `modified` False. Throttling and server errors that persist after
+    retries are raised instead, like in `fetch_openapi_schema`.
+    """
     try:
-        response = requests.get(model_url, timeout=30)
-        response.raise_for_status()
-        html = response.text
-        
-        billing = extract_escaped_json_object(html, 'publicEndpointBilling')
-        if not billing:
-            billing = extract_escaped_json_object(html, 'endpointBilling')
-        
+        fetched = await fetch_billing_objects(fetcher, model_url, stream, validators)
+        if not fetched.modified:
+            return fetched
+        billing_objects = fetched.data
+        billing = next((billing_objects[key] for key in BILLING_KEYS if billing_objects.get(key)), None)
+
         if billing and 'price' in billing and 'billing_unit' in billing:
             result = {
                 'price': billing.get('price'),
                 'billing_unit': billing.get('billing_unit'),
             }
-            
+
             if 'provider_type' in billing:
                 result['provider_type'] = billing['provider_type']
             if 'is_partner_api' in billing:
                 result['is_partner_api'] = billing['is_partner_api']
-            
-            return result
-        
-        return None
+
+            return fetched._replace(data=result)
+
+        return fetched._replace(data=None)
+    except aiohttp.ClientResponseError as e:
+        if e.status in RETRY_STATUSES:
+            raise
+        return Fetched(None, {}, modified=False)
+    except (aiohttp.ClientConnectionError, asyncio.TimeoutError, CacheMiss):
+        raise
     except Exception as e:
-        return None
+        return Fetched(None, {}, modified=False)
 
-print_lock = threading.Lock()
+async def parse_single_model(fetcher: AsyncFetcher, model: Dict[str, Any],
+                             index: int, total: int,
+                             stream_pricing: bool = True,
+                             previous: Optional[Dict[str, Any]] = None,
+                             only: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Parse a single model with its schema and pricing
 
-def parse_single_model(model: Dict[str, Any], index: int, total: int) -> Optional[Dict[str, Any]]:
-    """Parse a single model with its schema and pricing"""
+    The playground page is fetched concurrently with the OpenAPI schema,
+    using the canonical playground URL derived from the endpoint id.
+
+    When `previous` (the stored record) is given, both requests are
+    conditional on its freshness validators, and the schema is only
+    re-parsed when its content hash changed. Unchanged parts are carried
+    over from `previous`. `only` ('schema' or 'pricing') limits a refresh
+    to that part; the other one is kept from `previous` as it is.
+    """
     endpoint_id = model.get('id')
     if not endpoint_id:
         return None
-    
-    with print_lock:
-        print(f"[{index}/{total}] Parsing {endpoint_id}...")
-    
-    openapi_schema = fetch_openapi_schema(endpoint_id)
-    
-    if not openapi_schema:
-        with print_lock:
-            print(f"  Skipping (no schema available)")
-        return None
-    
-    metadata = openapi_schema.get('info', {}).get('x-fal-metadata', {})
-    
-    input_params = parse_input_schema(openapi_schema)
-    output_params = parse_output_schema(openapi_schema)
-    
-    playground_url = metadata.get('playgroundUrl', '')
-    pricing = None
-    if playground_url:
-        with print_lock:
-            print(f"  Extracting pricing from {playground_url}...")
-        pricing = extract_pricing(playground_url)
-        if pricing:
-            price = pricing.get('price')
-            unit = pricing.get('billing_unit')
-            with print_lock:
-                print(f"  Found pricing: ${price}/{unit}")
-    
-    parsed_model = {
-        'id': endpoint_id,
-        'title': model.get('title', ''),
+
+    freshness = (previous or {}).get('freshness', {})
+    print(f"[{index}/{total}] {'Refreshing' if previous else 'Parsing'} {endpoint_id}...")
+    if previous is None:
+        only = None
+
+    default_playground_url = (
+        (previous or {}).get('playgroundUrl') or PLAYGROUND_URL.format(endpoint_id=endpoint_id)
+    )
+    pricing_task = asyncio.create_task(
+        extract_pricing(fetcher, default_playground_url, stream_pricing, freshness.get('pricing'))
+    ) if only != 'schema' else None
+
+    try:
+        # Records parsed by an older parser need the schema body even if it is unchanged
+        schema_freshness = freshness.get('schema', {})
+        if only == 'pricing':
+            schema = Fetched(None, {}, modified=False)
+        else:
+            if schema_freshness.get('parser') != SCHEMA_PARSER_VERSION:
+                schema_freshness = {}
+            schema = await fetch_openapi_schema(fetcher, endpoint_id, schema_freshness)
+
+        if schema.modified and not schema.data:
+            if previous:
+                print(f"  Keeping stored record for {endpoint_id} (schema unavailable)")
+                return previous
+            print(f"  Skipping {endpoint_id} (no schema available)")
+            return None
+
+        previous_schema_hash = schema_freshness.get('hash')
+        schema_hash = content_hash(schema.data) if schema.modified else previous_schema_hash
+
+        if previous and schema_hash == previous_schema_hash:
+            input_params = previous.get('inputParameters', {})
+            output_params = previous.get('outputParameters', {})
+            playground_url = previous.get('playgroundUrl', '')
+            documentation_url = previous.get('documentationUrl', '')
+        else:
+            metadata = schema.data.get('info', {}).get('x-fal-metadata', {})
+            with fetcher.metrics.timer('schema_parse'):
+                input_params = DEFINITIONS.intern_parameters(parse_input_schema(schema.data))
+                output_params = DEFINITIONS.intern_parameters(parse_output_schema(schema.data))
+            playground_url = metadata.get('playgroundUrl', '')
+            documentation_url = metadata.get('documentationUrl', '')
+
+        if pricing_task is None:
+            priced = Fetched(None, {}, modified=False)
+        elif playground_url:
+            if playground_url == default_playground_url:
+                priced = await pricing_task
+            else:
+                pricing_task.cancel()
+                priced = await extract_pricing(fetcher, playground_url, stream_pricing)
+        else:
+            pricing_task.cancel()
+            # A pricing-only refresh has nothing to refetch; keep the stored pricing
+            priced = Fetched(None, {}, modified=only != 'pricing')
+
+        if priced.modified:
+            pricing = priced.data
+            pricing_validators = priced.validators
+            if pricing:
+                price = pricing.get('price')
+                unit = pricing.get('billing_unit')
+                if previous and pricing != previous.get('pricing'):
+                    print(f"  Pricing changed for {endpoint_id}: ${price}/{unit}")
+                else:
+                    print(f"  Found pricing for {endpoint_id}: ${price}/{unit}")
+        else:
+            pricing = (previous or {}).get('pricing')
+            pricing_validators = {
+                key: value for key, value in freshness.get('pricing', {}).items() if key != 'hash'
+            }
+
+        parsed_model = {
+            'id': endpoint_id,
+            'title': model.get('title', ''),
+            'category': model.get('category', ''),
+            'description': model.get('shortDescription', ''),
+            'tags': model.get('tags', []),
+            'thumbnailUrl': model.get('thumbnailUrl', ''),
+            'playgroundUrl': playground_url,
+            'documentationUrl': documentation_url,
+            'licenseType': model.get('licenseType', ''),
+            'deprecated': model.get('deprecated', False),
+            'unlisted': model.get('unlisted', False),
+            'pricing': pricing,
+            'inputParameters': input_params,
+            'outputParameters': output_params,
+            'freshness': {
+                'fetchedAt': utc_timestamp(),
+                'schema': (freshness.get('schema', {}) if only == 'pricing'
+                           else {**schema.validators, 'hash': schema_hash, 'parser': SCHEMA_PARSER_VERSION}),
+                'pricing': {**pricing_validators, 'hash': content_hash(pricing)},
+            },
+        }
+
+        return parsed_model
+    finally:
+        if pricing_task is not None:
+            if not pricing_task.done():
+                pricing_task.cancel()
+            await asyncio.gather(pricing_task, return_exceptions=True)
+
+def record_changed(previous: Optional[Dict[str, Any]], record: Dict[str, Any]) -> bool:
+    """Whether a record differs from its stored version, ignoring freshness metadata"""
+    if previous is None:
+        return True
+    keys = (previous.keys() | record.keys()) - {'freshness'}
+    return any(previous.get(key) != record.get(key) for key in keys)
+
+class ModelJournal:
+    """Append-only JSONL log of parsed models
+
+    Every finished model is written as one line and flushed immediately, so
+    a crash or Ctrl-C loses at most the models that were still in flight.
+    The journal is folded into the catalog by `compact_catalog`.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Read journaled models keyed by id, ignoring a torn trailing line"""
+        records: Dict[str, Dict[str, Any]] = {}
+        if not self.path.exists():
+            return records
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(record, dict) and record.get('id'):
+                    records[record['id']] = record
+        return records
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one parsed model and flush it to disk"""
+        if self._file is None:
+            needs_newline = False
+            if self.path.exists() and self.path.stat().st_size:
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    needs_newline = f.read(1) != b'\n'
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if needs_newline:
+                self._file.write('\n')
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """Close and remove the journal once it has been compacted"""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+def write_text_atomic(path: Path, text: str) -> None:
+    """Write text to a temporary sibling file and rename it over `path`"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write indented JSON atomically"""
+    write_text_atomic(path, json.dumps(data, indent=2, ensure_ascii=False))
+
+def compact_json(data: Any) -> str:
+    """Serialize a top-level list or dict compactly, one entry per line
+
+    Keeps generated indexes small while still giving line-based diffs.
+    """
+    dumps = partial(json.dumps, ensure_ascii=False, separators=(',', ':'))
+    if isinstance(data, dict):
+        entries = [f"{dumps(key)}:{dumps(value)}" for key, value in data.items()]
+        return '{\n' + ',\n'.join(entries) + '\n}\n'
+    entries = [dumps(item) for item in data]
+    return '[\n' + ',\n'.join(entries) + '\n]\n'
+
+def pricing_index_entry(model: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a model record to the fields the cost calculation needs"""
+    input_params = model.get('inputParameters') or {}
+    defaults = {
+        name: {'default': input_params[name]['default']}
+        for name in PRICING_INPUT_PARAMETERS
+        if isinstance(input_params.get(name), dict) and 'default' in input_params[name]
+    }
+    entry = {
         'category': model.get('category', ''),
-        'description': model.get('shortDescription', ''),
-        'tags': model.get('tags', []),
-        'thumbnailUrl': model.get('thumbnailUrl', ''),
-        'playgroundUrl': playground_url,
-        'documentationUrl': metadata.get('documentationUrl', ''),
-        'licenseType': model.get('licenseType', ''),
-        'deprecated': model.get('deprecated', False),
-        'unlisted': model.get('unlisted', False),
-        'pricing': pricing,
-        'inputParameters': input_params,
-        'outputParameters': output_params,
+        'pricing': model.get('pricing'),
     }
-    
-    return parsed_model
+    if defaults:
+        entry['inputParameters'] = defaults
+    return entry
+
+def shard_name(category: str) -> str:
+    """File stem of the schema shard holding a category"""
+    return re.sub(r'[^A-Za-z0-9_-]+', '-', category).strip('-') or 'uncategorized'
+
+def write_catalog_indexes(output_dir: Path, models: List[Dict[str, Any]]) -> None:
+    """Write the derived catalog artifacts
+
+    The pricing index holds only what src/lib/pricing.ts needs to price a
+    generation, so the app does not have to bundle the full catalog. The
+    shards (data/fal_schemas/<category>.json) contain the full records of
+    one category each and are meant to be loaded on demand. The
+    deduplicated catalog stores every distinct parameter definition once
+    (see fal_catalog.load_deduplicated), and the search index backs
+    tools/docs-scraper/search_index.py.
+    """
+    write_text_atomic(output_dir / DEDUPLICATED_CATALOG_FILENAME,
+                      dump_deduplicated(DEFINITIONS.deduplicate(models)))
+
+    index = {m['id']: pricing_index_entry(m) for m in sorted(models, key=lambda m: m['id'])}
+    write_text_atomic(output_dir / PRICING_INDEX_FILENAME, compact_json(index))
+
+    shards: Dict[str, List[Dict[str, Any]]] = {}
+    for model in models:
+        record = {key: value for key, value in model.items() if key != 'freshness'}
+        shards.setdefault(shard_name(model.get('category', '')), []).append(record)
+
+    shard_dir = output_dir / SCHEMA_SHARDS_DIRNAME
+    shard_dir.mkdir(exist_ok=True)
+    for name, records in shards.items():
+        write_text_atomic(shard_dir / f'{name}.json', compact_json(records))
+    for stale in shard_dir.glob('*.json'):
+        if stale.stem not in shards:
+            stale.unlink()
+
+    update_search_index(output_dir / SEARCH_INDEX_FILENAME, models)
+
+def search_document(model: Dict[str, Any]) -> Document:
+    """Searchable text of a model: id, category, tags, description and parameter names"""
+    parameters = ' '.join(model.get('inputParameters') or {})
+    text = '\n'.join([model['id'], model.get('category', ''), ' '.join(model.get('tags', [])),
+                      model.get('description', ''), parameters])
+    return Document(model.get('title') or model['id'], text, model.get('playgroundUrl', ''))
+
+def update_search_index(path: Path, models: List[Dict[str, Any]]) -> None:
+    """Update the full-text search index of the catalog
+
+    Only models whose searchable text changed are re-tokenized.
+    """
+    documents = {m['id']: search_document(m) for m in models}
+    hashes = {model_id: content_hash(list(document)) for model_id, document in documents.items()}
+    index = SearchIndex(path)
+    indexed, removed = index.update(hashes, documents.get)
+    index.save()
+    print(f"Search index: {len(index)} models ({indexed} indexed, {removed} removed)")
+
+def merge_models(existing_models: List[Dict[str, Any]],
+                 updates: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace existing models by id in place and append the new ones"""
+    merged = [updates.get(m['id'], m) for m in existing_models]
+    existing_ids = {m['id'] for m in existing_models}
+    merged.extend(record for model_id, record in updates.items() if model_id not in existing_ids)
+    return merged
+
+def compact_catalog(output_file: Path, existing_models: List[Dict[str, Any]],
+                    journal: ModelJournal) -> List[Dict[str, Any]]:
+    """Fold the journal into the catalog artifact and remove the journal
+
+    The pricing index and schema shards are regenerated alongside.
+    """
+    parsed_models = merge_models(existing_models, journal.load())
+    write_json_atomic(output_file, parsed_models)
+    write_catalog_indexes(output_file.parent, parsed_models)
+    journal.discard()
+    return parsed_models
+
+async def parse_models(fetcher: AsyncFetcher, models: List[Dict[str, Any]],
+                       start_index: int, total: int,
+                       stream_pricing: bool = True,
+                       journal: Optional[ModelJournal] = None,
+                       max_in_flight: int = DEFAULT_CONCURRENCY_PER_HOST,
+                       previous_models: Optional[Dict[str, Dict[str, Any]]] = None,
+                       failed: Optional[List[str]] = None,
+                       only: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Parse models concurrently, bounded by the fetcher's per-host pools
+
+    At most `max_in_flight` models are started at once so that models finish
+    steadily instead of all at the end, and each result is appended to
+    `journal` as soon as it is ready. Models found in `previous_models` are
+    refreshed against their stored record, limited to the part named by
+    `only` if given. Ids of models that raised are appended to `failed`.
+    """
+    previous_models = previous_models or {}
+    slots = asyncio.Semaphore(max_in_flight)
+
+    async def parse_guarded(model: Dict[str, Any], index: int) -> Optional[Dict[str, Any]]:
+        queued_at = time.perf_counter()
+        async with slots:
+            fetcher.metrics.add_time('model_slot_wait', time.perf_counter() - queued_at)
+            try:
+                return await parse_single_model(fetcher, model, index, total, stream_pricing,
+                                                previous_models.get(model.get('id')), only)
+            except CacheMiss:
+                raise
+            except Exception as e:
+                print(f"Error parsing {model.get('id')}: {e!r}")
+                fetcher.metrics.count('model_errors')
+                if failed is not None:
+                    failed.append(model.get('id'))
+                return None
+
+    tasks = [
+        asyncio.create_task(parse_guarded(model, start_index + i + 1))
+        for i, model in enumerate(models)
+    ]
+
+    parsed_models = []
+    try:
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            if result:
+                parsed_models.append(result)
+                if journal is not None:
+                    with fetcher.metrics.timer('journal_append'):
+                        journal.append(result)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return parsed_models
+
+def parse_age(text: str) -> float:
+    """Seconds in an age such as `90s`, `30m`, `12h`, `7d` or `2w` (argparse type)"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*', text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid age {text!r}, expected e.g. 12h or 7d")
+    return float(match.group(1)) * AGE_UNITS[match.group(2) or 's']
 
-def main():
-    output_dir = Path(__file__).parent.parent / 'data'
-    output_dir.mkdir(exist_ok=True)
+def read_ids(path: Path) -> List[str]:
+    """Endpoint ids from a file, one per line; blank lines and `#` comments are skipped"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+def is_stale(record: Optional[Dict[str, Any]], cutoff: float) -> bool:
+    """Whether a stored record was last fetched before `cutoff` (or never)"""
+    fetched_at = ((record or {}).get('freshness') or {}).get('fetchedAt')
+    if not fetched_at:
+        return True
+    try:
+        return calendar.timegm(time.strptime(fetched_at, '%Y-%m-%dT%H:%M:%SZ')) < cutoff
+    except ValueError:
+        return True
+
+def has_selectors(args: argparse.Namespace) -> bool:
+    return bool(args.category or args.ids or args.ids_from_file or args.tags
+                or args.stale_older_than is not None)
+
+def select_models(models: List[Dict[str, Any]], previous_models: Dict[str, Dict[str, Any]],
+                  args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Catalog entries matching every given selector
+
+    Ids from `--ids` and `--ids-from-file` are combined, as are several
+    categories or tags; different selectors must all match.
+    """
+    ids = None
+    if args.ids or args.ids_from_file:
+        ids = set(args.ids or [])
+        for path in args.ids_from_file or []:
+            ids.update(read_ids(path))
+        missing = ids - {m.get('id') for m in models}
+        for endpoint_id in sorted(missing):
+            print(f"  {endpoint_id} is not in the fal catalog; skipped")
+    categories = set(args.category or [])
+    tags = set(args.tags or [])
+    cutoff = time.time() - args.stale_older_than if args.stale_older_than is not None else None
+
+    selected = []
+    for model in models:
+        if ids is not None and model.get('id') not in ids:
+            continue
+        if categories and model.get('category') not in categories:
+            continue
+        if tags and not tags & set(model.get('tags') or []):
+            continue
+        if cutoff is not None and not is_stale(previous_models.get(model.get('id')), cutoff):
+            continue
+        selected.append(model)
+    return selected
+
+async def run(args: argparse.Namespace, metrics: RunMetrics):
+    output_dir = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
     output_file = output_dir / 'fal_models_schemas.json'
-    
+    journal = ModelJournal(output_dir / JOURNAL_FILENAME)
+
     existing_models = []
-    existing_ids = set()
     if output_file.exists():
         print("Loading existing parsed models...")
         with open(output_file, 'r', encoding='utf-8') as f:
-            existing_models = json.load(f)
-            existing_ids = {m['id'] for m in existing_models}
-        print(f"Found {len(existing_models)} already parsed models")
-    
-    models = fetch_all_models()
-    
-    models_to_parse = [m for m in models if m.get('id') not in existing_ids]
-    
-    print(f"\nTotal models: {len(models)}")
-    print(f"Already parsed: {len(existing_ids)}")
-    print(f"Remaining to parse: {len(models_to_parse)}")
-    
-    if not models_to_parse:
-        print("\nAll models already parsed!")
-        return
-    
-    parsed_models = existing_models.copy()
-    
-    print(f"\nParsing remaining models with {10} workers...")
-    
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_model = {
-            executor.submit(parse_single_model, model, len(existing_ids) + i + 1, len(models)): model
-            for i, model in enumerate(models_to_parse)
-        }
-        
-        for future in as_completed(future_to_model):
-            try:
-                result = future.result()
-                if result:
-                    parsed_models.append(result)
-            except Exception as e:
-                model = future_to_model[future]
-                with print_lock:
-                    print(f"Error parsing {model.get('id')}: {e}")
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(parsed_models, f, indent=2, ensure_ascii=False)
-    
+            existing_models = [DEFINITIONS.intern_model(m) for m in json.load(f)]
+        print(f"Found {len(existing_models)} already parsed models "
+              f"({len(DEFINITIONS)} distinct parameter definitions)")
+
+    journaled = journal.load()
+    if journaled:
+        print(f"Resuming: {len(journaled)} models recovered from {journal.path.name}")
+
+    existing_ids = {m['id'] for m in existing_models} | set(journaled)
+
+    cache = None
+    if args.cache or args.offline:
+        cache = ResponseCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024,
+                              offline=args.offline)
+    # Selectors and --pricing-only/--schema-only refresh the chosen models in place
+    targeted = has_selectors(args)
+    refresh = args.refresh or targeted or args.only is not None
+
+    # A refresh must see the origin, so every cached entry is revalidated
+    ttl_override = 0 if refresh else args.cache_ttl
+
+    failed: List[str] = []
+    try:
+        async with AsyncFetcher(concurrency_per_host=args.concurrency_per_host,
+                                cache=cache, ttl_override=ttl_override, metrics=metrics,
+                                max_rate=args.max_rate, max_retries=args.max_retries) as fetcher:
+            with metrics.phase('catalog'):
+                models = await fetch_all_models(fetcher, page_fanout=args.page_fanout)
+            metrics.count('catalog_models', len(models))
+            if not models:
+                print("\nNo models fetched; leaving the catalog and its indexes as they are")
+                return
+
+            total = len(models)
+            if refresh:
+                previous_models = {m['id']: m for m in existing_models}
+                candidates = select_models(models, previous_models, args) if targeted else models
+                models_to_parse = [m for m in candidates if m.get('id') not in journaled]
+                done_count = len(journaled)
+                if targeted:
+                    total = len(models_to_parse) + done_count
+            else:
+                previous_models = {}
+                models_to_parse = [m for m in models if m.get('id') not in existing_ids]
+                done_count = len(existing_ids)
+
+            print(f"\nTotal models: {len(models)}")
+            print(f"Already parsed: {len(existing_ids)}")
+            if targeted:
+                print(f"Selected: {len(models_to_parse)}")
+            print(f"Remaining to {'refresh' if refresh else 'parse'}: {len(models_to_parse)}"
+                  + (f" ({args.only} only)" if args.only else ''))
+
+            if not models_to_parse and not journaled:
+                print("\nNo models match the selectors" if targeted else "\nAll models already parsed!")
+                if not all((output_dir / name).exists()
+                           for name in (PRICING_INDEX_FILENAME, SEARCH_INDEX_FILENAME)):
+                    write_catalog_indexes(output_dir, existing_models)
+                return
+
+            if models_to_parse:
+                print(f"\nProcessing models with {args.concurrency_per_host} connections per host...")
+                with metrics.phase('models'):
+                    results = await parse_models(fetcher, models_to_parse, done_count, total,
+                                                 stream_pricing=args.stream_pricing, journal=journal,
+                                                 max_in_flight=args.concurrency_per_host,
+                                                 previous_models=previous_models,
+                                                 failed=failed, only=args.only)
+                metrics.count('models_parsed', len(results))
+                if refresh:
+                    changed = [r for r in results if record_changed(previous_models.get(r['id']), r)]
+                    metrics.count('models_changed', len(changed))
+                    print(f"\nChanged: {len(changed)} of {len(results)} refreshed models")
+    finally:
+        journal.close()
+        if cache is not None:
+            cache.close()
+
+    with metrics.phase('write'):
+        parsed_models = compact_catalog(output_file, existing_models, journal)
+
     print(f"\n✓ Successfully parsed {len(parsed_models)} models total")
     print(f"✓ Saved to: {output_file}")
-    
+    if args.changelog:
+        changelog = diff_snapshots(Snapshot(existing_models), Snapshot(parsed_models))
+        write_changelog(changelog, args.changelog)
+        summary = changelog['summary']
+        print(f"✓ Changelog ({summary['added']} added, {summary['removed']} removed, "
+              f"{summary['changed']} changed): {changelog_paths(args.changelog)[1]}")
+    if failed:
+        print(f"\n⚠ {len(failed)} models failed after retries and were left as they were; "
+              "they will be fetched again on the next run:")
+        for endpoint_id in sorted(failed):
+            print(f"  {endpoint_id}")
+
     categories = {}
     for model in parsed_models:
         cat = model['category']
         categories[cat] = categories.get(cat, 0) + 1
-    
+
     print("\nModels by category:")
     for cat, count in sorted(categories.items(), key=lambda x: -x[1]):
         print(f"  {cat}: {count}")
 
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description='Parse model schemas and pricing from fal.ai'
+    )
+    parser.add_argument(
+        '--output-dir',
+        type=Path,
+        default=DEFAULT_OUTPUT_DIR,
+        help='Directory for the parsed catalog and derived files (default: data/)'
+    )
+    parser.add_argument(
+        '--concurrency-per-host',
+        type=int,
+        default=DEFAULT_CONCURRENCY_PER_HOST,
+        help='Maximum open connections per host (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--page-fanout',
+        type=int,
+        default=DEFAULT_PAGE_FANOUT,
+        help='Catalog pages fetched in parallel after page 1; 1 walks pages serially (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--max-rate',
+        type=float,
+        help='Cap on requests per second per host (default: unpaced until the host answers '
+             '429/5xx, then halved and raised again gradually)'
+    )
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help='Retries for throttled, 5xx or failed requests (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--stream-pricing',
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help='Stop downloading a model page once its billing object is read (default: on)'
+    )
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Re-check already parsed models with conditional requests and update the ones that changed'
+    )
+    selection = parser.add_argument_group(
+        'targeted refresh',
+        'Refresh only the catalog models matching every given selector and merge them into the '
+        'existing artifact in place; other models are left as they are'
+    )
+    selection.add_argument(
+        '--category',
+        nargs='+',
+        help='Models in any of these categories, e.g. image-to-video'
+    )
+    selection.add_argument(
+        '--ids',
+        nargs='+',
+        metavar='ID',
+        help='These endpoint ids, e.g. fal-ai/flux/dev'
+    )
+    selection.add_argument(
+        '--ids-from-file',
+        type=Path,
+        action='append',
+        metavar='PATH',
+        help='Endpoint ids listed one per line (e.g. from fal_catalog_diff.py --format ids); repeatable'
+    )
+    selection.add_argument(
+        '--tags',
+        nargs='+',
+        help='Models with any of these tags'
+    )
+    selection.add_argument(
+        '--stale-older-than',
+        type=parse_age,
+        metavar='AGE',
+        help='Models last fetched longer ago than AGE (e.g. 12h, 7d) or never'
+    )
+    parts = selection.add_mutually_exclusive_group()
+    parts.add_argument(
+        '--pricing-only',
+        dest='only',
+        action='store_const',
+        const='pricing',
+        help='Only re-extract pricing; schemas and parameters are kept (implies --refresh)'
+    )
+    parts.add_argument(
+        '--schema-only',
+        dest='only',
+        action='store_const',
+        const='schema',
+        help='Only re-fetch and re-parse schemas; pricing is kept (implies --refresh)'
+    )
+    parser.add_argument(
+        '--changelog',
+        type=Path,
+        help='Write the changes to the catalog made by this run to CHANGELOG.json and CHANGELOG.md'
+    )
+    parser.add_argument(
+        '--cache',
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help='Keep responses in the shared on-disk HTTP cache (default: on)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help='HTTP cache directory (default: .cache/http)'
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=None,
+        help='Seconds a cached response is used without revalidation '
+             f'(default: {CATALOG_CACHE_TTL} for the catalog, {SCHEMA_CACHE_TTL} for schemas and pages)'
+    )
+    parser.add_argument(
+        '--cache-max-mb',
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help='Size cap of the HTTP cache; least recently used entries are evicted (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        help='Replay responses from the HTTP cache only, without network access'
+    )
+    parser.add_argument(
+        '--metrics-report',
+        type=Path,
+        help='Write a JSON run report with phase timings and a per-request trace'
+    )
+    parser.add_argument(
+        '--metrics-textfile',
+        type=Path,
+        help='Write run metrics in Prometheus textfile format (e.g. for node_exporter)'
+    )
+
+    args = parser.parse_args(argv)
+    metrics = RunMetrics('parse_fal_models')
+    try:
+        asyncio.run(run(args, metrics))
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; finished models are kept in {args.output_dir / JOURNAL_FILENAME} "
+              "and will be resumed on the next run")
+        sys.exit(130)
+    except CacheMiss as e:
+        print(f"\nOffline run stopped: {e} is not in the HTTP cache")
+        sys.exit(1)
+    finally:
+        metrics.export(args.metrics_report, args.metrics_textfile)
+
 if __name__ == '__main__':
     main()
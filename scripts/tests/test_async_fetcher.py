@@ -0,0 +1,59 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from parse_fal_models import AsyncFetcher
+
+
+def make_app(release: asyncio.Event) -> web.Application:
+    async def slow(request):
+        await release.wait()
+        return web.json_response({'slow': True})
+
+    async def fast(request):
+        return web.json_response({'fast': True})
+
+    async def loop(request):
+        raise web.HTTPFound(request.path)
+
+    app = web.Application()
+    app.router.add_get('/slow', slow)
+    app.router.add_get('/fast', fast)
+    app.router.add_get('/loop', loop)
+    return app
+
+
+async def with_server(body):
+    release = asyncio.Event()
+    async with TestServer(make_app(release)) as server:
+        try:
+            async with AsyncFetcher(concurrency_per_host=2, timeout=5, max_retries=0) as fetcher:
+                return await asyncio.wait_for(body(fetcher, server), 5)
+        finally:
+            release.set()
+
+
+def test_cancelled_requests_free_their_slots():
+    async def body(fetcher, server):
+        slow = [asyncio.create_task(fetcher.get_json(str(server.make_url('/slow')))) for _ in range(2)]
+        await asyncio.sleep(0.1)
+        assert fetcher.limiter.host(str(server.make_url('/'))).in_flight == 2
+        for task in slow:
+            task.cancel()
+        await asyncio.gather(*slow, return_exceptions=True)
+        return await fetcher.get_json(str(server.make_url('/fast')))
+
+    assert asyncio.run(with_server(body)) == {'fast': True}
+
+
+def test_redirect_loops_free_their_slots():
+    async def body(fetcher, server):
+        for _ in range(3):
+            with pytest.raises(aiohttp.TooManyRedirects):
+                await fetcher.get_json(str(server.make_url('/loop')))
+        return fetcher.limiter.host(str(server.make_url('/'))).in_flight
+
+    assert asyncio.run(with_server(body)) == 0
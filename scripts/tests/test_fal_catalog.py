@@ -0,0 +1,92 @@
+import pytest
+
+from fal_catalog import (And, BillingUnit, Catalog, Category, EnumValue, Everything, Field, License, Not,
+                         Or, Parameter, Price, Query, Tag)
+
+MODELS = [
+    {'id': 'flux', 'category': 'text-to-image', 'tags': ['fast'], 'licenseType': 'commercial',
+     'pricing': {'price': 0.025, 'billing_unit': 'images'},
+     'inputParameters': {'prompt': {'type': 'string'}, 'image_size': {'enum': ['square', 'portrait']}}},
+    {'id': 'kling', 'category': 'image-to-video', 'tags': ['video', 'fast'], 'licenseType': 'commercial',
+     'pricing': {'price': 0.5, 'billing_unit': 'Videos'},
+     'inputParameters': {'prompt': {}, 'duration': {'enum': [5, 10]}}},
+    # No category, tags, pricing or parameters at all
+    {'id': 'bare'},
+    {'id': 'sdxl', 'category': 'text-to-image', 'tags': None, 'licenseType': 'research',
+     'pricing': {'price': 'free', 'billing_unit': 'image'},
+     'inputParameters': {'prompt': {}, 'image_size': None}},
+]
+
+
+@pytest.fixture
+def catalog():
+    return Catalog(MODELS)
+
+
+def test_field_indexes(catalog):
+    assert catalog.ids(Category('text-to-image')) == ['flux', 'sdxl']
+    assert catalog.ids(Tag('fast')) == ['flux', 'kling']
+    assert catalog.ids(Parameter('prompt')) == ['flux', 'kling', 'sdxl']
+    assert catalog.ids(License('research')) == ['sdxl']
+    assert catalog.ids(Category('unknown')) == []
+
+
+def test_billing_units_are_normalized(catalog):
+    assert catalog.ids(BillingUnit('image')) == ['flux', 'sdxl']
+    assert catalog.ids(BillingUnit('VIDEOS')) == ['kling']
+
+
+def test_price_ranges_skip_unpriced_models(catalog):
+    assert catalog.ids(Price(0.01, 0.1)) == ['flux']
+    assert catalog.ids(Price(high=1)) == ['flux', 'kling']
+    assert catalog.ids(Price(low=0.5)) == ['kling']
+    assert catalog.ids(Price(1, 0)) == []
+
+
+def test_enum_values(catalog):
+    assert catalog.ids(EnumValue('duration', 10)) == ['kling']
+    assert catalog.ids(EnumValue('image_size', 'square')) == ['flux']
+    assert catalog.ids(EnumValue('missing', 'x')) == []
+
+
+def test_not_includes_models_missing_the_field(catalog):
+    assert catalog.ids(Not(Tag('fast'))) == ['bare', 'sdxl']
+    assert catalog.ids(~Category('text-to-image')) == ['kling', 'bare']
+    assert catalog.ids(~Price(0, 1)) == ['bare', 'sdxl']
+    assert catalog.ids(~Parameter('prompt')) == ['bare']
+
+
+def test_or_over_missing_fields(catalog):
+    assert catalog.ids(Tag('video') | Category('')) == ['kling', 'bare']
+    assert catalog.ids(Or((Tag('none'), EnumValue('missing', 1)))) == []
+
+
+def test_algebra_matches_brute_force(catalog):
+    queries = [Category('text-to-image'), Tag('fast'), Price(0, 0.1), Parameter('duration'), Everything()]
+    for a in queries:
+        for b in queries:
+            ids_a, ids_b = set(catalog.ids(a)), set(catalog.ids(b))
+            assert set(catalog.ids(a & b)) == ids_a & ids_b
+            assert set(catalog.ids(a | b)) == ids_a | ids_b
+            assert set(catalog.ids(~a)) == set(catalog.by_id) - ids_a
+            assert catalog.ids(~~a) == catalog.ids(a)
+    assert catalog.count(And(())) == len(MODELS)
+    assert catalog.ids(Or(())) == []
+
+
+def test_results_are_cached_by_value(catalog):
+    first = catalog.select(Category('text-to-image') & Tag('fast'))
+    assert catalog.select(Category('text-to-image') & Tag('fast')) is first
+    assert Field('tag', 'fast') == Tag('fast')
+
+
+def test_values_count_models_per_value(catalog):
+    assert catalog.values('category') == {'': 1, 'image-to-video': 1, 'text-to-image': 2}
+
+
+def test_query_is_abstract():
+    class Incomplete(Query):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,70 @@
+import json
+
+from fal_catalog_diff import (Snapshot, affected_ids, changelog_markdown, changelog_paths, diff_snapshots,
+                              write_changelog)
+
+
+def model(model_id, **fields):
+    record = {'id': model_id, 'title': model_id.title(), 'category': 'text-to-image',
+              'pricing': {'price': 0.01, 'billing_unit': 'images'}, 'deprecated': False,
+              'inputParameters': {'prompt': {'type': 'string'}, 'seed': {'type': 'integer'}},
+              'outputParameters': {}, 'freshness': {'fetchedAt': '2024-01-01T00:00:00Z'}}
+    record.update(fields)
+    return record
+
+
+OLD = [model('a'), model('b'), model('c'), model('gone')]
+NEW = [
+    model('a', freshness={'fetchedAt': '2024-02-01T00:00:00Z'}),
+    model('b', pricing={'price': 0.02, 'billing_unit': 'images'}, deprecated=True),
+    model('c', inputParameters={'prompt': {'type': 'string', 'maxLength': 500}, 'steps': {'type': 'integer'}}),
+    model('new', category='image-to-video'),
+]
+
+
+def test_diff_snapshots():
+    changelog = diff_snapshots(Snapshot(OLD), Snapshot(NEW))
+    assert changelog['summary'] == {'added': 1, 'removed': 1, 'changed': 2, 'unchanged': 1}
+    assert [entry['id'] for entry in changelog['added']] == ['new']
+    assert changelog['added'][0]['category'] == 'image-to-video'
+    assert [entry['id'] for entry in changelog['removed']] == ['gone']
+
+    b, c = changelog['changed']
+    assert set(b['fields']) == {'pricing', 'deprecated'}
+    assert b['fields']['pricing']['new'] == {'price': 0.02, 'billing_unit': 'images'}
+    assert c['fields'] == {'inputParameters': {'added': ['steps'], 'removed': ['seed'], 'changed': ['prompt']}}
+
+
+def test_freshness_only_changes_are_ignored():
+    changelog = diff_snapshots(Snapshot(OLD[:1]), Snapshot(NEW[:1]))
+    assert changelog['summary']['unchanged'] == 1 and changelog['changed'] == []
+
+
+def test_identical_snapshots():
+    changelog = diff_snapshots(Snapshot(OLD), Snapshot(OLD))
+    assert changelog['summary'] == {'added': 0, 'removed': 0, 'changed': 0, 'unchanged': 4}
+    assert affected_ids(changelog) == []
+
+
+def test_affected_ids():
+    assert affected_ids(diff_snapshots(Snapshot(OLD), Snapshot(NEW))) == ['b', 'c', 'gone', 'new']
+
+
+def test_markdown_sections():
+    markdown = changelog_markdown(diff_snapshots(Snapshot(OLD), Snapshot(NEW)))
+    assert '1 added, 1 removed, 2 changed, 1 unchanged' in markdown
+    assert '## Pricing (1)' in markdown
+    assert '| `b` | $0.01/images | $0.02/images |' in markdown
+    assert '- `b` deprecated' in markdown
+    assert '- `c` inputParameters: +steps, -seed, ~prompt' in markdown
+
+
+def test_changelog_paths_append_suffixes(tmp_path):
+    path = tmp_path / 'reports' / 'changes-2024.10'
+    assert changelog_paths(path) == (tmp_path / 'reports' / 'changes-2024.10.json',
+                                     tmp_path / 'reports' / 'changes-2024.10.md')
+    changelog = diff_snapshots(Snapshot(OLD), Snapshot(NEW))
+    write_changelog(changelog, path)
+    json_path, markdown_path = changelog_paths(path)
+    assert json.loads(json_path.read_text(encoding='utf-8')) == changelog
+    assert markdown_path.read_text(encoding='utf-8') == changelog_markdown(changelog)
@@ -0,0 +1,59 @@
+import json
+
+from parse_fal_models import BILLING_KEYS, extract_escaped_json_objects, scan_json_objects
+
+BILLING = {'price': 0.025, 'billing_unit': 'images', 'note': 'braces } { and "quotes" inside'}
+
+
+def escaped_page(key: str, obj: dict) -> str:
+    """`obj` embedded under `key` in a JS string, like a Next.js flight payload"""
+    payload = json.dumps({key: obj, 'other': [1, 2, {'x': '}'}]})
+    return f'<script>self.__next_f.push([1,{json.dumps(payload)}])</script>'
+
+
+def test_raw_object():
+    text = 'var data = {"endpointBilling":' + json.dumps(BILLING) + ', "x": 1};'
+    found, _ = scan_json_objects(text, BILLING_KEYS)
+    assert found == {'endpointBilling': BILLING}
+
+
+def test_escaped_object():
+    found = extract_escaped_json_objects(escaped_page('publicEndpointBilling', BILLING), BILLING_KEYS)
+    assert found == {'publicEndpointBilling': BILLING}
+
+
+def test_escaped_unicode_and_backslashes():
+    obj = {'label': 'café \\ path\\to', 'emoji': '\U0001f600'}
+    found = extract_escaped_json_objects(escaped_page('endpointBilling', obj), BILLING_KEYS)
+    assert found['endpointBilling'] == obj
+
+
+def test_large_escaped_object_beyond_decode_window():
+    obj = {'price': 1, 'billing_unit': 'seconds', 'padding': 'x\\"y' * 5000}
+    found = extract_escaped_json_objects(escaped_page('endpointBilling', obj), BILLING_KEYS)
+    assert found['endpointBilling'] == obj
+
+
+def test_first_decodable_occurrence_wins():
+    text = ('"endpointBilling" is mentioned in prose first. '
+            '{"endpointBilling": "not an object"} '
+            '{"endpointBilling": {"price": 1}} {"endpointBilling": {"price": 2}}')
+    found, _ = scan_json_objects(text, BILLING_KEYS)
+    assert found == {'endpointBilling': {'price': 1}}
+
+
+def test_escaping_must_match_the_key_quote():
+    # An escaped key followed by an unescaped object is not an embedding
+    text = 'x\\"endpointBilling":{"price": 1}'
+    assert scan_json_objects(text, BILLING_KEYS)[0] == {}
+
+
+def test_missing_keys_are_absent():
+    assert extract_escaped_json_objects('<html>no billing here</html>', BILLING_KEYS) == {}
+
+
+def test_incomplete_object_is_kept_for_more_input():
+    text = 'prefix {"endpointBilling": {"price": 1, "billing_unit": "ima'
+    found, keep_from = scan_json_objects(text, ('endpointBilling',), complete=False)
+    assert found == {}
+    assert text[keep_from:].startswith('{"endpointBilling"')
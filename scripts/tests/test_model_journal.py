@@ -0,0 +1,50 @@
+import json
+
+from parse_fal_models import ModelJournal, merge_models
+
+
+def test_round_trip(tmp_path):
+    journal = ModelJournal(tmp_path / 'journal.jsonl')
+    journal.append({'id': 'a', 'n': 1})
+    journal.append({'id': 'b', 'n': 2})
+    journal.append({'id': 'a', 'n': 3})
+    journal.close()
+    assert journal.load() == {'a': {'id': 'a', 'n': 3}, 'b': {'id': 'b', 'n': 2}}
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    path.write_text(json.dumps({'id': 'a'}) + '\n' + '{"id": "b", "tit', encoding='utf-8')
+    assert ModelJournal(path).load() == {'a': {'id': 'a'}}
+
+
+def test_append_after_torn_line_starts_a_new_line(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    path.write_text(json.dumps({'id': 'a'}) + '\n' + '{"id": "b", "tit', encoding='utf-8')
+    journal = ModelJournal(path)
+    journal.append({'id': 'c'})
+    journal.close()
+    assert journal.load() == {'a': {'id': 'a'}, 'c': {'id': 'c'}}
+
+
+def test_lines_without_an_id_are_skipped(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    path.write_text('\n[1, 2]\n{"title": "no id"}\n{"id": "a"}\n', encoding='utf-8')
+    assert ModelJournal(path).load() == {'a': {'id': 'a'}}
+
+
+def test_missing_journal_loads_empty(tmp_path):
+    assert ModelJournal(tmp_path / 'missing.jsonl').load() == {}
+
+
+def test_discard_removes_the_file(tmp_path):
+    journal = ModelJournal(tmp_path / 'journal.jsonl')
+    journal.append({'id': 'a'})
+    journal.discard()
+    assert not journal.path.exists()
+
+
+def test_merge_replaces_in_place_and_appends_new():
+    existing = [{'id': 'a', 'v': 1}, {'id': 'b', 'v': 1}]
+    merged = merge_models(existing, {'b': {'id': 'b', 'v': 2}, 'c': {'id': 'c', 'v': 1}})
+    assert merged == [{'id': 'a', 'v': 1}, {'id': 'b', 'v': 2}, {'id': 'c', 'v': 1}]
@@ -0,0 +1,13 @@
+import pytest
+
+import parse_fal_models
+
+
+def test_offline_cache_miss_stops_the_run_without_writing(tmp_path, capsys):
+    output_dir = tmp_path / 'data'
+    with pytest.raises(SystemExit) as exit_info:
+        parse_fal_models.main(['--offline', '--cache-dir', str(tmp_path / 'cache'),
+                               '--output-dir', str(output_dir)])
+    assert exit_info.value.code == 1
+    assert 'is not in the HTTP cache' in capsys.readouterr().out
+    assert list(output_dir.iterdir()) == []
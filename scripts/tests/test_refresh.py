@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import aiohttp
+import pytest
+
+from parse_fal_models import OPENAPI_URL, PLAYGROUND_URL, Fetched, parse_single_model, record_changed
+from run_metrics import RunMetrics
+
+MODEL = {'id': 'fal-ai/flux', 'title': 'FLUX', 'category': 'text-to-image', 'tags': ['fast']}
+SCHEMA_URL = OPENAPI_URL.format(endpoint_id=MODEL['id'])
+PAGE_URL = PLAYGROUND_URL.format(endpoint_id=MODEL['id'])
+
+
+def openapi(parameters):
+    return {
+        'info': {'x-fal-metadata': {'playgroundUrl': PAGE_URL, 'documentationUrl': PAGE_URL + '/api'}},
+        'paths': {'/fal-ai/flux': {'post': {'requestBody': {'content': {'application/json': {
+            'schema': {'$ref': '#/components/schemas/Input'}}}}}}},
+        'components': {'schemas': {'Input': {'type': 'object', 'properties': parameters}}},
+    }
+
+
+def page(price):
+    billing = json.dumps({'publicEndpointBilling': {'price': price, 'billing_unit': 'images'}})
+    return f'<html><script>var d = {billing};</script></html>'
+
+
+class FakeFetcher:
+    """Origin holding one versioned body per URL; matching validators get a 304"""
+
+    def __init__(self, resources):
+        self.resources = resources
+        self.metrics = RunMetrics('test')
+        self.requests = []
+
+    def _lookup(self, url, validators):
+        self.requests.append(url)
+        body = self.resources[url]
+        if isinstance(body, Exception):
+            raise body
+        etag = f'"{hash(json.dumps(body))}"'
+        return body, etag, bool(validators) and validators.get('etag') == etag
+
+    async def get_json_conditional(self, url, validators=None, ttl=None, kind='http'):
+        body, etag, unchanged = self._lookup(url, validators)
+        if unchanged:
+            return Fetched(None, dict(validators), modified=False)
+        return Fetched(body, {'etag': etag, 'lastModified': None})
+
+    async def stream_text(self, url, consume, validators=None, ttl=None, kind='http'):
+        await asyncio.sleep(0)
+        body, etag, unchanged = self._lookup(url, validators)
+        if unchanged:
+            return Fetched(None, dict(validators), modified=False)
+        consume(body, True)
+        return Fetched(None, {'etag': etag, 'lastModified': None})
+
+
+def parse(fetcher, previous=None, only=None):
+    return asyncio.run(parse_single_model(fetcher, MODEL, 1, 1, previous=previous, only=only))
+
+
+def test_first_parse_records_validators():
+    fetcher = FakeFetcher({SCHEMA_URL: openapi({'prompt': {'type': 'string'}}), PAGE_URL: page(0.025)})
+    record = parse(fetcher)
+    assert record['pricing'] == {'price': 0.025, 'billing_unit': 'images'}
+    assert list(record['inputParameters']) == ['prompt']
+    assert record['freshness']['schema']['etag'] and record['freshness']['pricing']['etag']
+
+
+def test_unchanged_model_refreshes_to_an_equal_record():
+    fetcher = FakeFetcher({SCHEMA_URL: openapi({'prompt': {'type': 'string'}}), PAGE_URL: page(0.025)})
+    first = parse(fetcher)
+    again = parse(fetcher, previous=first)
+    assert not record_changed(first, again)
+    assert again['freshness']['schema']['hash'] == first['freshness']['schema']['hash']
+
+
+def test_changed_parts_are_picked_up():
+    fetcher = FakeFetcher({SCHEMA_URL: openapi({'prompt': {'type': 'string'}}), PAGE_URL: page(0.025)})
+    first = parse(fetcher)
+    fetcher.resources[PAGE_URL] = page(0.03)
+    fetcher.resources[SCHEMA_URL] = openapi({'prompt': {'type': 'string'}, 'seed': {'type': 'integer'}})
+    again = parse(fetcher, previous=first)
+    assert record_changed(first, again)
+    assert again['pricing']['price'] == 0.03
+    assert list(again['inputParameters']) == ['prompt', 'seed']
+
+
+def test_failed_pricing_fetch_keeps_the_stored_pricing():
+    fetcher = FakeFetcher({SCHEMA_URL: openapi({'prompt': {'type': 'string'}}), PAGE_URL: page(0.025)})
+    first = parse(fetcher)
+    fetcher.resources[PAGE_URL] = ValueError('garbled page')
+    again = parse(fetcher, previous=first)
+    assert again['pricing'] == first['pricing']
+
+
+def test_record_changed_ignores_freshness():
+    assert record_changed(None, {'id': 'a'})
+    assert not record_changed({'id': 'a', 'freshness': {'x': 1}}, {'id': 'a', 'freshness': {'x': 2}})
+    assert not record_changed({'id': 'a', 'pricing': None}, {'id': 'a'})
+    assert record_changed({'id': 'a', 'pricing': 1}, {'id': 'a', 'pricing': 2})
+
+
+def test_failed_schema_fetch_does_not_leak_the_pricing_task():
+    unavailable = aiohttp.ClientResponseError(None, (), status=503)
+    fetcher = FakeFetcher({SCHEMA_URL: unavailable, PAGE_URL: page(0.025)})
+
+    async def run():
+        with pytest.raises(aiohttp.ClientResponseError):
+            await parse_single_model(fetcher, MODEL, 1, 1)
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(run()) == set()
+
+
+def test_pricing_only_without_a_playground_url_keeps_the_stored_pricing():
+    fetcher = FakeFetcher({SCHEMA_URL: openapi({'prompt': {'type': 'string'}}), PAGE_URL: page(0.025)})
+    first = parse(fetcher)
+    previous = {**first, 'playgroundUrl': ''}
+    fetcher.resources[PAGE_URL] = page(0.5)
+    again = parse(fetcher, previous=previous, only='pricing')
+    assert again['pricing'] == first['pricing']
+    assert again['freshness']['pricing'] == first['freshness']['pricing']
+    assert SCHEMA_URL not in fetcher.requests[2:]
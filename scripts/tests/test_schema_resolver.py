@@ -0,0 +1,95 @@
+from parse_fal_models import SchemaResolver, parse_input_schema, parse_output_schema, select_endpoint_schemas
+
+REF = '#/components/schemas/'
+
+
+def openapi(components, input_name='Input', output_name='Output'):
+    return {
+        'paths': {
+            '/fal-ai/model': {'post': {'requestBody': {'content': {'application/json': {
+                'schema': {'$ref': REF + input_name}}}}}},
+            '/fal-ai/model/requests/{request_id}': {'get': {'responses': {'200': {'content': {
+                'application/json': {'schema': {'$ref': REF + output_name}}}}}}},
+        },
+        'components': {'schemas': components},
+    }
+
+
+def test_cyclic_refs_become_recursive_stubs():
+    document = openapi({
+        'Input': {'type': 'object', 'properties': {'root': {'$ref': REF + 'Node'}}},
+        'Node': {'type': 'object', 'properties': {
+            'name': {'type': 'string'},
+            'children': {'type': 'array', 'items': {'$ref': REF + 'Node'}},
+        }},
+    })
+    resolver = SchemaResolver()
+    params = resolver.parameters(document, select_endpoint_schemas(document)[0])
+    node = params['root']
+    assert node['properties']['name']['type'] == 'string'
+    assert node['properties']['children']['items'] == {'type': 'object', 'description': '', 'recursive': 'Node'}
+    # Components in a cycle have no content key and are not memoized
+    assert resolver.resolved == {}
+
+
+def test_mutual_recursion_terminates():
+    document = openapi({
+        'Input': {'properties': {'a': {'$ref': REF + 'A'}}},
+        'A': {'properties': {'b': {'$ref': REF + 'B'}}},
+        'B': {'properties': {'a': {'$ref': REF + 'A'}}},
+    })
+    params = SchemaResolver().parameters(document, select_endpoint_schemas(document)[0])
+    assert params['a']['type'] == 'object'
+    assert params['a']['properties']['b']['properties']['a']['recursive'] == 'A'
+
+
+def test_all_of_is_merged_with_required_flags():
+    document = openapi({
+        'Base': {'type': 'object', 'properties': {'prompt': {'type': 'string'}}, 'required': ['prompt']},
+        'Input': {'allOf': [{'$ref': REF + 'Base'},
+                            {'properties': {'seed': {'type': 'integer', 'minimum': 0}}}],
+                  'description': 'Model input'},
+    })
+    params = parse_input_schema(document)
+    assert set(params) == {'prompt', 'seed'}
+    assert params['seed'] == {'type': 'integer', 'description': '', 'required': False, 'minimum': 0}
+
+
+def test_nullable_any_of_collapses_to_one_type():
+    document = openapi({'Input': {'type': 'object', 'required': ['size'], 'properties': {
+        'size': {'anyOf': [{'$ref': REF + 'ImageSize'}, {'type': 'null'}], 'description': 'Output size'},
+        'steps': {'type': ['integer', 'null'], 'default': 28},
+        'mode': {'oneOf': [{'type': 'string', 'enum': ['fast']}, {'type': 'integer'}]},
+    }}, 'ImageSize': {'properties': {'width': {'type': 'integer'}}}})
+    params = parse_input_schema(document)
+    assert params['size']['type'] == 'object'
+    assert params['size']['nullable'] and params['size']['required']
+    assert params['size']['description'] == 'Output size'
+    assert params['steps'] == {'type': 'integer', 'description': '', 'required': False,
+                               'default': 28, 'nullable': True}
+    assert params['mode']['type'] is None
+    assert [variant['type'] for variant in params['mode']['anyOf']] == ['string', 'integer']
+
+
+def test_shared_components_are_resolved_once_across_documents():
+    components = {'File': {'properties': {'url': {'type': 'string'}}},
+                  'Input': {'properties': {'image': {'$ref': REF + 'File'}}}}
+    resolver = SchemaResolver()
+    first = openapi(dict(components))
+    second = openapi(dict(components))
+    a = resolver.parameters(first, select_endpoint_schemas(first)[0])
+    b = resolver.parameters(second, select_endpoint_schemas(second)[0])
+    assert a == b
+    assert a['image']['properties'] is b['image']['properties']
+
+
+def test_unknown_refs_are_marked_unresolved():
+    document = openapi({'Input': {'properties': {'x': {'$ref': REF + 'Missing'}}}})
+    assert parse_input_schema(document)['x']['unresolved'] == REF + 'Missing'
+
+
+def test_output_comes_from_the_result_endpoint():
+    document = openapi({'Input': {'properties': {}},
+                        'Output': {'properties': {'images': {'type': 'array', 'items': {'type': 'string'}}}},
+                        'QueueStatus': {'properties': {'status': {'type': 'string'}}}})
+    assert list(parse_output_schema(document)) == ['images']
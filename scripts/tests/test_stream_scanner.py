@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from parse_fal_models import BILLING_KEYS, JSONObjectStreamScanner, extract_escaped_json_objects
+
+BILLING = {'price': 0.04, 'billing_unit': 'megapixels', 'text': 'a \\ b "c" } é \U0001f600'}
+
+
+def page(escaped: bool) -> str:
+    filler = '<div class="card">' + 'lorem ipsum ' * 400 + '</div>'
+    if escaped:
+        payload = json.dumps({'publicEndpointBilling': BILLING, 'rest': 'x' * 100})
+        return filler + f'<script>self.__next_f.push([1,{json.dumps(payload)}])</script>' + filler
+    return filler + '<script>var d = ' + json.dumps({'publicEndpointBilling': BILLING}) + '</script>' + filler
+
+
+def feed_chunks(text: str, size: int) -> JSONObjectStreamScanner:
+    scanner = JSONObjectStreamScanner(BILLING_KEYS)
+    chunks = [text[i:i + size] for i in range(0, len(text), size)]
+    for n, chunk in enumerate(chunks):
+        if scanner.feed(chunk, final=n == len(chunks) - 1):
+            break
+    return scanner
+
+
+@pytest.mark.parametrize('escaped', [False, True])
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 1000])
+def test_chunked_scan_matches_whole_page(escaped, size):
+    text = page(escaped)
+    assert feed_chunks(text, size).found == extract_escaped_json_objects(text, BILLING_KEYS)
+    assert feed_chunks(text, size).found == {'publicEndpointBilling': BILLING}
+
+
+def test_chunk_boundary_inside_every_escape():
+    text = page(escaped=True)
+    start = text.index('publicEndpointBilling')
+    # Split once at every offset through the key and the object
+    for cut in range(start - 2, start + 200):
+        scanner = JSONObjectStreamScanner(BILLING_KEYS)
+        scanner.feed(text[:cut])
+        scanner.feed(text[cut:], final=True)
+        assert scanner.found == {'publicEndpointBilling': BILLING}, cut
+
+
+def test_stops_once_preferred_key_is_found():
+    text = page(escaped=False)
+    scanner = JSONObjectStreamScanner(BILLING_KEYS)
+    end = text.index('</script>')
+    assert scanner.feed(text[:end])
+    assert scanner.found == {'publicEndpointBilling': BILLING}
+
+
+def test_window_stays_small_without_matches():
+    scanner = JSONObjectStreamScanner(BILLING_KEYS)
+    for _ in range(1000):
+        assert not scanner.feed('<p>nothing to see</p>' * 10)
+    assert len(scanner._window) < 100
+    assert not scanner.found
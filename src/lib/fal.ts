@@ -5,7 +5,7 @@ import {
   type ModelPricing,
   calculateModelCost,
   formatCost,
-  getModelSchema,
+  getModelPricing,
   getPricingInfo,
 } from "./pricing";
 
@@ -2028,8 +2028,8 @@ export function getEnhancedApiInfo(endpointId: string): ApiInfo | undefined {
   const endpoint = AVAILABLE_ENDPOINTS.find((e) => e.endpointId === endpointId);
   if (!endpoint) return undefined;
 
-  // Get pricing data from schema
-  const schema = getModelSchema(endpointId);
+  // Get pricing data from the pricing index
+  const schema = getModelPricing(endpointId);
   if (schema?.pricing) {
     return {
       ...endpoint,
@@ -2045,7 +2045,7 @@ export function getEnhancedApiInfo(endpointId: string): ApiInfo | undefined {
  */
 export function getEnhancedEndpoints(): ApiInfo[] {
   return AVAILABLE_ENDPOINTS.map((endpoint) => {
-    const schema = getModelSchema(endpoint.endpointId);
+    const schema = getModelPricing(endpoint.endpointId);
     if (schema?.pricing) {
       return {
         ...endpoint,
@@ -3,9 +3,13 @@
  *
  * This module provides functions to calculate approximate costs for model generations
  * based on various billing units (videos, images, seconds, characters, megapixels, etc.)
+ *
+ * Cost lookups use the compact id-keyed pricing index generated by
+ * scripts/parse_fal_models.py. Full model schemas live in per-category shards
+ * (data/fal_schemas/<category>.json) and are only loaded on demand.
  */
 
-import falModelsData from "../../data/fal_models_schemas.json";
+import falPricingIndex from "../../data/fal_pricing_index.json";
 
 export type BillingUnit =
   | "videos"
@@ -51,6 +55,20 @@ export interface ModelSchema {
   inputParameters: Record<string, any>;
 }
 
+/**
+ * Pricing index entry: only the fields needed to calculate a cost
+ */
+export interface ModelPricingEntry {
+  category: string;
+  pricing: ModelPricing | null;
+  inputParameters?: Record<string, { default?: any }>;
+}
+
+const pricingIndex = falPricingIndex as unknown as Record<
+  string,
+  ModelPricingEntry
+>;
+
 export interface PricingCalculationParams {
   // Video/audio duration in seconds
   duration?: number;
@@ -70,17 +88,50 @@ export interface PricingCalculationParams {
 }
 
 /**
- * Get model schema by ID
+ * Get the pricing entry of a model by ID
+ */
+export function getModelPricing(
+  modelId: string,
+): ModelPricingEntry | undefined {
+  return Object.hasOwn(pricingIndex, modelId)
+    ? pricingIndex[modelId]
+    : undefined;
+}
+
+/**
+ * File name of the schema shard holding a category
+ * (mirrors shard_name in scripts/parse_fal_models.py)
  */
-export function getModelSchema(modelId: string): ModelSchema | undefined {
-  return (falModelsData as ModelSchema[]).find((model) => model.id === modelId);
+function shardName(category: string): string {
+  return (
+    category.replace(/[^A-Za-z0-9_-]+/g, "-").replace(/^-+|-+$/g, "") ||
+    "uncategorized"
+  );
 }
 
 /**
- * Get all model schemas
+ * Load the full schemas of all models in a category
  */
-export function getAllModelSchemas(): ModelSchema[] {
-  return falModelsData as ModelSchema[];
+export async function loadCategorySchemas(
+  category: string,
+): Promise<ModelSchema[]> {
+  const shard = await import(
+    `../../data/fal_schemas/${shardName(category)}.json`
+  );
+  return shard.default as ModelSchema[];
+}
+
+/**
+ * Load the full schema of a model, including all input parameters
+ */
+export async function loadModelSchema(
+  modelId: string,
+): Promise<ModelSchema | undefined> {
+  const entry = getModelPricing(modelId);
+  if (!entry) return undefined;
+
+  const schemas = await loadCategorySchemas(entry.category);
+  return schemas.find((model) => model.id === modelId);
 }
 
 /**
@@ -113,12 +164,12 @@ function parseAspectRatio(
  */
 function extractDuration(
   params: PricingCalculationParams,
-  modelSchema: ModelSchema,
+  modelSchema: ModelPricingEntry,
 ): number {
   if (params.duration) return params.duration;
 
   // Try to get default duration from model schema
-  const durationParam = modelSchema.inputParameters.duration;
+  const durationParam = modelSchema.inputParameters?.duration;
   if (durationParam?.default) {
     const defaultValue = durationParam.default;
     // Convert string to number if needed
@@ -143,7 +194,7 @@ function extractDuration(
  */
 function extractDimensions(
   params: PricingCalculationParams,
-  modelSchema: ModelSchema,
+  modelSchema: ModelPricingEntry,
 ): { width: number; height: number } {
   // If explicit dimensions provided
   if (params.width && params.height) {
@@ -151,7 +202,7 @@ function extractDimensions(
   }
 
   // Try to get from image_size parameter
-  const imageSizeParam = modelSchema.inputParameters.image_size;
+  const imageSizeParam = modelSchema.inputParameters?.image_size;
   if (imageSizeParam?.default) {
     const size = imageSizeParam.default;
     if (size.width && size.height) {
@@ -160,7 +211,7 @@ function extractDimensions(
   }
 
   // Try to get from aspect_ratio
-  const aspectRatioParam = modelSchema.inputParameters.aspect_ratio;
+  const aspectRatioParam = modelSchema.inputParameters?.aspect_ratio;
   if (aspectRatioParam?.default) {
     const dims = parseAspectRatio(aspectRatioParam.default);
     if (dims) return dims;
@@ -181,7 +232,7 @@ export function calculateModelCost(
   modelId: string,
   params: PricingCalculationParams = {},
 ): number | null {
-  const modelSchema = getModelSchema(modelId);
+  const modelSchema = getModelPricing(modelId);
 
   if (!modelSchema || !modelSchema.pricing) {
     return null;
@@ -325,7 +376,7 @@ export function getPricingInfo(modelId: string): {
   displayText: string;
   canCalculate: boolean;
 } | null {
-  const modelSchema = getModelSchema(modelId);
+  const modelSchema = getModelPricing(modelId);
 
   if (!modelSchema || !modelSchema.pricing) {
     return null;
@@ -0,0 +1,733 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the scraping tools
+Runs parse_fal_models.py, DocsScraper and scrape_models.py against a local
+stand-in server that serves synthetic data, and reports requests/s, wall
+time and peak RSS per scenario.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+from aiohttp import web
+from bs4 import BeautifulSoup
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / 'scripts'
+
+CATALOG_PAGE_SIZE = 40
+CATEGORIES = ('text-to-image', 'image-to-image', 'text-to-video', 'image-to-video', 'text-to-speech')
+
+# Every MISSING_SCHEMA_EVERY-th model has no OpenAPI document, like a few real ones
+MISSING_SCHEMA_EVERY = 97
+
+SCENARIOS = ('fal-models', 'fal-refresh', 'fal-category', 'model-cards', 'card-parse',
+             'card-parse-baseline', 'docs', 'docs-refresh')
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------------
+
+def model_id(index: int) -> str:
+    return f"fal-ai/bench-{index}/{CATEGORIES[index % len(CATEGORIES)]}"
+
+
+def model_index(endpoint_id: str) -> int:
+    return int(endpoint_id.split('/')[1].rsplit('-', 1)[1])
+
+
+def catalog_model(index: int) -> Dict[str, Any]:
+    return {
+        'id': model_id(index),
+        'title': f"Bench Model {index}",
+        'category': CATEGORIES[index % len(CATEGORIES)],
+        'shortDescription': f"Synthetic model {index} used for throughput benchmarks",
+        'tags': ['bench', 'new'] if index % 3 == 0 else ['bench'],
+        'thumbnailUrl': f"https://example.invalid/thumbs/{index}.webp",
+        'licenseType': 'commercial' if index % 4 else 'research',
+        'deprecated': index % 50 == 0,
+        'unlisted': False,
+    }
+
+
+def openapi_document(index: int, base_url: str) -> Dict[str, Any]:
+    endpoint_id = model_id(index)
+    name = f"Bench{index}"
+    return {
+        'openapi': '3.0.4',
+        'info': {
+            'title': 'Queue OpenAPI',
+            'x-fal-metadata': {
+                'endpointId': endpoint_id,
+                'category': CATEGORIES[index % len(CATEGORIES)],
+                'playgroundUrl': f"{base_url}/models/{endpoint_id}",
+                'documentationUrl': f"{base_url}/models/{endpoint_id}/api",
+            },
+        },
+        'paths': {
+            f"/{endpoint_id}": {'post': {
+                'requestBody': {'content': {'application/json': {
+                    'schema': {'$ref': f"#/components/schemas/{name}Input"}}}},
+                'responses': {'200': {'content': {'application/json': {
+                    'schema': {'$ref': '#/components/schemas/QueueStatus'}}}}},
+            }},
+            f"/{endpoint_id}/requests/{{request_id}}": {'get': {
+                'responses': {'200': {'content': {'application/json': {
+                    'schema': {'$ref': f"#/components/schemas/{name}Output"}}}}},
+            }},
+        },
+        'components': {'schemas': {
+            'QueueStatus': {'properties': {'status': {'type': 'string'}}},
+            f"{name}Input": {
+                'properties': {
+                    'prompt': {'type': 'string', 'description': 'The prompt to generate from', 'examples': [f"A scene {index}"]},
+                    'image_size': {
+                        'anyOf': [{'$ref': '#/components/schemas/ImageSize'},
+                                  {'type': 'string', 'enum': ['square_hd', 'landscape_16_9', 'portrait_16_9']}],
+                        'default': 'landscape_16_9',
+                    },
+                    'duration': {'type': 'string', 'enum': ['5', '10'], 'default': '5'},
+                    'num_images': {'type': 'integer', 'minimum': 1, 'maximum': 4, 'default': 1},
+                    'seed': {'type': 'integer', 'description': 'Random seed for reproducible results'},
+                    'enable_safety_checker': {'type': 'boolean', 'default': True},
+                },
+                'required': ['prompt'],
+            },
+            'ImageSize': {'properties': {'width': {'type': 'integer'}, 'height': {'type': 'integer'}}},
+            f"{name}Output": {'properties': {'video': {'$ref': '#/components/schemas/File'}}, 'required': ['video']},
+            'File': {'properties': {'url': {'type': 'string'}, 'content_type': {'type': 'string'}}},
+        }},
+    }
+
+
+def playground_html(index: int, padding: str) -> str:
+    """Model page with the billing object embedded as escaped JSON in a Next.js payload"""
+    billing = {
+        'price': round(0.01 + (index % 40) * 0.005, 3),
+        'billing_unit': 'videos' if 'video' in CATEGORIES[index % len(CATEGORIES)] else 'images',
+        'provider_type': 'fal',
+        'is_partner_api': index % 7 == 0,
+    }
+    payload = json.dumps({'endpointId': model_id(index), 'description': 'Has {braces} and "quotes"',
+                          'publicEndpointBilling': billing})
+    escaped = json.dumps(payload)[1:-1]
+    head = padding[:len(padding) // 3]
+    tail = padding[len(padding) // 3:]
+    return (
+        f'<!DOCTYPE html><html><head><title>{model_id(index)}</title></head><body>'
+        f'<script>self.__next_f.push([1,"{head}"])</script>'
+        f'<script>self.__next_f.push([1,"{escaped}"])</script>'
+        f'<script>self.__next_f.push([1,"{tail}"])</script>'
+        '</body></html>'
+    )
+
+
+def docs_page_html(index: int, total: int, build: int) -> str:
+    links = ''.join(
+        f'<li><a href="/model-apis/page-{(index + step) % total}">Page {(index + step) % total}</a></li>'
+        for step in (1, 2, 3)
+    )
+    sections = ''.join(
+        f'<h2>Section {n}</h2><p>{"Synthetic documentation text for the benchmark. " * 12}</p>'
+        f'<pre><code>curl https://queue.fal.run/fal-ai/bench-{index} -d \'{{"prompt": "{n}"}}\'</code></pre>'
+        for n in range(6)
+    )
+    return (
+        f'<!DOCTYPE html><html><head><title>Page {index}</title><script>var x = 1;</script></head><body>'
+        '<header>Docs</header><nav><ul>' + links + '</ul></nav>'
+        '<main><div>Breadcrumbs</div>'
+        # Build-specific class names, nonces and comments, like a Next.js deploy
+        f'<div class="content_body__b{build:04x}" data-build="{build}"><!--build {build}-->'
+        f'<script nonce="n{build}">self.__next_f.push([{build}])</script>'
+        f'<h1>Page {index}</h1>{sections}<ul>{links}</ul><button aria-label="Copy page">Copy</button></div>'
+        '</main><footer>Footer</footer></body></html>'
+    )
+
+
+# Docs pages per gzipped child sitemap; /sitemap.xml is an index of them
+SITEMAP_PAGES = 500
+DOCS_LASTMOD = '2026-01-01T00:00:00+00:00'
+
+
+def sitemap_index_xml(base_url: str, total: int) -> str:
+    entries = ''.join(
+        f'<sitemap><loc>{base_url}/sitemaps/docs-{part}.xml.gz</loc><lastmod>{DOCS_LASTMOD}</lastmod></sitemap>'
+        for part in range(max(1, -(-total // SITEMAP_PAGES)))
+    )
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>')
+
+
+def sitemap_xml(base_url: str, total: int, part: int) -> str:
+    entries = ''.join(
+        f'<url><loc>{base_url}/model-apis/page-{index}</loc><lastmod>{DOCS_LASTMOD}</lastmod></url>'
+        for index in range(part * SITEMAP_PAGES, min(total, (part + 1) * SITEMAP_PAGES))
+    )
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>')
+
+
+# Cards per grid row, cards repeated in a featured/trending section at the
+# top, and layout <div>s around the cards of the synthetic listing pages
+CARDS_PER_ROW = 24
+FEATURED_CARDS = 12
+LAYOUT_DEPTH = 12
+
+
+def listing_page_html(cards: List[str]) -> str:
+    """Wrap cards in nested layout divs and a featured section, like the real listing pages"""
+    featured = ''.join(cards[:FEATURED_CARDS])
+    rows = ''.join(
+        f'<div class="row">{"".join(cards[start:start + CARDS_PER_ROW])}</div>'
+        for start in range(0, len(cards), CARDS_PER_ROW)
+    )
+    return (
+        '<!DOCTYPE html><html><body><main>' + '<div class="layout">' * LAYOUT_DEPTH +
+        f'<div class="featured"><div class="carousel">{featured}</div></div>'
+        f'<div class="all"><div class="grid">{rows}</div></div>' +
+        '</div>' * LAYOUT_DEPTH + '</main></body></html>'
+    )
+
+
+def fal_cards_html(count: int) -> str:
+    return listing_page_html([
+        f'<a href="/models/{model_id(index)}"><div>'
+        f'<div>{model_id(index)}</div>'
+        f'<div>{CATEGORIES[index % len(CATEGORIES)]}</div>'
+        f'<div>{"A synthetic trending model with a long enough description. " * 2}</div>'
+        '<div class="tag-pill">new</div>'
+        '</div></a>'
+        for index in range(count)
+    ])
+
+
+def runware_cards_html(count: int) -> str:
+    return listing_page_html([
+        f'<div class="card"><a href="/playground?modelAIR=runware:{index}@1">'
+        f'<img src="/img/{index}.webp"></a>'
+        f'<div>{"Checkpoint" if index % 2 else "LoRA"} {index}.2k\nBench Model {index}A synthetic model</div>'
+        f'<code>runware:{index}@1</code></div>'
+        for index in range(count)
+    ])
+
+
+# ---------------------------------------------------------------------------
+# Stand-in server
+# ---------------------------------------------------------------------------
+
+class StandInServer:
+    """aiohttp app imitating fal.ai, docs.fal.ai and runware.ai"""
+
+    def __init__(self, options: argparse.Namespace):
+        self.models = options.models
+        self.docs_pages = options.docs_pages
+        self.cards = options.cards
+        self.latency = options.latency_ms / 1000
+        self.padding = 'x' * (options.page_kb * 1024)
+        self.server_rate = options.server_rate
+        self.base_url = ''
+        self.stats = {'requests': 0, 'bytes': 0, 'not_modified': 0, 'throttled': 0}
+        self.build = 0
+        self._window = (0, 0)
+
+    def throttled(self) -> bool:
+        """Whether this request exceeds the server's requests-per-second budget"""
+        if not self.server_rate:
+            return False
+        second = int(time.monotonic())
+        start, count = self._window
+        count = count + 1 if start == second else 1
+        self._window = (second, count)
+        return count > self.server_rate
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/__stats', self.handle_stats)
+        app.router.add_post('/__deploy', self.handle_deploy)
+        app.router.add_get('/api/models', self.handle_catalog)
+        app.router.add_get('/api/openapi/queue/openapi.json', self.handle_openapi)
+        app.router.add_get('/models/{endpoint_id:.+}', self.handle_playground)
+        app.router.add_get('/sitemap.xml', self.handle_sitemap)
+        app.router.add_get('/sitemaps/docs-{part:\\d+}.xml.gz', self.handle_child_sitemap)
+        app.router.add_get('/model-apis/{slug}', self.handle_docs_page)
+        app.router.add_get('/explore/search', self.handle_fal_cards)
+        app.router.add_get('/runware/models', self.handle_runware_cards)
+        return app
+
+    async def respond(self, request: web.Request, body: Any, content_type: str,
+                      etag: Optional[str] = None, status: int = 200) -> web.Response:
+        self.stats['requests'] += 1
+        if self.throttled():
+            self.stats['throttled'] += 1
+            return web.Response(status=429, headers={'Retry-After': '1'})
+        await asyncio.sleep(self.latency)
+        headers = {'ETag': etag} if etag else {}
+        if etag and request.headers.get('If-None-Match') == etag:
+            self.stats['not_modified'] += 1
+            return web.Response(status=304, headers=headers)
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        if request.method != 'HEAD':
+            self.stats['bytes'] += len(data)
+        return web.Response(body=data, status=status, content_type=content_type,
+                            charset='utf-8' if isinstance(body, str) else None, headers=headers)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def handle_deploy(self, request: web.Request) -> web.Response:
+        """Simulate a redeploy of the docs site: new build markup and ETags, same content"""
+        self.build += 1
+        return web.json_response({'build': self.build})
+
+    async def handle_catalog(self, request: web.Request) -> web.Response:
+        page = int(request.query.get('page', 1))
+        pages = max(1, -(-self.models // CATALOG_PAGE_SIZE))
+        start = (page - 1) * CATALOG_PAGE_SIZE
+        items = [catalog_model(i) for i in range(start, min(self.models, start + CATALOG_PAGE_SIZE))]
+        body = json.dumps({'items': items, 'page': page, 'pages': pages, 'total': self.models})
+        return await self.respond(request, body, 'application/json')
+
+    async def handle_openapi(self, request: web.Request) -> web.Response:
+        index = model_index(request.query['endpoint_id'])
+        if index % MISSING_SCHEMA_EVERY == MISSING_SCHEMA_EVERY - 1:
+            return await self.respond(request, '{"detail": "Not Found"}', 'application/json', status=404)
+        body = json.dumps(openapi_document(index, self.base_url))
+        return await self.respond(request, body, 'application/json', etag=f'"schema-{index}"')
+
+    async def handle_playground(self, request: web.Request) -> web.Response:
+        index = model_index(request.match_info['endpoint_id'])
+        return await self.respond(request, playground_html(index, self.padding), 'text/html',
+                                  etag=f'"page-{index}"')
+
+    async def handle_sitemap(self, request: web.Request) -> web.Response:
+        return await self.respond(request, sitemap_index_xml(self.base_url, self.docs_pages), 'application/xml')
+
+    async def handle_child_sitemap(self, request: web.Request) -> web.Response:
+        part = int(request.match_info['part'])
+        body = gzip.compress(sitemap_xml(self.base_url, self.docs_pages, part).encode('utf-8'))
+        return await self.respond(request, body, 'application/gzip')
+
+    async def handle_docs_page(self, request: web.Request) -> web.Response:
+        index = int(request.match_info['slug'].rsplit('-', 1)[1])
+        return await self.respond(request, docs_page_html(index, self.docs_pages, self.build), 'text/html',
+                                  etag=f'"docs-{index}-{self.build}"')
+
+    async def handle_fal_cards(self, request: web.Request) -> web.Response:
+        return await self.respond(request, fal_cards_html(min(self.cards, self.models)), 'text/html')
+
+    async def handle_runware_cards(self, request: web.Request) -> web.Response:
+        return await self.respond(request, runware_cards_html(self.cards), 'text/html')
+
+    async def serve(self, ready: Any) -> None:
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        ready.put(self.base_url)
+        await asyncio.Event().wait()
+
+
+def run_server(options: argparse.Namespace, ready: Any) -> None:
+    asyncio.run(StandInServer(options).serve(ready))
+
+
+def server_stats(base_url: str) -> Dict[str, int]:
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.load(response)
+
+
+# ---------------------------------------------------------------------------
+# Baseline card parsers
+# ---------------------------------------------------------------------------
+
+# Copies of the per-card find_all parsers that scrape_models used to have,
+# timed by the card-parse-baseline scenario for comparison with card-parse
+
+
+def baseline_parse_runware(content: bytes) -> List[Dict]:
+    """scrape_models._parse_runware_models before the single-pass card extraction"""
+    soup = BeautifulSoup(content, 'html.parser')
+    models = []
+
+    model_cards = soup.find_all('div', recursive=True)
+
+    for card in model_cards:
+        code_tag = card.find('code')
+        if not code_tag:
+            continue
+
+        model_id = code_tag.get_text().strip()
+        if not model_id or ':' not in model_id:
+            continue
+
+        img = card.find('img')
+        links = card.find_all('a')
+        divs = card.find_all('div')
+
+        name = None
+        description = None
+        category = None
+        usage_count = None
+
+        for div in divs:
+            text = div.get_text().strip()
+            if text and len(text) > 10 and text not in ['Checkpoint', 'LoRA', 'IP-Adapter']:
+                if 'Checkpoint' in text or 'LoRA' in text:
+                    parts = text.split('\n')
+                    if len(parts) >= 2:
+                        category_usage = parts[0]
+                        if 'Checkpoint' in category_usage:
+                            category = 'Checkpoint'
+                            usage_count = category_usage.replace('Checkpoint', '').strip()
+                        elif 'LoRA' in category_usage:
+                            category = 'LoRA'
+                            usage_count = category_usage.replace('LoRA', '').strip()
+
+                        rest = '\n'.join(parts[1:])
+                        for i, char in enumerate(rest):
+                            if char.isupper() and i > 0 and rest[i-1].islower():
+                                name = rest[:i]
+                                description = rest[i:]
+                                break
+                        if not name:
+                            name = rest[:50] if len(rest) > 50 else rest
+                            description = rest
+
+        if model_id and name:
+            models.append({
+                'model_id': model_id,
+                'name': name.strip(),
+                'description': description.strip() if description else '',
+                'category': category or 'Unknown',
+                'usage_count': usage_count or '0',
+                'image_url': img['src'] if img and img.get('src') else None,
+                'playground_url': links[0]['href'] if links and links[0].get('href') else None
+            })
+
+    return models
+
+
+def baseline_parse_fal(content: bytes) -> List[Dict]:
+    """scrape_models._parse_fal_models before the single-pass card extraction"""
+    soup = BeautifulSoup(content, 'html.parser')
+    models = []
+
+    model_links = soup.find_all('a', href=lambda x: x and x.startswith('/models/'))
+
+    for link in model_links:
+        href = link.get('href', '')
+        if not href.startswith('/models/'):
+            continue
+
+        model_id = href.replace('/models/', '')
+
+        divs = link.find_all('div')
+        name = None
+        category = None
+        description = None
+        tags = []
+
+        for div in divs:
+            text = div.get_text().strip()
+
+            if not name and text and '/' in text:
+                name = text.split('\n')[0].strip()
+
+            if 'image-to-image' in text or 'text-to-image' in text or 'image-to-video' in text:
+                category = text.strip()
+
+            if len(text) > 50 and not category or text == category:
+                continue
+            elif len(text) > 50:
+                description = text
+
+        small_divs = link.find_all('div', class_=lambda x: x and 'tag' in str(x).lower())
+        for div in small_divs:
+            tag_text = div.get_text().strip()
+            if tag_text and len(tag_text) < 30:
+                tags.append(tag_text)
+
+        if model_id and name:
+            models.append({
+                'model_id': model_id,
+                'name': name,
+                'description': description or '',
+                'category': category or 'Unknown',
+                'tags': tags,
+                'url': f"https://fal.ai{href}",
+                'openapi_url': f"https://fal.ai/api/openapi/queue/openapi.json?endpoint_id={model_id}"
+            })
+
+    return models
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+def run_fal_models(base_url: str, workdir: Path, options: argparse.Namespace, refresh: bool = False,
+                   extra_args: Optional[List[str]] = None):
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    import parse_fal_models
+
+    parse_fal_models.MODELS_API_URL = base_url + '/api/models?page={page}'
+    parse_fal_models.OPENAPI_URL = base_url + '/api/openapi/queue/openapi.json?endpoint_id={endpoint_id}'
+    parse_fal_models.PLAYGROUND_URL = base_url + '/models/{endpoint_id}'
+
+    argv = ['--output-dir', str(workdir / 'data'), '--no-cache',
+            '--concurrency-per-host', str(options.concurrency_per_host)]
+    if refresh:
+        argv.extend(['--refresh', '--changelog', str(workdir / 'data' / 'changes')])
+    parse_fal_models.main(argv + (extra_args or []))
+
+
+def run_fal_refresh(base_url: str, workdir: Path, options: argparse.Namespace):
+    run_fal_models(base_url, workdir, options, refresh=True)
+
+
+def run_fal_category(base_url: str, workdir: Path, options: argparse.Namespace):
+    """Targeted pricing re-sync of one category, as after a provider price change"""
+    run_fal_models(base_url, workdir, options,
+                   extra_args=['--category', CATEGORIES[0], '--pricing-only'])
+
+
+def run_docs(base_url: str, workdir: Path, options: argparse.Namespace, probe: Optional[str] = None):
+    from scraper import DocsScraper
+
+    with open(Path(__file__).parent / 'config_fal.yml', 'r') as f:
+        config = yaml.safe_load(f)
+    config.update({
+        'base_url': base_url,
+        'docs_base_url': base_url + '/model-apis',
+        'sitemap_url': base_url + '/sitemap.xml',
+        'manifest_file': 'manifest_bench.json',
+        'output_dir': 'docs/bench',
+        'pages_dir': 'docs/bench/pages',
+        'models_dir': 'docs/bench/models',
+        'toc_file': 'docs/bench/TOC.md',
+    })
+    if options.docs_rate:
+        config['rate_limit'] = {**config.get('rate_limit', {}), 'rate': options.docs_rate,
+                                'max_rate': options.docs_rate}
+    if probe:
+        config['change_probe'] = probe
+    config_path = workdir / 'config_bench.yml'
+    with open(config_path, 'w') as f:
+        yaml.safe_dump(config, f)
+
+    DocsScraper(str(config_path), str(workdir)).scrape_documentation()
+
+
+def run_docs_refresh(base_url: str, workdir: Path, options: argparse.Namespace):
+    if options.docs_redeploy:
+        urllib.request.urlopen(urllib.request.Request(f"{base_url}/__deploy", method='POST')).close()
+    run_docs(base_url, workdir, options, probe=options.docs_probe)
+
+
+def run_model_cards(base_url: str, workdir: Path, options: argparse.Namespace):
+    import scrape_models
+
+    scrape_models.RUNWARE_MODELS_URL = base_url + '/runware/models'
+    scrape_models.FAL_MODELS_URL = base_url + '/explore/search'
+    output_dir = workdir / 'docs'
+    scrape_models.save_models_markdown(scrape_models.scrape_runware_models(), 'runware',
+                                       output_dir / 'runware' / 'models')
+    scrape_models.save_models_markdown(scrape_models.scrape_fal_models(), 'fal',
+                                       output_dir / 'fal' / 'models')
+
+
+def run_card_parse(base_url: str, workdir: Path, options: argparse.Namespace):
+    """Parse the synthetic listing pages in memory, without the server"""
+    import scrape_models
+
+    scrape_models._parse_runware_models(runware_cards_html(options.cards).encode('utf-8'))
+    scrape_models._parse_fal_models(fal_cards_html(options.cards).encode('utf-8'))
+
+
+def run_card_parse_baseline(base_url: str, workdir: Path, options: argparse.Namespace):
+    """Parse the same listing pages as card-parse with the baseline parsers"""
+    baseline_parse_runware(runware_cards_html(options.cards).encode('utf-8'))
+    baseline_parse_fal(fal_cards_html(options.cards).encode('utf-8'))
+
+
+SCENARIO_RUNNERS: Dict[str, Callable[[str, Path, argparse.Namespace], None]] = {
+    'fal-models': run_fal_models,
+    'fal-refresh': run_fal_refresh,
+    'fal-category': run_fal_category,
+    'docs': run_docs,
+    'docs-refresh': run_docs_refresh,
+    'card-parse': run_card_parse,
+    'card-parse-baseline': run_card_parse_baseline,
+    'model-cards': run_model_cards,
+}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the current process"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(scenario: str, base_url: str, workdir: Path, options: argparse.Namespace, results: Any):
+    """Run one scenario in this (child) process and report its wall time and peak RSS"""
+    if not options.verbose:
+        sys.stdout = open(os.devnull, 'w')
+    sys.path.insert(0, str(Path(__file__).parent))
+
+    start = time.perf_counter()
+    try:
+        SCENARIO_RUNNERS[scenario](base_url, workdir, options)
+    except SystemExit as e:
+        if e.code:
+            results.put({'error': f"exited with status {e.code}"})
+            return
+    results.put({'wall': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb()})
+
+
+def run_scenario(context: Any, scenario: str, base_url: str, workdir: Path,
+                 options: argparse.Namespace) -> Dict[str, Any]:
+    """Run a scenario in a fresh process so its peak RSS is measured on its own"""
+    before = server_stats(base_url)
+    results = context.Queue()
+    process = context.Process(target=measure, args=(scenario, base_url, workdir, options, results))
+    process.start()
+    process.join()
+    after = server_stats(base_url)
+
+    if results.empty():
+        return {'scenario': scenario, 'error': f"crashed with exit code {process.exitcode}"}
+    result = {'scenario': scenario, **results.get()}
+    if 'error' in result:
+        return result
+
+    result['requests'] = after['requests'] - before['requests']
+    result['not_modified'] = after['not_modified'] - before['not_modified']
+    result['throttled'] = after['throttled'] - before['throttled']
+    result['megabytes'] = (after['bytes'] - before['bytes']) / (1024 * 1024)
+    result['requests_per_second'] = result['requests'] / result['wall'] if result['wall'] else 0.0
+    return result
+
+
+def print_report(results: List[Dict[str, Any]]):
+    print(f"\n{'scenario':<19} {'requests':>9} {'304s':>6} {'429s':>6} {'MB sent':>8} {'wall s':>8} "
+          f"{'req/s':>9} {'peak RSS MB':>12}")
+    print('-' * 84)
+    for result in results:
+        if 'error' in result:
+            print(f"{result['scenario']:<19} {result['error']}")
+            continue
+        rss = result['peak_rss_mb']
+        print(f"{result['scenario']:<19} {result['requests']:>9} {result['not_modified']:>6} {result['throttled']:>6} "
+              f"{result['megabytes']:>8.1f} {result['wall']:>8.2f} {result['requests_per_second']:>9.1f} "
+              f"{(f'{rss:.1f}' if rss is not None else 'n/a'):>12}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Throughput benchmark for the scraping tools against a local stand-in server'
+    )
+    parser.add_argument(
+        'scenarios',
+        nargs='*',
+        help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)"
+    )
+    parser.add_argument('--models', type=int, default=1000, help='Synthetic catalog size (default: %(default)s)')
+    parser.add_argument('--docs-pages', type=int, default=40, help='Docs pages in the sitemap (default: %(default)s)')
+    parser.add_argument('--docs-rate', type=float,
+                        help='Override the docs site rate limit, in requests/s (default: from config_fal.yml)')
+    parser.add_argument('--docs-probe', choices=('conditional', 'head', 'none'),
+                        help='change_probe for the docs-refresh scenario (default: from config_fal.yml)')
+    parser.add_argument('--docs-redeploy', action='store_true',
+                        help='Give the docs pages new build markup and ETags before docs-refresh')
+    parser.add_argument('--cards', type=int, default=500, help='Cards on each model listing page (default: %(default)s)')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Latency injected per response (default: %(default)s)')
+    parser.add_argument('--page-kb', type=int, default=200, help='Size of each model playground page (default: %(default)s)')
+    parser.add_argument('--server-rate', type=int, default=0,
+                        help='Requests per second the server accepts before answering 429 (default: unlimited)')
+    parser.add_argument('--concurrency-per-host', type=int, default=10,
+                        help='Passed to parse_fal_models.py (default: %(default)s)')
+    parser.add_argument('--report', help='Also write the results as JSON to this file')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch directory with the outputs')
+    parser.add_argument('--verbose', action='store_true', help='Show the output of the tools')
+
+    options = parser.parse_args()
+    unknown = [name for name in options.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    scenarios = list(dict.fromkeys(options.scenarios or SCENARIOS))
+    # A refresh needs a previous run's outputs; build them without reporting them
+    unreported = set()
+    for refresh, initial in (('fal-refresh', 'fal-models'), ('fal-category', 'fal-models'),
+                             ('docs-refresh', 'docs')):
+        if refresh in scenarios and initial not in scenarios:
+            scenarios.insert(scenarios.index(refresh), initial)
+            unreported.add(initial)
+
+    context = multiprocessing.get_context()
+    ready = context.Queue()
+    server = context.Process(target=run_server, args=(options, ready), daemon=True)
+    server.start()
+    base_url = ready.get(timeout=30)
+    workdir = Path(tempfile.mkdtemp(prefix='scraper-bench-'))
+
+    print(f"Stand-in server at {base_url}: {options.models} models, {options.docs_pages} docs pages, "
+          f"{options.latency_ms:g} ms latency, {options.page_kb} KB model pages")
+    results = []
+    try:
+        for scenario in scenarios:
+            print(f"Running {scenario}...")
+            result = run_scenario(context, scenario, base_url, workdir, options)
+            if scenario not in unreported:
+                results.append(result)
+    finally:
+        server.terminate()
+        if options.keep:
+            print(f"Outputs kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+
+    if options.report:
+        with open(options.report, 'w') as f:
+            json.dump({
+                'parameters': {
+                    'models': options.models,
+                    'docs_pages': options.docs_pages,
+                    'docs_rate': options.docs_rate,
+                    'cards': options.cards,
+                    'latency_ms': options.latency_ms,
+                    'page_kb': options.page_kb,
+                    'server_rate': options.server_rate,
+                    'concurrency_per_host': options.concurrency_per_host,
+                },
+                'results': results,
+            }, f, indent=2)
+        print(f"\nReport saved to: {options.report}")
+
+
+if __name__ == '__main__':
+    main()
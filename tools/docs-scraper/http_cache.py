@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+On-disk HTTP response cache shared by the scraping tools
+Used by scraper.py, scrape_models.py and scripts/parse_fal_models.py
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / '.cache' / 'http'
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode for a URL that is not in the cache"""
+
+
+def conditional_headers(validators: Optional[Mapping[str, Optional[str]]]) -> Dict[str, str]:
+    """Build If-None-Match/If-Modified-Since headers from stored validators"""
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('lastModified'):
+            headers['If-Modified-Since'] = validators['lastModified']
+    return headers
+
+
+@dataclass
+class CachedResponse:
+    """A cached response body with the headers needed to revalidate it"""
+
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    stored_at: float
+    complete: bool = True
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get('ETag')
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get('Last-Modified')
+
+    def validators(self) -> Dict[str, Optional[str]]:
+        return {'etag': self.etag, 'lastModified': self.last_modified}
+
+    def matches(self, validators: Optional[Mapping[str, Optional[str]]]) -> bool:
+        """Whether the client's validators identify this exact response"""
+        if not validators:
+            return False
+        if validators.get('etag'):
+            return validators['etag'] == self.etag
+        if validators.get('lastModified'):
+            return validators['lastModified'] == self.last_modified
+        return False
+
+    def encoding(self) -> Optional[str]:
+        content_type = self.headers.get('Content-Type', '')
+        for param in content_type.split(';')[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'charset' and value:
+                return value.strip('"\'')
+        return None
+
+    def text(self) -> str:
+        return self.body.decode(self.encoding() or 'utf-8', errors='replace')
+
+    def to_requests_response(self, status: Optional[int] = None) -> requests.Response:
+        """Wrap the entry in a `requests.Response` for requests-based callers"""
+        response = requests.Response()
+        response.status_code = status or self.status
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = b'' if response.status_code == 304 else self.body
+        response.encoding = self.encoding() or 'utf-8'
+        response.from_cache = True
+        return response
+
+
+class ResponseCache:
+    """Size-bounded on-disk cache of GET responses keyed by URL
+
+    Bodies are stored as files under `path`, metadata in a small SQLite
+    index. An entry younger than the TTL is served without any request;
+    an older one is revalidated with its ETag/Last-Modified, so unchanged
+    resources cost a 304. Once the cache grows past `max_bytes` the least
+    recently used entries are evicted. In `offline` mode every cached entry
+    is replayed regardless of age and missing URLs raise `CacheMiss`.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES, offline: bool = False):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path / 'index.sqlite'), check_same_thread=False)
+        self._db.execute(
+            '''CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                complete INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )'''
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at)')
+        self._db.commit()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.path / 'bodies' / key[:2] / key
+
+    def is_fresh(self, entry: CachedResponse, ttl: Optional[float] = None) -> bool:
+        """Whether an entry may be served without contacting the server"""
+        if self.offline:
+            return True
+        return time.time() - entry.stored_at < (self.ttl if ttl is None else ttl)
+
+    def lookup(self, url: str, allow_partial: bool = False) -> Optional[CachedResponse]:
+        """Return the cached response for `url`, if any
+
+        Partial entries (bodies cut short by a streaming reader that stopped
+        early) are only returned when `allow_partial` is set.
+        """
+        key = self._key(url)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT status, headers, complete, stored_at FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (not row[2] and not allow_partial):
+                return None
+            try:
+                body = self._body_path(key).read_bytes()
+            except FileNotFoundError:
+                self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._db.commit()
+                return None
+            self._db.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self._db.commit()
+
+        status, headers, complete, stored_at = row
+        return CachedResponse(url, status, _decode_headers(headers), body, stored_at, bool(complete))
+
+    def store(self, url: str, status: int, headers: Mapping[str, str], body: bytes,
+              complete: bool = True) -> CachedResponse:
+        """Cache a response body and evict old entries if over the size cap"""
+        kept = {name: headers[name] for name in CACHED_HEADERS if headers.get(name)}
+        key = self._key(url)
+        body_path = self._body_path(key)
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = body_path.with_name(body_path.name + '.tmp')
+        tmp_path.write_bytes(body)
+        os.replace(tmp_path, body_path)
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, status, _encode_headers(kept), len(body), int(complete), now, now),
+            )
+            self._db.commit()
+        self._evict()
+        return CachedResponse(url, status, kept, body, now, complete)
+
+    def revalidated(self, entry: CachedResponse, headers: Mapping[str, str]) -> CachedResponse:
+        """Record a 304 for `entry`: restart its TTL and take updated validators"""
+        for name in CACHED_HEADERS:
+            if headers.get(name):
+                entry.headers[name] = headers[name]
+        entry.stored_at = time.time()
+        with self._lock:
+            self._db.execute(
+                'UPDATE entries SET headers = ?, stored_at = ?, accessed_at = ? WHERE key = ?',
+                (_encode_headers(entry.headers), entry.stored_at, entry.stored_at, self._key(entry.url)),
+            )
+            self._db.commit()
+        return entry
+
+    def _evict(self) -> None:
+        with self._lock:
+            total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            target = self.max_bytes * 0.9
+            rows = self._db.execute('SELECT key, size FROM entries ORDER BY accessed_at').fetchall()
+            for key, size in rows:
+                if total <= target:
+                    break
+                self._body_path(key).unlink(missing_ok=True)
+                self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                total -= size
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _encode_headers(headers: Mapping[str, str]) -> str:
+    return '\n'.join(f'{name}: {value}' for name, value in headers.items())
+
+
+def _decode_headers(text: str) -> Dict[str, str]:
+    headers = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(': ')
+        if name:
+            headers[name] = value
+    return headers
+
+
+def cached_get(session: Any, cache: Optional[ResponseCache], url: str,
+               ttl: Optional[float] = None, **kwargs) -> requests.Response:
+    """`session.get` through the response cache
+
+    Fresh entries are returned without a request; stale ones are
+    revalidated. When the caller sends its own If-None-Match or
+    If-Modified-Since, a matching cached entry is answered with a 304 just
+    like the origin would, and a 304 from the origin is passed through.
+    """
+    if cache is None:
+        return session.get(url, **kwargs)
+
+    request_headers = dict(kwargs.pop('headers', None) or {})
+    caller_validators = {
+        'etag': request_headers.get('If-None-Match'),
+        'lastModified': request_headers.get('If-Modified-Since'),
+    }
+    caller_conditional = any(caller_validators.values())
+
+    entry = cache.lookup(url)
+    if entry is not None and cache.is_fresh(entry, ttl):
+        if caller_conditional and entry.matches(caller_validators):
+            return entry.to_requests_response(status=304)
+        return entry.to_requests_response()
+    if cache.offline:
+        raise CacheMiss(url)
+
+    if entry is not None and not caller_conditional:
+        request_headers.update(conditional_headers(entry.validators()))
+
+    response = session.get(url, headers=request_headers, **kwargs)
+    response.from_cache = False
+
+    if response.status_code == 304 and entry is not None:
+        if not caller_conditional or entry.matches(caller_validators):
+            entry = cache.revalidated(entry, response.headers)
+        if not caller_conditional:
+            return entry.to_requests_response()
+    elif response.status_code == 200:
+        cache.store(url, response.status_code, response.headers, response.content)
+
+    return response
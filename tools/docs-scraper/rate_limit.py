@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Adaptive per-host rate limiting shared by the scraping tools
+Token bucket pacing, AIMD concurrency, Retry-After handling and jittered
+exponential backoff for retries. Used by scraper.py, scrape_models.py and
+scripts/parse_fal_models.py.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+# Statuses worth retrying; the first two mean the server asks us to slow down
+THROTTLE_STATUSES = frozenset({429, 503})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+# Minimum time between two multiplicative decreases, so a burst of 429s
+# from requests that were already in flight only halves the rate once
+DECREASE_COOLDOWN = 1.0
+MIN_RATE = 0.2
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class HostLimiter:
+    """Token bucket plus AIMD concurrency window for a single host
+
+    Successful responses raise the rate and the concurrency window
+    additively; throttling (429/503), server errors and connection failures
+    halve both. A Retry-After pauses the whole host. With `rate` None the
+    host is not paced until it first pushes back; pacing then starts at
+    half the rate observed over the last second.
+    """
+
+    def __init__(self, rate: Optional[float], max_rate: Optional[float], max_concurrency: int,
+                 burst: Optional[float] = None):
+        self.rate = rate
+        self.max_rate = max_rate or float('inf')
+        self.burst = burst or max(1.0, float(max_concurrency))
+        self.tokens = self.burst
+        self.max_concurrency = max_concurrency
+        self.window = float(max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.updated = time.monotonic()
+        self.recent: deque = deque()
+        # Event loop futures of coroutines waiting for a slot to be released
+        self.waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def try_acquire(self, now: float) -> Optional[float]:
+        """Take a slot if allowed and return 0
+
+        Otherwise return how long to wait for a token or the end of a
+        Retry-After pause, or None when the concurrency window is full and
+        only a `release` can free a slot.
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.in_flight >= int(self.window):
+            return None
+        if self.rate is not None:
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            self.tokens -= 1
+        self.in_flight += 1
+        return 0.0
+
+    def cancel(self) -> None:
+        """Free a slot without adapting the limits"""
+        self.in_flight = max(0, self.in_flight - 1)
+
+    def release(self, now: float, overloaded: bool, retry_after: Optional[float]) -> None:
+        self.in_flight = max(0, self.in_flight - 1)
+        self.recent.append(now)
+        while self.recent and now - self.recent[0] > 1.0:
+            self.recent.popleft()
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+        if overloaded:
+            if now - self.last_decrease >= DECREASE_COOLDOWN:
+                current = self.rate if self.rate is not None else float(len(self.recent))
+                self.window = max(1.0, self.window / 2)
+                self.rate = max(MIN_RATE, current / 2)
+                self.tokens = min(self.tokens, 1.0)
+                self.last_decrease = now
+        else:
+            self.window = min(float(self.max_concurrency), self.window + 1 / self.window)
+            if self.rate is not None:
+                self.rate = min(self.max_rate, self.rate + 1 / max(self.rate, 1.0))
+
+
+class RateLimiter:
+    """Per-host scheduler shared by every request a tool makes
+
+    `acquire`/`acquire_async` block until the host has both a token and a
+    free slot in its concurrency window and return the time waited;
+    `release` reports the outcome so the host's limits can adapt, and
+    wakes the requests waiting for a slot instead of having them poll.
+    """
+
+    def __init__(self, rate: Optional[float] = None, max_rate: Optional[float] = None,
+                 max_concurrency: int = 4, burst: Optional[float] = None):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.burst = burst
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], **defaults) -> 'RateLimiter':
+        """Build a limiter from a `rate_limit` block of a site config"""
+        options = {**defaults, **(config or {})}
+        return cls(
+            rate=options.get('rate'),
+            max_rate=options.get('max_rate'),
+            max_concurrency=options.get('max_concurrency', 4),
+            burst=options.get('burst'),
+        )
+
+    def host(self, url: str) -> HostLimiter:
+        netloc = urlparse(url).netloc
+        with self._lock:
+            limiter = self._hosts.get(netloc)
+            if limiter is None:
+                limiter = HostLimiter(self.rate, self.max_rate, self.max_concurrency, self.burst)
+                self._hosts[netloc] = limiter
+            return limiter
+
+    def acquire(self, url: str) -> float:
+        """Block the calling thread until a request to `url` may start"""
+        limiter = self.host(url)
+        start = time.monotonic()
+        with self._released:
+            while True:
+                delay = limiter.try_acquire(time.monotonic())
+                if delay == 0:
+                    return time.monotonic() - start
+                self._released.wait(delay)
+
+    async def acquire_async(self, url: str) -> float:
+        """Wait in the event loop until a request to `url` may start"""
+        limiter = self.host(url)
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        while True:
+            released = None
+            with self._lock:
+                delay = limiter.try_acquire(time.monotonic())
+                if delay == 0:
+                    return time.monotonic() - start
+                if delay is None:
+                    released = loop.create_future()
+                    limiter.waiters.append((loop, released))
+            if released is not None:
+                await released
+            else:
+                await asyncio.sleep(delay)
+
+    def release(self, url: str, status: Optional[int] = None,
+                retry_after: Optional[float] = None) -> None:
+        """Report a finished request; `status` None means it failed to connect"""
+        overloaded = status is None or status in THROTTLE_STATUSES or status >= 500
+        limiter = self.host(url)
+        with self._released:
+            limiter.release(time.monotonic(), overloaded, retry_after)
+            waiters = self._notify(limiter)
+        for loop, released in waiters:
+            loop.call_soon_threadsafe(_wake, released)
+
+    def cancel(self, url: str) -> None:
+        """Give back the slot of a request that was cancelled or failed locally
+
+        Unlike `release`, this says nothing about the host's health, so its
+        rate and concurrency window are left as they are.
+        """
+        limiter = self.host(url)
+        with self._released:
+            limiter.cancel()
+            waiters = self._notify(limiter)
+        for loop, released in waiters:
+            loop.call_soon_threadsafe(_wake, released)
+
+    def _notify(self, limiter: HostLimiter) -> List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]:
+        """Wake waiting threads; returns the coroutine waiters to wake (called under the lock)"""
+        waiters, limiter.waiters = limiter.waiters, []
+        self._released.notify_all()
+        return waiters
+
+    def retry_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry `attempt`, honouring the server's Retry-After"""
+        return retry_after if retry_after is not None else backoff_delay(attempt)
+
+
+def _wake(released: asyncio.Future) -> None:
+    if not released.done():
+        released.set_result(None)
+
+
+class ThrottledSession:
+    """`requests`-style `get`/`head` paced by a `RateLimiter` with retries
+
+    Wraps a `requests.Session` (or the `requests` module). Responses carry
+    `retries` and `queue_wait` attributes for the run metrics.
+    """
+
+    def __init__(self, session: Any, limiter: RateLimiter, max_retries: int = DEFAULT_MAX_RETRIES):
+        self.session = session
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request('HEAD', url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        queue_wait = 0.0
+        attempt = 0
+        while True:
+            queue_wait += self.limiter.acquire(url)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.limiter.release(url, None)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.limiter.retry_delay(attempt)
+            except BaseException:
+                # Redirect loops, bad URLs, broken bodies...: not retried, but the slot is freed
+                self.limiter.cancel(url)
+                raise
+            else:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                self.limiter.release(url, response.status_code, retry_after)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    response.retries = attempt
+                    response.queue_wait = queue_wait
+                    return response
+                delay = self.limiter.retry_delay(attempt, retry_after)
+                response.close()
+            attempt += 1
+            time.sleep(delay)
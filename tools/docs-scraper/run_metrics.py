@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Run metrics and per-request tracing for the scraping tools
+Used by scraper.py, scrape_models.py and scripts/parse_fal_models.py to
+record phase timings and HTTP requests, and to export them as a JSON run
+report or a Prometheus textfile.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+# Number of slowest requests listed in the report summary
+SLOWEST_REQUESTS = 20
+
+
+@dataclass
+class RequestRecord:
+    """One HTTP request as seen by a tool"""
+
+    url: str
+    kind: str
+    start: float = 0.0
+    duration: float = 0.0
+    status: Optional[int] = None
+    bytes: int = 0
+    retries: int = 0
+    queue_wait: float = 0.0
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class RunMetrics:
+    """Collects phase spans, timers, counters and request records for one run
+
+    `phase` records a span in the run timeline (catalog, schemas, write...)
+    while `timer` only aggregates, for work repeated per item such as
+    parsing one page. Every HTTP request goes through `request`. All
+    methods are thread-safe.
+    """
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: List[Dict[str, Any]] = []
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.counters: Counter = Counter()
+        self.requests: List[RequestRecord] = []
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def _add_timing(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self.timings.setdefault(name, {'count': 0, 'seconds': 0.0, 'max': 0.0})
+            timing['count'] += 1
+            timing['seconds'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase of the run and add it to the timeline"""
+        start = self.elapsed()
+        try:
+            yield
+        finally:
+            duration = self.elapsed() - start
+            with self._lock:
+                self.spans.append({'name': name, 'start': start, 'duration': duration})
+            self._add_timing(name, duration)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Time a repeated step; only the aggregate is kept"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_timing(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """Add time measured elsewhere (e.g. a wait) to a timer"""
+        self._add_timing(name, seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    @contextmanager
+    def request(self, url: str, kind: str) -> Iterator[RequestRecord]:
+        """Record one HTTP request; the caller fills in status, bytes, etc."""
+        record = RequestRecord(url=url, kind=kind, start=self.elapsed())
+        try:
+            yield record
+        except BaseException as e:
+            # Requests abandoned by the tool (asyncio cancellation) are not errors
+            record.error = 'cancelled' if type(e).__name__ == 'CancelledError' else type(e).__name__
+            raise
+        finally:
+            record.duration = self.elapsed() - record.start
+            with self._lock:
+                self.requests.append(record)
+
+    def _request_summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            records = list(self.requests)
+        summary: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            entry = summary.setdefault(record.kind, {
+                'count': 0, 'bytes': 0, 'seconds': 0.0, 'retries': 0,
+                'queueWaitSeconds': 0.0, 'cached': 0, 'errors': 0, 'status': Counter(),
+            })
+            entry['count'] += 1
+            entry['bytes'] += record.bytes
+            entry['seconds'] += record.duration
+            entry['retries'] += record.retries
+            entry['queueWaitSeconds'] += record.queue_wait
+            entry['cached'] += record.cached
+            entry['errors'] += record.error not in (None, 'cancelled')
+            entry['status'][str(record.status or record.error or 'none')] += 1
+        for entry in summary.values():
+            entry['status'] = dict(entry['status'])
+        return summary
+
+    def report(self, include_requests: bool = True) -> Dict[str, Any]:
+        """Build the JSON run report"""
+        with self._lock:
+            requests = list(self.requests)
+            report = {
+                'tool': self.tool,
+                'startedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started_at)),
+                'wallSeconds': self.elapsed(),
+                'phases': list(self.spans),
+                'timings': {name: dict(timing) for name, timing in self.timings.items()},
+                'counters': dict(self.counters),
+            }
+        report['requests'] = self._request_summary()
+        report['hosts'] = dict(Counter(urlparse(record.url).netloc for record in requests))
+        slowest = sorted(requests, key=lambda record: record.duration, reverse=True)[:SLOWEST_REQUESTS]
+        report['slowestRequests'] = [asdict(record) for record in slowest]
+        if include_requests:
+            report['trace'] = [asdict(record) for record in requests]
+        return report
+
+    def write_report(self, path: Path, include_requests: bool = True) -> None:
+        """Write the JSON run report"""
+        _write_atomic(Path(path), json.dumps(self.report(include_requests), indent=2) + '\n')
+
+    def prometheus_text(self) -> str:
+        """Render the run in the Prometheus text exposition format"""
+        tool = _label(self.tool)
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[str]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        metric('scraper_run_timestamp_seconds', 'gauge', 'Start time of the last run.',
+               [f'scraper_run_timestamp_seconds{{tool="{tool}"}} {self.started_at:.3f}'])
+        metric('scraper_run_duration_seconds', 'gauge', 'Wall time of the last run.',
+               [f'scraper_run_duration_seconds{{tool="{tool}"}} {self.elapsed():.6f}'])
+
+        with self._lock:
+            timings = sorted(self.timings.items())
+            counters = sorted(self.counters.items())
+        metric('scraper_phase_seconds', 'gauge', 'Total time spent per phase or step.',
+               [f'scraper_phase_seconds{{tool="{tool}",phase="{_label(name)}"}} {timing["seconds"]:.6f}'
+                for name, timing in timings])
+        metric('scraper_phase_count', 'gauge', 'Number of times each phase or step ran.',
+               [f'scraper_phase_count{{tool="{tool}",phase="{_label(name)}"}} {timing["count"]}'
+                for name, timing in timings])
+        metric('scraper_events_total', 'counter', 'Events counted during the run.',
+               [f'scraper_events_total{{tool="{tool}",event="{_label(name)}"}} {value}'
+                for name, value in counters])
+
+        summary = sorted(self._request_summary().items())
+        metric('scraper_requests_total', 'counter', 'HTTP requests by kind and status.',
+               [f'scraper_requests_total{{tool="{tool}",kind="{_label(kind)}",status="{_label(status)}"}} {n}'
+                for kind, entry in summary for status, n in sorted(entry['status'].items())])
+        for name, key, help_text in (
+            ('scraper_response_bytes_total', 'bytes', 'Response body bytes received.'),
+            ('scraper_request_seconds_total', 'seconds', 'Time spent in HTTP requests.'),
+            ('scraper_request_retries_total', 'retries', 'Retried HTTP requests.'),
+            ('scraper_queue_wait_seconds_total', 'queueWaitSeconds', 'Time requests waited for a connection.'),
+            ('scraper_cache_hits_total', 'cached', 'Responses served from the HTTP cache.'),
+        ):
+            metric(name, 'counter', help_text,
+                   [f'{name}{{tool="{tool}",kind="{_label(kind)}"}} {entry[key]}' for kind, entry in summary])
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: Path) -> None:
+        """Write a Prometheus textfile (for node_exporter's textfile collector)"""
+        _write_atomic(Path(path), self.prometheus_text())
+
+    def summary_lines(self) -> List[str]:
+        """Short human-readable breakdown of where the run spent its time"""
+        lines = [f"Run metrics ({self.elapsed():.1f}s total):"]
+        with self._lock:
+            spans = list(self.spans)
+            timings = dict(self.timings)
+        span_names = {span['name'] for span in spans}
+        for span in spans:
+            lines.append(f"  {span['name']}: {span['duration']:.2f}s")
+        for name, timing in sorted(timings.items()):
+            if name not in span_names:
+                lines.append(f"  {name}: {timing['seconds']:.2f}s over {timing['count']} calls")
+        for kind, entry in sorted(self._request_summary().items()):
+            lines.append(
+                f"  {kind} requests: {entry['count']} ({entry['bytes'] / 1024 / 1024:.1f} MB, "
+                f"{entry['cached']} cached, {entry['errors']} errors, "
+                f"{entry['queueWaitSeconds']:.2f}s queued)"
+            )
+        return lines
+
+    def export(self, report_path: Optional[Path] = None, textfile_path: Optional[Path] = None) -> None:
+        """Print the summary and write whichever exports were requested"""
+        print('\n' + '\n'.join(self.summary_lines()))
+        if report_path:
+            self.write_report(report_path)
+            print(f"Metrics report saved to: {report_path}")
+        if textfile_path:
+            self.write_textfile(textfile_path)
+            print(f"Prometheus textfile saved to: {textfile_path}")
+
+
+def _label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
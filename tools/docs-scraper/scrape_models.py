@@ -8,114 +8,201 @@ import argparse
 import json
 import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 
+from http_cache import DEFAULT_CACHE_DIR, ResponseCache, cached_get
+from rate_limit import RateLimiter, ThrottledSession
+from run_metrics import RunMetrics
 
-def scrape_runware_models() -> List[Dict]:
+# Catalog pages change often; reuse cached copies for an hour
+MODELS_CACHE_TTL = 3600
+
+RUNWARE_MODELS_URL = "https://runware.ai/models"
+FAL_MODELS_URL = "https://fal.ai/explore/search"
+
+# String types that Tag.get_text() returns (not comments, scripts or styles)
+TEXT_TYPES = (NavigableString, CData)
+
+METRICS = RunMetrics('scrape_models')
+HTTP = ThrottledSession(requests, RateLimiter(max_concurrency=1))
+
+
+def fetch_listing(url: str, cache: Optional[ResponseCache], kind: str) -> requests.Response:
+    """GET a model listing page through the cache and record the request."""
+    with METRICS.request(url, kind) as record:
+        response = cached_get(HTTP, cache, url, ttl=MODELS_CACHE_TTL, headers={
+            'User-Agent': 'Mozilla/5.0 (compatible; DocsScraper/1.0)'
+        })
+        record.status = response.status_code
+        record.cached = getattr(response, 'from_cache', False)
+        record.retries = getattr(response, 'retries', 0)
+        record.queue_wait = getattr(response, 'queue_wait', 0.0)
+        if not record.cached:
+            record.bytes = len(response.content)
+    response.raise_for_status()
+    return response
+
+
+def scrape_runware_models(cache: Optional[ResponseCache] = None) -> List[Dict]:
     """Scrape Runware.ai featured models."""
     print("Scraping Runware.ai models...")
     
-    url = "https://runware.ai/models"
-    response = requests.get(url, headers={
-        'User-Agent': 'Mozilla/5.0 (compatible; DocsScraper/1.0)'
-    })
-    response.raise_for_status()
+    response = fetch_listing(RUNWARE_MODELS_URL, cache, 'runware')
     
-    soup = BeautifulSoup(response.content, 'html.parser')
-    models = []
+    with METRICS.timer('runware_parse'):
+        return _parse_runware_models(response.content)
+
+
+def _parse_runware_models(content: bytes) -> List[Dict]:
+    """Extract model cards from the Runware.ai models page.
     
-    model_cards = soup.find_all('div', recursive=True)
+    A card is the outermost <div> around a model id <code> that holds no
+    other model id. Cards are found in one pass over the <code> tags and
+    their ancestors, and each card's fields are read from its own subtree
+    only, so the work grows linearly with the page. A model listed in
+    several sections is kept once.
+    """
+    soup = BeautifulSoup(content, 'lxml')
     
-    for card in model_cards:
-        code_tag = card.find('code')
-        if not code_tag:
-            continue
-        
+    # Model id owning each <div> (keyed by id()), or None if it holds several
+    owners: Dict[int, Optional[str]] = {}
+    codes = []
+    for code_tag in soup.find_all('code'):
         model_id = code_tag.get_text().strip()
-        if not model_id or ':' not in model_id:
+        if ':' not in model_id:
             continue
-        
-        img = card.find('img')
-        links = card.find_all('a')
-        divs = card.find_all('div')
-        
-        name = None
-        description = None
-        category = None
-        usage_count = None
-        
-        for div in divs:
-            text = div.get_text().strip()
-            if text and len(text) > 10 and text not in ['Checkpoint', 'LoRA', 'IP-Adapter']:
-                if 'Checkpoint' in text or 'LoRA' in text:
-                    parts = text.split('\n')
-                    if len(parts) >= 2:
-                        category_usage = parts[0]
-                        if 'Checkpoint' in category_usage:
-                            category = 'Checkpoint'
-                            usage_count = category_usage.replace('Checkpoint', '').strip()
-                        elif 'LoRA' in category_usage:
-                            category = 'LoRA'
-                            usage_count = category_usage.replace('LoRA', '').strip()
-                        
-                        rest = '\n'.join(parts[1:])
-                        for i, char in enumerate(rest):
-                            if char.isupper() and i > 0 and rest[i-1].islower():
-                                name = rest[:i]
-                                description = rest[i:]
-                                break
-                        if not name:
-                            name = rest[:50] if len(rest) > 50 else rest
-                            description = rest
-        
-        if model_id and name:
-            models.append({
-                'model_id': model_id,
-                'name': name.strip(),
-                'description': description.strip() if description else '',
-                'category': category or 'Unknown',
-                'usage_count': usage_count or '0',
-                'image_url': img['src'] if img and img.get('src') else None,
-                'playground_url': links[0]['href'] if links and links[0].get('href') else None
-            })
+        codes.append((model_id, code_tag))
+        for div in code_tag.find_parents('div'):
+            key = id(div)
+            if owners.setdefault(key, model_id) != model_id:
+                owners[key] = None
+    
+    models: Dict[str, Dict] = {}
+    for model_id, code_tag in codes:
+        if model_id in models:
+            continue
+        card = None
+        for div in code_tag.find_parents('div'):
+            if owners[id(div)] != model_id:
+                break
+            card = div
+        if card is not None:
+            model = _runware_card(card, model_id)
+            if model:
+                models[model_id] = model
     
     print(f"Found {len(models)} Runware models")
-    return models
+    return list(models.values())
+
+
+def _div_texts(root: Tag) -> List[Tuple[Tag, str]]:
+    """Every <div> under `root` with its text, as `div.get_text()` returns it.
+    
+    The subtree is walked once, collecting its strings in document order
+    and the span of strings each <div> covers, so nested <div>s are not
+    traversed again for their text.
+    """
+    strings: List[str] = []
+    spans: List[list] = []
+    stack: list = list(reversed(root.contents))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, int):
+            spans[node][2] = len(strings)
+        elif isinstance(node, Tag):
+            if node.name == 'div':
+                spans.append([node, len(strings), None])
+                stack.append(len(spans) - 1)
+            stack.extend(reversed(node.contents))
+        elif type(node) in TEXT_TYPES:
+            strings.append(str(node))
+    return [(div, ''.join(strings[start:end])) for div, start, end in spans]
 
 
-def scrape_fal_models() -> List[Dict]:
+def _runware_card(card, model_id: str) -> Optional[Dict]:
+    """Read the fields of one Runware model card."""
+    img = card.find('img')
+    link = card.find('a')
+    
+    name = None
+    description = None
+    category = None
+    usage_count = None
+    
+    for _, text in _div_texts(card):
+        text = text.strip()
+        if text and len(text) > 10 and text not in ['Checkpoint', 'LoRA', 'IP-Adapter']:
+            if 'Checkpoint' in text or 'LoRA' in text:
+                parts = text.split('\n')
+                if len(parts) >= 2:
+                    category_usage = parts[0]
+                    if 'Checkpoint' in category_usage:
+                        category = 'Checkpoint'
+                        usage_count = category_usage.replace('Checkpoint', '').strip()
+                    elif 'LoRA' in category_usage:
+                        category = 'LoRA'
+                        usage_count = category_usage.replace('LoRA', '').strip()
+                    
+                    rest = '\n'.join(parts[1:])
+                    for i, char in enumerate(rest):
+                        if char.isupper() and i > 0 and rest[i-1].islower():
+                            name = rest[:i]
+                            description = rest[i:]
+                            break
+                    if not name:
+                        name = rest[:50] if len(rest) > 50 else rest
+                        description = rest
+    
+    if not name:
+        return None
+    return {
+        'model_id': model_id,
+        'name': name.strip(),
+        'description': description.strip() if description else '',
+        'category': category or 'Unknown',
+        'usage_count': usage_count or '0',
+        'image_url': img['src'] if img and img.get('src') else None,
+        'playground_url': link['href'] if link and link.get('href') else None
+    }
+
+
+def scrape_fal_models(cache: Optional[ResponseCache] = None) -> List[Dict]:
     """Scrape Fal.ai trending models."""
     print("Scraping Fal.ai models...")
     
-    url = "https://fal.ai/explore/search"
-    response = requests.get(url, headers={
-        'User-Agent': 'Mozilla/5.0 (compatible; DocsScraper/1.0)'
-    })
-    response.raise_for_status()
+    response = fetch_listing(FAL_MODELS_URL, cache, 'fal')
     
-    soup = BeautifulSoup(response.content, 'html.parser')
-    models = []
+    with METRICS.timer('fal_parse'):
+        return _parse_fal_models(response.content)
+
+
+def _parse_fal_models(content: bytes) -> List[Dict]:
+    """Extract model cards from the Fal.ai explore page.
     
-    model_links = soup.find_all('a', href=lambda x: x and x.startswith('/models/'))
+    Every `/models/...` link is a card. Its subtree is walked once for the
+    text of all its <div>s (see `_div_texts`), which give the name,
+    category, description and tags; a model linked from several sections
+    (trending, category rows) is kept once.
+    """
+    soup = BeautifulSoup(content, 'lxml')
+    models: Dict[str, Dict] = {}
     
-    for link in model_links:
-        href = link.get('href', '')
-        if not href.startswith('/models/'):
-            continue
-        
+    for link in soup.find_all('a', href=lambda x: x and x.startswith('/models/')):
+        href = link['href']
         model_id = href.replace('/models/', '')
+        if not model_id or model_id in models:
+            continue
         
-        divs = link.find_all('div')
         name = None
         category = None
         description = None
         tags = []
         
-        for div in divs:
-            text = div.get_text().strip()
+        for div, text in _div_texts(link):
+            text = text.strip()
             
             if not name and text and '/' in text:
                 name = text.split('\n')[0].strip()
@@ -123,19 +210,16 @@ def scrape_fal_models() -> List[Dict]:
             if 'image-to-image' in text or 'text-to-image' in text or 'image-to-video' in text:
                 category = text.strip()
             
+            if 'tag' in ' '.join(div.get('class', [])).lower() and text and len(text) < 30:
+                tags.append(text)
+            
             if len(text) > 50 and not category or text == category:
                 continue
             elif len(text) > 50:
                 description = text
         
-        small_divs = link.find_all('div', class_=lambda x: x and 'tag' in str(x).lower())
-        for div in small_divs:
-            tag_text = div.get_text().strip()
-            if tag_text and len(tag_text) < 30:
-                tags.append(tag_text)
-        
-        if model_id and name:
-            models.append({
+        if name:
+            models[model_id] = {
                 'model_id': model_id,
                 'name': name,
                 'description': description or '',
@@ -143,10 +227,10 @@ def scrape_fal_models() -> List[Dict]:
                 'tags': tags,
                 'url': f"https://fal.ai{href}",
                 'openapi_url': f"https://fal.ai/api/openapi/queue/openapi.json?endpoint_id={model_id}"
-            })
+            }
     
     print(f"Found {len(models)} Fal models")
-    return models
+    return list(models.values())
 
 
 def save_models_markdown(models: List[Dict], site: str, output_dir: Path):
@@ -237,18 +321,49 @@ def main():
         default='/home/ubuntu/repos/videosos/docs',
         help='Output directory for model files'
     )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Bypass the shared on-disk HTTP cache'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=str(DEFAULT_CACHE_DIR),
+        help='HTTP cache directory'
+    )
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        help='Replay responses from the HTTP cache only'
+    )
+    parser.add_argument(
+        '--metrics-report',
+        help='Write a JSON run report with phase timings and a per-request trace'
+    )
+    parser.add_argument(
+        '--metrics-textfile',
+        help='Write run metrics in Prometheus textfile format'
+    )
     
     args = parser.parse_args()
     
     output_dir = Path(args.output_dir)
+    cache = None
+    if args.offline or not args.no_cache:
+        cache = ResponseCache(Path(args.cache_dir), offline=args.offline)
     
-    if args.site in ['runware', 'all']:
-        models = scrape_runware_models()
-        save_models_markdown(models, 'runware', output_dir / 'runware' / 'models')
-    
-    if args.site in ['fal', 'all']:
-        models = scrape_fal_models()
-        save_models_markdown(models, 'fal', output_dir / 'fal' / 'models')
+    try:
+        if args.site in ['runware', 'all']:
+            with METRICS.phase('runware'):
+                models = scrape_runware_models(cache)
+                save_models_markdown(models, 'runware', output_dir / 'runware' / 'models')
+        
+        if args.site in ['fal', 'all']:
+            with METRICS.phase('fal'):
+                models = scrape_fal_models(cache)
+                save_models_markdown(models, 'fal', output_dir / 'fal' / 'models')
+    finally:
+        METRICS.export(args.metrics_report, args.metrics_textfile)
 
 
 if __name__ == '__main__':
@@ -6,35 +6,154 @@ with support for incremental updates.
 """
 
 import argparse
+import gzip
+import io
 import json
+import multiprocessing
 import os
 import re
 import sys
 import time
 import hashlib
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from urllib.parse import urljoin, urlparse
 
+import lxml.etree
+import lxml.html
 import requests
 import yaml
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Comment, Tag
 from markdownify import markdownify as md
 
+from http_cache import DEFAULT_CACHE_DIR, CacheMiss, ResponseCache, cached_get, conditional_headers
+from rate_limit import RateLimiter, ThrottledSession
+from run_metrics import RunMetrics
+from search_index import Document, SearchIndex, markdown_text
+
+# Rendered pages written to disk per batch
+WRITE_BATCH_SIZE = 32
+
+# Journal records after which the manifest is rewritten and the journal reset
+MANIFEST_COMPACT_EVERY = 1000
+
+# How unchanged pages are detected before downloading them (`change_probe`)
+CHANGE_PROBES = ('conditional', 'head', 'none')
+
+# Attributes that are part of a page's content. Everything else (classes,
+# ids, data-* and inline styles) changes with every build of the site and is
+# left out of the content hash.
+CONTENT_ATTRIBUTES = ('href', 'src', 'alt', 'title')
+
+# Elements removed from the extracted content
+STRIPPED_ELEMENTS = 'script, style, nav, header, footer, .search, button[aria-label*="Copy"]'
+
+# Leading type selector of a content_selector, when the rest of the
+# selector only looks inside that element (no sibling combinators or
+# pseudo-classes on it), so only those elements need a BeautifulSoup tree
+_LEADING_TYPE = re.compile(r'^\s*([a-zA-Z][\w-]*)(?=\s*>|\s+[^\s+~]|\s*$)')
+
+# Markdown links (not images): [text](target "title"); the text may hold one
+# level of brackets, e.g. a linked image [![alt](src)](target)
+_MARKDOWN_LINK = re.compile(r'((?<!!)\[(?:[^\[\]]|\[[^\[\]]*\])*\]\()([^()\s]+)((?:\s+"[^"]*")?\))')
+
+# Scraper instance used by render worker processes
+_render_scraper = None
+
+
+def _init_render_worker(config_path: str, repo_root: str):
+    """Set up the scraper used by a render worker process."""
+    global _render_scraper
+    _render_scraper = DocsScraper(config_path, repo_root)
+    _render_scraper.build_link_index()
+
+
+def _iter_sitemap(content: bytes) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """Stream the entries of a sitemap or sitemap index, gzipped or not.
+    
+    Yields ('url' or 'sitemap', loc, lastmod). Entries are cleared once read,
+    so memory use does not grow with the number of URLs.
+    """
+    stream = io.BytesIO(content)
+    if content[:2] == b'\x1f\x8b':
+        stream = gzip.GzipFile(fileobj=stream)
+    
+    for _, element in lxml.etree.iterparse(stream, events=('end',), tag=('{*}url', '{*}sitemap'),
+                                           resolve_entities=False):
+        fields = {}
+        for child in element:
+            if isinstance(child.tag, str) and child.text:
+                fields[lxml.etree.QName(child).localname] = child.text.strip()
+        kind = lxml.etree.QName(element).localname
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+        if fields.get('loc'):
+            yield kind, fields['loc'], fields.get('lastmod')
+
+
+def _render_page(html: str, url: str,
+                 previous_hash: Optional[str]) -> Tuple[str, Optional[str], str, List[str], float]:
+    """Render a page in a worker; returns `render_page`'s result and CPU seconds."""
+    start = time.perf_counter()
+    title, markdown, content_hash, links = _render_scraper.render_page(html, url, previous_hash)
+    return title, markdown, content_hash, links, time.perf_counter() - start
+
 
 class DocsScraper:
     """Main documentation scraper class."""
     
-    def __init__(self, config_path: str, repo_root: str = None):
+    def __init__(self, config_path: str, repo_root: str = None,
+                 cache: Optional[ResponseCache] = None,
+                 metrics: Optional[RunMetrics] = None):
         """Initialize scraper with configuration."""
+        self.config_path = config_path
         self.config = self._load_config(config_path)
+        self.cache = cache
+        self.metrics = metrics or RunMetrics('docs-scraper')
         self.repo_root = Path(repo_root or os.getcwd())
         self.manifest_path = self.repo_root / self.config['manifest_file']
+        self.journal_path = self.manifest_path.with_suffix('.journal.jsonl')
+        # Run recorded in the journal (URLs, force, lastmods) and its finished URLs
+        self.journal_run: Optional[Dict] = None
+        self.journal_done: Set[str] = set()
+        self._journal_buffer: List[Dict] = []
+        self._journal_records = 0
         self.manifest = self._load_manifest()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (compatible; DocsScraper/1.0)'
         })
+        self.limiter = RateLimiter.from_config(self.config.get('rate_limit'))
+        self.http = ThrottledSession(self.session, self.limiter)
+        self.content_roots = self._content_roots()
+        # <lastmod> of each page from the last sitemap discovery
+        self.sitemap_lastmod: Dict[str, str] = {}
+        pattern = self.config.get('internal_link_pattern')
+        self.internal_link = re.compile(pattern) if pattern else None
+        # Local file of every known page by link key, and page URL by saved path
+        self.link_index: Optional[Dict[str, Path]] = None
+        self.page_urls: Dict[str, str] = {}
+    
+    def _get(self, url: str, kind: str = 'page', ttl: Optional[float] = None, **kwargs) -> requests.Response:
+        """GET through the shared HTTP cache.
+        
+        Cached responses are revalidated with the origin unless they are
+        younger than `ttl`, which defaults to the site's `cache_ttl` (0,
+        i.e. always revalidate, when not configured).
+        """
+        if ttl is None:
+            ttl = self.config.get('cache_ttl', 0)
+        with self.metrics.request(url, kind) as record:
+            response = cached_get(self.http, self.cache, url, ttl=ttl, **kwargs)
+            record.status = response.status_code
+            record.cached = getattr(response, 'from_cache', False)
+            record.retries = getattr(response, 'retries', 0)
+            record.queue_wait = getattr(response, 'queue_wait', 0.0)
+            if not record.cached:
+                record.bytes = len(response.content)
+            return response
         
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from YAML file."""
@@ -42,28 +161,130 @@ class DocsScraper:
             return yaml.safe_load(f)
     
     def _load_manifest(self) -> Dict:
-        """Load manifest file or create new one."""
+        """Load manifest file or create new one, then replay the journal."""
         if self.manifest_path.exists():
             with open(self.manifest_path, 'r') as f:
-                return json.load(f)
-        return {
-            'urls': {},
-            'last_updated': None
-        }
+                manifest = json.load(f)
+        else:
+            manifest = {
+                'urls': {},
+                'last_updated': None
+            }
+        self._replay_journal(manifest)
+        return manifest
+    
+    def _replay_journal(self, manifest: Dict):
+        """Apply manifest updates journaled by a run that did not finish.
+        
+        The journal holds one JSON record per line: a `run` header with the
+        run's URLs, then one record per finished URL, with its new manifest
+        entry if it changed. A line torn by a crash is ignored.
+        """
+        if not self.journal_path.exists():
+            return
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if 'run' in record:
+                    self.journal_run = record['run']
+                    self.journal_done = set()
+                    if 'sitemaps' in record['run']:
+                        manifest['sitemaps'] = record['run']['sitemaps']
+                    continue
+                if 'entry' in record:
+                    manifest['urls'][record['url']] = record['entry']
+                self.journal_done.add(record['url'])
+    
+    def _journal(self, url: str, entry: Optional[Dict] = None):
+        """Record a finished URL (and its manifest entry, if updated) for the journal."""
+        record = {'url': url}
+        if entry is not None:
+            self.manifest['urls'][url] = entry
+            record['entry'] = entry
+        self._journal_buffer.append(record)
+        self.journal_done.add(url)
+        if len(self._journal_buffer) >= WRITE_BATCH_SIZE:
+            self._flush_journal()
     
-    def _save_manifest(self):
-        """Save manifest to file."""
+    def _flush_journal(self):
+        """Append buffered records to the journal and sync it to disk."""
+        if not self._journal_buffer:
+            return
+        self._write_journal(self.journal_path, self._journal_buffer, 'a')
+        self._journal_records += len(self._journal_buffer)
+        self._journal_buffer.clear()
+        if self._journal_records >= MANIFEST_COMPACT_EVERY:
+            self.save_manifest()
+    
+    def _write_journal(self, path: Path, records: List[Dict], mode: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, mode) as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _start_journal(self, run: Dict):
+        """Compact any previous journal and start one for a new run."""
+        self.journal_run = run
+        self.journal_done = set()
+        self.save_manifest()
+    
+    def save_manifest(self):
+        """Save manifest to file.
+        
+        The manifest is replaced atomically; then the journal, whose updates
+        it now contains, is reset to the current run's header and finished
+        URLs, or removed when no run is in progress.
+        """
         self.manifest['last_updated'] = time.strftime('%Y-%m-%d %H:%M:%S')
         self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.manifest_path, 'w') as f:
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
             json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        
+        if self.journal_run is None:
+            self.journal_path.unlink(missing_ok=True)
+        else:
+            records = [{'run': self.journal_run}] + [{'url': url} for url in sorted(self.journal_done)]
+            tmp_path = self.journal_path.with_name(self.journal_path.name + '.tmp')
+            self._write_journal(tmp_path, records, 'w')
+            os.replace(tmp_path, self.journal_path)
+        self._journal_buffer.clear()
+        self._journal_records = 0
     
     def _compute_hash(self, content: str) -> str:
         """Compute SHA256 hash of content."""
         return hashlib.sha256(content.encode()).hexdigest()
     
+    def content_hash(self, content_data: Dict) -> str:
+        """Hash the extracted content of a page, normalized so that only edits count.
+        
+        Covers the title, the element structure, the attributes in
+        CONTENT_ATTRIBUTES and the text with whitespace collapsed (except
+        inside <pre>). Build IDs, nonces, class names and comments that
+        change on every deploy of the site do not affect it.
+        """
+        content = content_data['content']
+        preformatted = {id(text) for pre in content.find_all('pre') for text in pre.find_all(string=True)}
+        parts = [content_data['title']]
+        for node in content.descendants:
+            if isinstance(node, Tag):
+                attrs = ' '.join(f'{name}="{node[name]}"' for name in CONTENT_ATTRIBUTES if node.has_attr(name))
+                parts.append(f'<{node.name} {attrs}>')
+            elif not isinstance(node, Comment):
+                text = str(node) if id(node) in preformatted else ' '.join(node.split())
+                if text:
+                    parts.append(text)
+        return self._compute_hash('\n'.join(parts))
+    
     def _should_update(self, url: str, etag: str = None, 
-                      last_modified: str = None, content_hash: str = None) -> bool:
+                      last_modified: str = None, content_hash: str = None,
+                      content_length: str = None) -> bool:
         """Check if URL should be updated based on manifest."""
         if url not in self.manifest['urls']:
             return True
@@ -81,43 +302,108 @@ class DocsScraper:
         if content_hash and entry.get('content_hash') != content_hash:
             return True
         
+        if content_length and entry.get('content_length') != content_length:
+            return True
+        
         return False
     
-    def discover_urls(self) -> List[str]:
+    def _saved_entry(self, url: str) -> Optional[Dict]:
+        """Manifest entry of a page whose saved file still exists."""
+        entry = self.manifest['urls'].get(url)
+        if not entry or not entry.get('filepath') or not self._saved_path(entry).exists():
+            return None
+        return entry
+    
+    def _lastmod_unchanged(self, url: str) -> bool:
+        """Whether the sitemap's <lastmod> for a saved page is the one recorded last time."""
+        if not self.config.get('check_sitemap_lastmod'):
+            return False
+        lastmod = self.sitemap_lastmod.get(url)
+        entry = self._saved_entry(url)
+        return bool(lastmod and entry and entry.get('lastmod') == lastmod)
+    
+    def _validator_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match/If-Modified-Since from the manifest entry of a saved page."""
+        entry = self._saved_entry(url)
+        if not entry:
+            return {}
+        return conditional_headers({
+            'etag': entry.get('etag') if self.config.get('check_etag') else None,
+            'lastModified': entry.get('last_modified') if self.config.get('check_last_modified') else None,
+        })
+    
+    def discover_urls(self, force: bool = False) -> List[str]:
         """Discover all documentation URLs based on discovery method."""
         method = self.config['discovery_method']
         
         if method == 'sitemap':
-            return self._discover_from_sitemap()
+            return self._discover_from_sitemap(force)
         elif method == 'sidebar':
             return self._discover_from_sidebar()
         else:
             raise ValueError(f"Unknown discovery method: {method}")
     
-    def _discover_from_sitemap(self) -> List[str]:
-        """Discover URLs from sitemap."""
-        print(f"Fetching sitemap from {self.config['sitemap_url']}")
-        response = self.session.get(self.config['sitemap_url'])
-        response.raise_for_status()
+    def _discover_from_sitemap(self, force: bool = False) -> List[str]:
+        """Discover URLs from sitemap.
         
-        soup = BeautifulSoup(response.content, 'xml')
-        urls = []
+        Sitemap indexes are followed recursively and gzipped sitemaps are
+        decompressed; each page's <lastmod> is kept in `sitemap_lastmod`.
+        A child sitemap whose <lastmod> in the index is unchanged since the
+        last run is not fetched again: its URLs come from the manifest.
+        """
+        print(f"Fetching sitemap from {self.config['sitemap_url']}")
+        sitemaps: Dict[str, Dict] = {}
+        urls = {}
         
-        for loc in soup.find_all('loc'):
-            url = loc.text.strip()
-            if self.config.get('locale_filter'):
-                if self.config['locale_filter'] in url:
-                    urls.append(url)
-            else:
-                urls.append(url)
+        for url, lastmod in self._read_sitemap(self.config['sitemap_url'], sitemaps, set(), force):
+            if self.config.get('locale_filter') and self.config['locale_filter'] not in url:
+                continue
+            urls[url] = None
+            if lastmod:
+                self.sitemap_lastmod[url] = lastmod
         
+        self.manifest['sitemaps'] = sitemaps
         print(f"Found {len(urls)} URLs in sitemap")
-        return urls
+        return list(urls)
+    
+    def _read_sitemap(self, sitemap_url: str, sitemaps: Dict[str, Dict], visited: Set[str],
+                      force: bool) -> Iterator[Tuple[str, Optional[str]]]:
+        """Yield (url, lastmod) for every page under a sitemap or sitemap index."""
+        if sitemap_url in visited:
+            return
+        visited.add(sitemap_url)
+        
+        response = self._get(sitemap_url, kind='discovery', ttl=0)
+        response.raise_for_status()
+        
+        known_sitemaps = self.manifest.get('sitemaps', {})
+        for kind, loc, lastmod in _iter_sitemap(response.content):
+            if kind == 'url':
+                yield loc, lastmod
+                continue
+            
+            known = known_sitemaps.get(loc)
+            if (not force and lastmod and known and known.get('lastmod') == lastmod
+                    and self.config.get('check_sitemap_lastmod')):
+                self.metrics.count('sitemaps_unchanged')
+                sitemaps[loc] = known
+                yield from known['urls'].items()
+                continue
+            
+            pages = {}
+            try:
+                for page, page_lastmod in self._read_sitemap(loc, sitemaps, visited, force):
+                    pages[page] = page_lastmod
+                    yield page, page_lastmod
+            except Exception as e:
+                print(f"Error reading sitemap {loc}: {e}")
+                continue
+            sitemaps[loc] = {'lastmod': lastmod, 'urls': pages}
     
     def _discover_from_sidebar(self) -> List[str]:
         """Discover URLs from sidebar navigation."""
         print(f"Fetching sidebar from {self.config['docs_base_url']}")
-        response = self.session.get(self.config['docs_base_url'])
+        response = self._get(self.config['docs_base_url'], kind='discovery', ttl=0)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -145,28 +431,114 @@ class DocsScraper:
         print(f"Found {len(urls)} URLs in sidebar")
         return list(set(urls))
     
-    def fetch_page(self, url: str) -> Tuple[Optional[str], Dict]:
-        """Fetch page content and metadata."""
+    def fetch_page(self, url: str, conditional: bool = False) -> Tuple[Optional[str], Dict]:
+        """Fetch page content and metadata.
+        
+        With `conditional`, the request carries the validators stored in the
+        manifest; a 304 returns no content and `{'not_modified': True}`.
+        Cached copies are always revalidated with the origin, so a page
+        changed since the last run is never missed.
+        """
         print(f"Fetching: {url}")
         
         try:
-            response = self.session.get(url, timeout=30)
+            headers = self._validator_headers(url) if conditional else {}
+            response = self._get(url, ttl=0, headers=headers, timeout=30)
+            if response.status_code == 304:
+                return None, {'not_modified': True}
             response.raise_for_status()
             
             metadata = {
                 'etag': response.headers.get('ETag'),
                 'last_modified': response.headers.get('Last-Modified'),
-                'content_hash': self._compute_hash(response.text)
+                'content_length': response.headers.get('Content-Length')
             }
             
             return response.text, metadata
+        except CacheMiss as e:
+            print(f"Not in cache (offline): {e}")
+            return None, {}
         except Exception as e:
             print(f"Error fetching {url}: {e}")
             return None, {}
     
+    def probe_page(self, url: str) -> bool:
+        """HEAD a saved page; True if its headers match the manifest entry.
+        
+        For sites that ignore conditional requests. Compares ETag,
+        Last-Modified and Content-Length; a page without any of them counts
+        as changed.
+        """
+        entry = self._saved_entry(url)
+        if not entry or not (self._validator_headers(url) or entry.get('content_length')):
+            return False
+        
+        try:
+            with self.metrics.request(url, 'probe') as record:
+                response = self.http.head(url, timeout=30, allow_redirects=True)
+                record.status = response.status_code
+                record.retries = getattr(response, 'retries', 0)
+                record.queue_wait = getattr(response, 'queue_wait', 0.0)
+        except Exception as e:
+            print(f"Error probing {url}: {e}")
+            return False
+        
+        if response.status_code != 200:
+            return False
+        probed = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_length': response.headers.get('Content-Length')
+        }
+        if not any(probed.values()):
+            return False
+        return not self._should_update(url, **probed)
+    
+    def _content_roots(self) -> Optional[Set[str]]:
+        """Elements whose subtrees hold everything extract_content reads, if known."""
+        roots = {'h1', 'title'}
+        for selector in self.config.get('content_selector', 'main').split(','):
+            match = _LEADING_TYPE.match(selector)
+            if not match:
+                return None
+            roots.add(match.group(1).lower())
+        return roots
+    
+    def _parse_content(self, html: str) -> BeautifulSoup:
+        """Parse the parts of a page that extract_content reads.
+        
+        lxml parses the page in C; only the subtrees rooted at
+        `content_roots` are serialized and built into a BeautifulSoup tree,
+        in document order. Falls back to parsing everything when the
+        content selector has no usable leading element.
+        """
+        roots = self.content_roots
+        if roots is None:
+            return BeautifulSoup(html, 'lxml')
+        try:
+            document = lxml.html.document_fromstring(html)
+        except (ValueError, lxml.etree.ParserError):
+            return BeautifulSoup(html, 'lxml')
+        
+        parts = []
+        for element in document.iter(*roots):
+            if not any(ancestor.tag in roots for ancestor in element.iterancestors()):
+                parts.append(lxml.html.tostring(element, encoding='unicode', with_tail=False))
+        return BeautifulSoup(''.join(parts), 'lxml')
+    
     def extract_content(self, html: str, url: str) -> Dict:
-        """Extract main content from HTML."""
-        soup = BeautifulSoup(html, 'html.parser')
+        """Extract main content from HTML.
+        
+        Only the subtrees holding the title and the content selector's
+        outermost element are turned into BeautifulSoup objects (see
+        `_parse_content`); the whole page is only built when the selector
+        does not match, for the <body> fallback.
+        """
+        soup = self._parse_content(html)
+        content_selector = self.config.get('content_selector', 'main')
+        content = soup.select_one(content_selector)
+        if not content and self.content_roots is not None:
+            soup = BeautifulSoup(html, 'lxml')
         
         title = None
         h1 = soup.find('h1')
@@ -177,14 +549,11 @@ class DocsScraper:
             if title_tag:
                 title = title_tag.get_text().strip()
         
-        content_selector = self.config.get('content_selector', 'main')
-        content = soup.select_one(content_selector)
-        
         if not content:
             print(f"Warning: Could not find content with selector '{content_selector}'")
             content = soup.find('body')
         
-        for element in content.select('script, style, nav, header, footer, .search, button[aria-label*="Copy"]'):
+        for element in content.select(STRIPPED_ELEMENTS):
             element.decompose()
         
         return {
@@ -212,9 +581,129 @@ fetched_at: {time.strftime('%Y-%m-%d %H:%M:%S')}
         
         return frontmatter + markdown
     
+    @staticmethod
+    def link_key(url: str) -> str:
+        """URL of a page without query, fragment and trailing slash."""
+        parsed = urlparse(url)
+        return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{parsed.path.rstrip('/')}"
+    
+    def _page_key(self, filepath) -> str:
+        """Path of a saved page relative to pages_dir.
+        
+        Manifests may have been written on another machine, so absolute
+        paths outside this repo root are matched on the pages_dir part;
+        relative ones are taken from the repo root.
+        """
+        pages_dir = (self.repo_root / self.config['pages_dir']).as_posix()
+        path = os.path.normpath(self.repo_root / filepath).replace(os.sep, '/')
+        if path.startswith(pages_dir + '/'):
+            return path[len(pages_dir) + 1:]
+        marker = '/' + self.config['pages_dir'].strip('/') + '/'
+        return path.split(marker, 1)[1] if marker in path else path
+    
+    def _saved_path(self, entry: Dict) -> Path:
+        """Where the page of a manifest entry is saved under this repo root."""
+        return self.repo_root / self.config['pages_dir'] / self._page_key(entry['filepath'])
+    
+    def build_link_index(self):
+        """Index the local file of every saved page by URL.
+        
+        Only pages the manifest records a saved file for are indexed, so
+        links to pages that failed or were skipped stay absolute URLs.
+        Built once per run, so rewriting a link is a dict lookup. The
+        reverse map, from saved path to URL, lets links that were already
+        rewritten be rewritten again when their target moves.
+        """
+        self.link_index = {}
+        self.page_urls = {}
+        for url, entry in self.manifest['urls'].items():
+            if not entry.get('filepath'):
+                continue
+            filepath = self.url_to_filepath(url)
+            self.link_index[self.link_key(url)] = filepath
+            self.page_urls[self._page_key(entry['filepath'])] = url
+            self.page_urls[self._page_key(filepath)] = url
+    
+    def _rewrite_target(self, target: str, url: str, source: Path, saved_at: Path,
+                        links: Set[str]) -> str:
+        """New target of one link; internal pages found are added to `links`."""
+        if target.startswith('#'):
+            return target
+        base, hash_mark, fragment = target.partition('#')
+        suffix = hash_mark + fragment
+        parsed = urlparse(base)
+        if parsed.scheme and parsed.scheme not in ('http', 'https'):
+            return target
+        
+        if not parsed.scheme and not parsed.netloc and base.endswith('.md'):
+            # Rewritten on an earlier run: map the local file back to its URL
+            absolute = self.page_urls.get(self._page_key(saved_at.parent / base))
+            if absolute is None:
+                return target
+        else:
+            absolute = urljoin(url, base)
+        
+        if not self.internal_link.match(absolute):
+            # Relative links to other sites or sections only work online
+            return target if parsed.scheme else absolute + suffix
+        
+        key = self.link_key(absolute)
+        links.add(key)
+        filepath = self.link_index.get(key)
+        if filepath is None:
+            return absolute + suffix
+        if filepath == source:
+            return suffix or filepath.name
+        return Path(os.path.relpath(filepath, source.parent)).as_posix() + suffix
+    
+    def _rewrite_links(self, markdown: str, url: str,
+                       saved_at: Optional[Path] = None) -> Tuple[str, Set[str]]:
+        """Rewrite the links of a page; also returns the internal pages it links to.
+        
+        `saved_at` is where the markdown currently lives, if not at the
+        page's own path (a page being moved).
+        """
+        if self.internal_link is None:
+            return markdown, set()
+        if self.link_index is None:
+            self.build_link_index()
+        
+        source = self.url_to_filepath(url)
+        saved_at = saved_at or source
+        links: Set[str] = set()
+        
+        def replace(match: re.Match) -> str:
+            target = self._rewrite_target(match.group(2), url, source, saved_at, links)
+            return match.group(1) + target + match.group(3)
+        
+        return _MARKDOWN_LINK.sub(replace, markdown), links
+    
     def rewrite_links(self, markdown: str, url: str) -> str:
-        """Rewrite internal links to local paths."""
-        return markdown
+        """Rewrite internal links to local paths.
+        
+        Links matching `internal_link_pattern`, absolute or relative to the
+        page, point to the saved copy of their page (relative to this page,
+        anchors kept) once it is known. Internal pages that are not saved
+        keep an absolute URL, as do relative links to other sites.
+        """
+        return self._rewrite_links(markdown, url)[0]
+    
+    def render_page(self, html: str, url: str,
+                    previous_hash: Optional[str] = None) -> Tuple[str, Optional[str], str, List[str]]:
+        """Extract a page once and convert it unless its content is unchanged.
+        
+        Returns the title, the markdown (None when the content hash equals
+        `previous_hash`), the content hash and the link keys of the
+        internal pages the page links to.
+        """
+        content_data = self.extract_content(html, url)
+        content_hash = self.content_hash(content_data)
+        if content_hash == previous_hash:
+            return content_data['title'], None, content_hash, []
+        
+        markdown = self.convert_to_markdown(content_data)
+        markdown, links = self._rewrite_links(markdown, url)
+        return content_data['title'], markdown, content_hash, sorted(links)
     
     def url_to_filepath(self, url: str) -> Path:
         """Convert URL to local file path."""
@@ -244,48 +733,251 @@ fetched_at: {time.strftime('%Y-%m-%d %H:%M:%S')}
         
         print(f"Saved: {filepath}")
     
-    def scrape_documentation(self, force: bool = False):
-        """Scrape all documentation pages."""
-        urls = self.discover_urls()
+    def scrape_documentation(self, force: bool = False, fetch_workers: Optional[int] = None,
+                             render_workers: Optional[int] = None, resume: bool = False):
+        """Scrape all documentation pages.
         
-        print(f"\nScraping {len(urls)} pages...")
+        Pages flow through a pipeline: up to `fetch_workers` concurrent
+        fetches (paced by the site's rate limit), HTML extraction and
+        markdown conversion in a pool of `render_workers` processes, and
+        batched writes. Each stage only accepts new work while the next one
+        keeps up, so memory stays bounded on large doc sets.
+        
+        Manifest updates are journaled as pages finish. With `resume`, a run
+        that did not finish is continued: its URL list is reused and the
+        pages it already finished are not visited again.
+        """
+        run = self.journal_run if resume else None
+        if resume and run is None:
+            print("No unfinished run to resume; starting a new one")
+        
+        if run:
+            urls, force = run['urls'], run['force']
+            self.sitemap_lastmod = run.get('lastmod', {})
+            print(f"Resuming run started {run['started_at']}: "
+                  f"{len(self.journal_done)} of {len(urls)} pages already done")
+            # Fold the journal in first, so a torn last line is not appended to
+            self.save_manifest()
+        else:
+            with self.metrics.phase('discover'):
+                urls = self.discover_urls(force)
+            self._start_journal({
+                'started_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'force': force,
+                'urls': urls,
+                'lastmod': self.sitemap_lastmod,
+                'sitemaps': self.manifest.get('sitemaps', {}),
+            })
+        
+        # Pages finished by the run being resumed count as added as well
+        known_urls = set(self.manifest['urls']) - self.journal_done
+        self.build_link_index()
+        
+        # Pages whose sitemap <lastmod> did not move need no request at all
+        pending = [url for url in urls if url not in self.journal_done
+                   and (force or not self._lastmod_unchanged(url))]
+        if len(pending) < len(urls):
+            print(f"Skipping {len(urls) - len(pending)} pages with unchanged lastmod")
+            self.metrics.count('pages_lastmod_unchanged', len(urls) - len(pending))
+        
+        print(f"\nScraping {len(pending)} pages...")
         print("=" * 60)
         
-        for i, url in enumerate(urls, 1):
-            print(f"\n[{i}/{len(urls)}]", end=" ")
-            
-            html, metadata = self.fetch_page(url)
-            if not html:
-                continue
-            
-            if not force and not self._should_update(url, **metadata):
-                print(f"Skipping (unchanged): {url}")
-                continue
-            
-            content_data = self.extract_content(html, url)
-            markdown = self.convert_to_markdown(content_data)
-            markdown = self.rewrite_links(markdown, url)
-            
-            self.save_page(url, markdown)
-            
-            self.manifest['urls'][url] = {
-                'filepath': str(self.url_to_filepath(url)),
-                'title': content_data['title'],
-                **metadata
-            }
-            
-            time.sleep(0.5)
+        with self.metrics.phase('pages'):
+            saved = self._scrape_pages(pending, force, fetch_workers, render_workers)
         
-        self._save_manifest()
+        # Links to pages saved by this run resolve now that they are in the manifest
+        with self.metrics.phase('links'):
+            self.build_link_index()
+            added = {self.link_key(url) for url in self.manifest['urls'] if url not in known_urls}
+            relinked = self.relink_pages(added)
+        if relinked:
+            print(f"Rewrote links in {relinked} saved pages")
+        
+        with self.metrics.phase('manifest'):
+            self.journal_run = None
+            self.save_manifest()
         print(f"\n{'=' * 60}")
-        print(f"Scraping complete! Saved {len(urls)} pages.")
+        print(f"Scraping complete! Saved {saved} of {len(urls)} pages.")
+    
+    def _fetch_for_update(self, url: str, force: bool) -> Tuple[Optional[str], Dict]:
+        """Fetch a page and return its HTML only if it needs to be rewritten.
+        
+        Unless forced, unchanged pages are detected before their body is
+        downloaded, as set by `change_probe`: a conditional GET with the
+        manifest's validators (`conditional`, the default), a HEAD request
+        first for sites that ignore them (`head`), or neither (`none`).
+        """
+        probe = 'none' if force else self.config.get('change_probe', 'conditional')
+        if probe == 'head' and self.probe_page(url):
+            print(f"Skipping (unchanged, HEAD): {url}")
+            self.metrics.count('pages_probed_unchanged')
+            return None, self._with_lastmod(url, {'not_modified': True})
+        
+        html, metadata = self.fetch_page(url, conditional=probe != 'none')
+        if metadata.get('not_modified'):
+            print(f"Skipping (not modified): {url}")
+            self.metrics.count('pages_not_modified')
+        return html, self._with_lastmod(url, metadata)
+    
+    def _with_lastmod(self, url: str, metadata: Dict) -> Dict:
+        """Add the page's sitemap <lastmod>, if any, to its manifest metadata."""
+        if url in self.sitemap_lastmod:
+            metadata['lastmod'] = self.sitemap_lastmod[url]
+        return metadata
+    
+    def _previous_hash(self, url: str, force: bool) -> Optional[str]:
+        """Content hash of the saved copy of a page, if it may be kept."""
+        entry = self._saved_entry(url)
+        if force or not entry:
+            return None
+        return entry.get('content_hash')
+    
+    def _write_batch(self, batch: List[Tuple[str, str, str, Dict]]):
+        """Save rendered pages and record them in the manifest."""
+        with self.metrics.timer('write_batch'):
+            for url, title, markdown, metadata in batch:
+                self.save_page(url, markdown)
+                self._journal(url, {
+                    'filepath': str(self.url_to_filepath(url)),
+                    'title': title,
+                    **metadata
+                })
+            self._flush_journal()
+        self.metrics.count('pages_saved', len(batch))
+        batch.clear()
+    
+    def _scrape_pages(self, urls: List[str], force: bool, fetch_workers: Optional[int] = None,
+                      render_workers: Optional[int] = None) -> int:
+        """Run the fetch -> render -> write pipeline over `urls`; returns pages saved."""
+        if not urls:
+            return 0
+        fetch_workers = fetch_workers or self.limiter.max_concurrency
+        render_workers = render_workers or os.cpu_count() or 1
+        # Bounds of the queues between stages
+        max_fetched = fetch_workers * 2
+        max_rendering = render_workers * 2
+        
+        pending_urls = iter(urls)
+        fetching: Dict[Future, str] = {}
+        rendering: Dict[Future, Tuple[str, Dict]] = {}
+        batch: List[Tuple[str, str, str, Dict]] = []
+        saved = 0
+        
+        with ThreadPoolExecutor(fetch_workers) as fetch_pool, \
+                ProcessPoolExecutor(render_workers, mp_context=multiprocessing.get_context('spawn'),
+                                    initializer=_init_render_worker,
+                                    initargs=(self.config_path, str(self.repo_root))) as render_pool:
+            while True:
+                # Backpressure: stop fetching while the render stage is full
+                while len(fetching) < max_fetched and len(rendering) < max_rendering:
+                    url = next(pending_urls, None)
+                    if url is None:
+                        break
+                    fetching[fetch_pool.submit(self._fetch_for_update, url, force)] = url
+                
+                if not fetching and not rendering:
+                    break
+                
+                done, _ = wait(list(fetching) + list(rendering), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in fetching:
+                        url = fetching.pop(future)
+                        html, metadata = future.result()
+                        if html:
+                            previous_hash = self._previous_hash(url, force)
+                            rendering[render_pool.submit(_render_page, html, url, previous_hash)] = (url, metadata)
+                        elif metadata.get('not_modified'):
+                            entry = self.manifest['urls'][url]
+                            self._journal(url, {**entry, 'lastmod': metadata['lastmod']}
+                                          if 'lastmod' in metadata else None)
+                        continue
+                    
+                    url, metadata = rendering.pop(future)
+                    try:
+                        title, markdown, content_hash, links, seconds = future.result()
+                    except Exception as e:
+                        print(f"Error converting {url}: {e}")
+                        self.metrics.count('render_errors')
+                        continue
+                    self.metrics.add_time('render', seconds)
+                    if markdown is None:
+                        # Same content under new validators: keep the file, refresh the entry
+                        print(f"Skipping (content unchanged): {url}")
+                        self.metrics.count('pages_unchanged')
+                        self._journal(url, {**self.manifest['urls'][url], **metadata})
+                        continue
+                    batch.append((url, title, markdown,
+                                  {**metadata, 'content_hash': content_hash, 'links': links}))
+                    if len(batch) >= WRITE_BATCH_SIZE:
+                        saved += len(batch)
+                        self._write_batch(batch)
+        
+        saved += len(batch)
+        self._write_batch(batch)
+        return saved
+    
+    def _moved_pages(self) -> List[str]:
+        """Pages in the manifest whose saved path is not their path anymore."""
+        return [
+            url for url, entry in self.manifest['urls'].items()
+            if entry.get('filepath')
+            and self._page_key(entry['filepath']) != self._page_key(self.url_to_filepath(url))
+        ]
+    
+    def relink_pages(self, targets: Optional[Set[str]] = None) -> int:
+        """Rewrite the links of saved pages after pages were added or moved.
+        
+        Saved pages whose path changed (e.g. after a new `locale_filter`)
+        are moved first. Then only the pages whose recorded links include
+        one of `targets` (link keys of added or moved pages), or that were
+        saved before links were recorded, are rewritten; None rewrites
+        every saved page. Returns the number of files changed.
+        """
+        if self.internal_link is None:
+            return 0
+        if self.link_index is None:
+            self.build_link_index()
+        urls = self.manifest['urls']
+        moved = self._moved_pages()
+        targets = None if targets is None else targets | {self.link_key(url) for url in moved}
+        
+        pages = [
+            url for url, entry in urls.items()
+            if targets is None or url in moved or 'links' not in entry
+            or not targets.isdisjoint(entry['links'])
+        ]
+        changed = 0
+        for url in pages:
+            entry = urls[url]
+            filepath = self.url_to_filepath(url)
+            saved_at = filepath
+            if url in moved:
+                saved_at = self._saved_path(entry)
+            try:
+                markdown = saved_at.read_text(encoding='utf-8')
+            except FileNotFoundError:
+                continue
+
+            rewritten, links = self._rewrite_links(markdown, url, saved_at)
+            if rewritten != markdown or saved_at != filepath:
+                filepath.parent.mkdir(parents=True, exist_ok=True)
+                filepath.write_text(rewritten, encoding='utf-8')
+                if saved_at != filepath:
+                    saved_at.unlink()
+                    print(f"Moved: {saved_at} -> {filepath}")
+                changed += 1
+            self._journal(url, {**entry, 'filepath': str(filepath), 'links': sorted(links)})
+        self._flush_journal()
+        self.metrics.count('pages_relinked', changed)
+        return changed
     
     def scrape_models(self):
         """Scrape model catalog."""
         print(f"\nScraping models from {self.config['models_url']}")
         print("=" * 60)
         
-        response = self.session.get(self.config['models_url'])
+        response = self._get(self.config['models_url'], kind='models')
         response.raise_for_status()
         
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -338,6 +1030,35 @@ Last updated: {time.strftime('%Y-%m-%d %H:%M:%S')}
             f.write(toc)
         
         print(f"Generated TOC: {toc_file}")
+        self.update_search_index()
+    
+    def update_search_index(self):
+        """Update the full-text search index of the scraped pages.
+        
+        Pages are keyed by URL and re-tokenized only when their manifest
+        content hash differs from the one they were indexed at.
+        """
+        index_file = self.config.get('search_index_file')
+        if not index_file:
+            return
+        
+        urls = self.manifest['urls']
+        hashes = {url: entry['content_hash'] for url, entry in urls.items() if entry.get('content_hash')}
+        
+        def load(url: str) -> Optional[Document]:
+            filepath = self.url_to_filepath(url)
+            try:
+                markdown = filepath.read_text(encoding='utf-8')
+            except FileNotFoundError:
+                return None
+            return Document(urls[url].get('title', ''), markdown_text(markdown), url,
+                            str(filepath.relative_to(self.repo_root)))
+        
+        index = SearchIndex(self.repo_root / index_file)
+        indexed, removed = index.update(hashes, load)
+        index.save()
+        print(f"Search index: {len(index)} pages ({indexed} indexed, {removed} removed): "
+              f"{self.repo_root / index_file}")
 
 
 def main():
@@ -347,7 +1068,7 @@ def main():
     )
     parser.add_argument(
         'command',
-        choices=['fetch', 'models', 'toc', 'all'],
+        choices=['fetch', 'models', 'toc', 'links', 'all'],
         help='Command to execute'
     )
     parser.add_argument(
@@ -360,11 +1081,54 @@ def main():
         action='store_true',
         help='Force update all pages'
     )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue the last fetch run that did not finish, skipping the pages it completed'
+    )
+    parser.add_argument(
+        '--probe',
+        choices=CHANGE_PROBES,
+        help='How to detect unchanged pages before downloading them (default: change_probe from the config)'
+    )
+    parser.add_argument(
+        '--fetch-workers',
+        type=int,
+        help='Concurrent page fetches (default: max_concurrency from the rate_limit config)'
+    )
+    parser.add_argument(
+        '--render-workers',
+        type=int,
+        help='Processes converting HTML to markdown (default: number of CPUs)'
+    )
     parser.add_argument(
         '--repo-root',
         default='/home/ubuntu/repos/videosos',
         help='Repository root path'
     )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Bypass the shared on-disk HTTP cache'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=str(DEFAULT_CACHE_DIR),
+        help='HTTP cache directory'
+    )
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        help='Replay responses from the HTTP cache only'
+    )
+    parser.add_argument(
+        '--metrics-report',
+        help='Write a JSON run report with phase timings and a per-request trace'
+    )
+    parser.add_argument(
+        '--metrics-textfile',
+        help='Write run metrics in Prometheus textfile format'
+    )
     
     args = parser.parse_args()
     
@@ -375,18 +1139,37 @@ def main():
         print(f"Error: Configuration file not found: {config_path}")
         sys.exit(1)
     
-    scraper = DocsScraper(str(config_path), args.repo_root)
-    
-    if args.command == 'fetch':
-        scraper.scrape_documentation(force=args.force)
-    elif args.command == 'models':
-        scraper.scrape_models()
-    elif args.command == 'toc':
-        scraper.generate_toc()
-    elif args.command == 'all':
-        scraper.scrape_documentation(force=args.force)
-        scraper.scrape_models()
-        scraper.generate_toc()
+    cache = None
+    if args.offline or not args.no_cache:
+        cache = ResponseCache(Path(args.cache_dir), offline=args.offline)
+    
+    metrics = RunMetrics(f"docs-scraper-{args.site}")
+    scraper = DocsScraper(str(config_path), args.repo_root, cache=cache, metrics=metrics)
+    if args.probe:
+        scraper.config['change_probe'] = args.probe
+    
+    try:
+        if args.command == 'fetch':
+            scraper.scrape_documentation(args.force, args.fetch_workers, args.render_workers, args.resume)
+        elif args.command == 'models':
+            with metrics.phase('models'):
+                scraper.scrape_models()
+        elif args.command == 'toc':
+            with metrics.phase('toc'):
+                scraper.generate_toc()
+        elif args.command == 'links':
+            with metrics.phase('links'):
+                relinked = scraper.relink_pages()
+                scraper.save_manifest()
+            print(f"Rewrote links in {relinked} saved pages")
+        elif args.command == 'all':
+            scraper.scrape_documentation(args.force, args.fetch_workers, args.render_workers, args.resume)
+            with metrics.phase('models'):
+                scraper.scrape_models()
+            with metrics.phase('toc'):
+                scraper.generate_toc()
+    finally:
+        metrics.export(args.metrics_report, args.metrics_textfile)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Local full-text search over the scraped docs and the fal model catalog
+BM25 inverted index with array-backed posting lists, updated incrementally
+from content hashes. Built by scraper.py (generate_toc) and
+scripts/parse_fal_models.py; query it with `python search_index.py QUERY`.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Indexes searched by the CLI when none are given
+DEFAULT_INDEX_FILES = (
+    REPO_ROOT / 'docs' / 'fal' / 'search.idx',
+    REPO_ROOT / 'docs' / 'runware' / 'search.idx',
+    REPO_ROOT / 'data' / 'fal_models_search.idx',
+)
+
+INDEX_MAGIC = b'VSIDX\x01'
+INDEX_VERSION = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Title tokens count this many times towards a document's term frequencies
+TITLE_WEIGHT = 3
+
+MAX_TERM_FREQUENCY = 0xFFFF
+
+_WORD = re.compile(r'\w+')
+_FRONTMATTER = re.compile(r'\A---\n.*?\n---\n', re.S)
+_LINK_TARGET = re.compile(r'\]\([^)]*\)')
+
+
+class Document(NamedTuple):
+    """Searchable text of one document, as returned by an index loader"""
+
+    title: str
+    text: str
+    url: str = ''
+    path: str = ''
+
+
+class IndexedDocument(NamedTuple):
+    """A document in the index; `hash` is the content hash it was indexed at"""
+
+    id: str
+    hash: str
+    title: str
+    url: str
+    path: str
+    length: int
+
+
+class SearchHit(NamedTuple):
+    id: str
+    title: str
+    url: str
+    path: str
+    score: float
+    index: str = ''
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """Lowercased word tokens; snake_case identifiers also yield their parts"""
+    for match in _WORD.finditer(text.lower()):
+        token = match.group()
+        if len(token) > 1 or token.isdigit():
+            yield token
+        if '_' in token:
+            for part in token.split('_'):
+                if len(part) > 1:
+                    yield part
+
+
+def markdown_text(markdown: str) -> str:
+    """Searchable text of a scraped page: no frontmatter, no link targets"""
+    return _LINK_TARGET.sub(']', _FRONTMATTER.sub('', markdown, count=1))
+
+
+class SearchIndex:
+    """BM25 index stored in one file
+
+    Postings live in two flat arrays (document numbers as uint32, term
+    frequencies as uint16); each term maps to its slice of them. Loading
+    is a header parse plus two `frombytes` copies, and a query only touches
+    the slices of its terms.
+
+    `update` takes the current content hash of every document. Documents
+    whose hash is unchanged keep their postings (they are only renumbered);
+    only new and changed documents are passed to the loader and tokenized.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.docs: List[IndexedDocument] = []
+        self.terms: Dict[str, Tuple[int, int]] = {}
+        self.doc_ids = array('I')
+        self.tfs = array('H')
+        self._norms: List[float] = []
+        if self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _load(self) -> None:
+        data = self.path.read_bytes()
+        if not data.startswith(INDEX_MAGIC):
+            return
+        offset = len(INDEX_MAGIC)
+        (header_size,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        header = json.loads(data[offset:offset + header_size])
+        if header.get('version') != INDEX_VERSION:
+            return
+        offset += header_size
+
+        total = 0
+        terms = {}
+        for term, df in header['terms']:
+            terms[term] = (total, df)
+            total += df
+        doc_ids, tfs = array('I'), array('H')
+        doc_ids.frombytes(data[offset:offset + total * doc_ids.itemsize])
+        offset += total * doc_ids.itemsize
+        tfs.frombytes(data[offset:offset + total * tfs.itemsize])
+        if sys.byteorder != 'little':
+            doc_ids.byteswap()
+            tfs.byteswap()
+
+        self.docs = [IndexedDocument(*doc) for doc in header['docs']]
+        self.terms = terms
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self._compute_norms()
+
+    def _compute_norms(self) -> None:
+        average = sum(doc.length for doc in self.docs) / len(self.docs) if self.docs else 1.0
+        self._norms = [K1 * (1 - B + B * doc.length / (average or 1.0)) for doc in self.docs]
+
+    def save(self) -> None:
+        """Write the index atomically"""
+        header = json.dumps({
+            'version': INDEX_VERSION,
+            'docs': [list(doc) for doc in self.docs],
+            'terms': [[term, df] for term, (_, df) in self.terms.items()],
+        }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        doc_ids, tfs = array('I', self.doc_ids), array('H', self.tfs)
+        if sys.byteorder != 'little':
+            doc_ids.byteswap()
+            tfs.byteswap()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(INDEX_MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            f.write(doc_ids.tobytes())
+            f.write(tfs.tobytes())
+        os.replace(tmp_path, self.path)
+
+    def update(self, hashes: Mapping[str, str],
+               load: Callable[[str], Optional[Document]]) -> Tuple[int, int]:
+        """Bring the index in line with `hashes` (document id -> content hash)
+
+        Returns the number of documents (re)indexed and removed. Documents
+        the loader returns None for are left out until the next update.
+        """
+        keep = [n for n, doc in enumerate(self.docs) if hashes.get(doc.id) == doc.hash]
+        kept_ids = {self.docs[n].id for n in keep}
+        changed = [doc_id for doc_id in hashes if doc_id not in kept_ids]
+        removed = sum(1 for doc in self.docs if doc.id not in hashes)
+        if not changed and len(keep) == len(self.docs):
+            return 0, 0
+
+        remap = array('i', [-1]) * len(self.docs)
+        for new, old in enumerate(keep):
+            remap[old] = new
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (offset, df) in self.terms.items():
+            doc_ids, tfs = array('I'), array('H')
+            for doc, tf in zip(self.doc_ids[offset:offset + df], self.tfs[offset:offset + df]):
+                if remap[doc] >= 0:
+                    doc_ids.append(remap[doc])
+                    tfs.append(tf)
+            if doc_ids:
+                postings[term] = (doc_ids, tfs)
+
+        docs = [self.docs[n] for n in keep]
+        indexed = 0
+        for doc_id in changed:
+            document = load(doc_id)
+            if document is None:
+                continue
+            counts = Counter(tokenize(document.text))
+            for token in tokenize(document.title):
+                counts[token] += TITLE_WEIGHT
+            number = len(docs)
+            docs.append(IndexedDocument(doc_id, hashes[doc_id], document.title, document.url,
+                                        document.path, sum(counts.values())))
+            for term, tf in counts.items():
+                doc_ids, tfs = postings.setdefault(term, (array('I'), array('H')))
+                doc_ids.append(number)
+                tfs.append(min(tf, MAX_TERM_FREQUENCY))
+            indexed += 1
+
+        self.docs = docs
+        self.terms = {}
+        self.doc_ids, self.tfs = array('I'), array('H')
+        for term in sorted(postings):
+            doc_ids, tfs = postings[term]
+            self.terms[term] = (len(self.doc_ids), len(doc_ids))
+            self.doc_ids.extend(doc_ids)
+            self.tfs.extend(tfs)
+        self._compute_norms()
+        return indexed, removed
+
+    def search(self, query: str, limit: int = 10) -> List[SearchHit]:
+        """Best `limit` documents for a query, by BM25 score"""
+        count = len(self.docs)
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            span = self.terms.get(term)
+            if span is None:
+                continue
+            offset, df = span
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for doc, tf in zip(self.doc_ids[offset:offset + df], self.tfs[offset:offset + df]):
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + self._norms[doc])
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            SearchHit(self.docs[doc].id, self.docs[doc].title, self.docs[doc].url,
+                      self.docs[doc].path, score, self.path.name)
+            for doc, score in best
+        ]
+
+
+def search_indexes(paths: List[Path], query: str, limit: int = 10) -> List[SearchHit]:
+    """Query several indexes and merge their hits by score"""
+    hits: List[SearchHit] = []
+    for path in paths:
+        hits.extend(SearchIndex(path).search(query, limit))
+    return heapq.nlargest(limit, hits, key=lambda hit: hit.score)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Search the local full-text indexes of the scraped docs and the fal model catalog'
+    )
+    parser.add_argument('query', nargs='+', help='Search terms')
+    parser.add_argument(
+        '--index',
+        type=Path,
+        action='append',
+        help='Index file to search; repeatable (default: every index the tools have built)'
+    )
+    parser.add_argument('-n', '--limit', type=int, default=10, help='Number of results (default: %(default)s)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    paths = args.index or [path for path in DEFAULT_INDEX_FILES if path.exists()]
+    if not paths:
+        print("No search index found; run the scraper's toc command or parse_fal_models.py first")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    hits = search_indexes(paths, ' '.join(args.query), args.limit)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps([hit._asdict() for hit in hits], indent=2, ensure_ascii=False))
+        return
+    for hit in hits:
+        print(f"{hit.score:6.2f}  {hit.title or hit.id}")
+        print(f"        {hit.path or hit.url or hit.id}")
+    print(f"\n{len(hits)} results in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+# The tools are run directly, not installed; import them from tools/docs-scraper/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scraper import DocsScraper  # noqa: E402
+
+
+@pytest.fixture
+def make_scraper(tmp_path):
+    """Build a DocsScraper for docs.example.com rooted at tmp_path
+
+    Each call writes the config again, so a second scraper sees what the
+    first one left on disk. `saved` URLs get a manifest entry pointing at
+    their page file; keyword arguments override config keys.
+    """
+    def make(saved=(), **overrides):
+        config = {
+            'site_name': 'test',
+            'base_url': 'https://docs.example.com',
+            'pages_dir': 'docs/test/pages',
+            'manifest_file': 'manifest_test.json',
+            **overrides,
+        }
+        config_path = tmp_path / 'config_test.yml'
+        config_path.write_text(yaml.safe_dump(config))
+        scraper = DocsScraper(str(config_path), str(tmp_path))
+        for url in saved:
+            scraper.manifest['urls'][url] = {'filepath': str(scraper.url_to_filepath(url))}
+        return scraper
+    return make
@@ -0,0 +1,77 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from scraper import STRIPPED_ELEMENTS
+
+BASE = 'https://docs.example.com'
+
+PAGE = '''<html><head><title>Guide</title><script nonce="{nonce}">build("{build}")</script></head>
+<body class="{theme}"><nav>Menu</nav>
+<main class="{theme}" data-build="{build}"><h1>Guide</h1>
+<!-- rendered {build} -->
+<p>{text}</p>
+<p><a href="{href}" class="link-{build}">Auth</a></p>
+<pre>{code}</pre>
+</main></body></html>'''
+
+
+def page_hash(scraper, **changes):
+    fields = {'nonce': 'n1', 'build': 'b1', 'theme': 'light', 'text': 'Call the API.',
+              'href': '/auth', 'code': 'curl  -X GET'}
+    html = PAGE.format(**{**fields, **changes})
+    return scraper.content_hash(scraper.extract_content(html, f'{BASE}/guide'))
+
+
+def test_deploy_noise_does_not_change_the_hash(make_scraper):
+    scraper = make_scraper()
+    assert page_hash(scraper) == page_hash(scraper, nonce='n2', build='b2', theme='dark')
+
+
+def test_whitespace_outside_pre_does_not_change_the_hash(make_scraper):
+    scraper = make_scraper()
+    assert page_hash(scraper) == page_hash(scraper, text='Call   the\n    API.')
+
+
+@pytest.mark.parametrize('change', [
+    {'text': 'Call the API twice.'}, {'href': '/keys'}, {'code': 'curl -X GET'},
+])
+def test_content_edits_change_the_hash(make_scraper, change):
+    scraper = make_scraper()
+    assert page_hash(scraper) != page_hash(scraper, **change)
+
+
+def baseline_extract(html, content_selector):
+    """extract_content as it was before lxml subtree parsing"""
+    soup = BeautifulSoup(html, 'html.parser')
+    heading = soup.find('h1') or soup.find('title')
+    title = heading.get_text().strip() if heading else None
+    content = soup.select_one(content_selector) or soup.find('body')
+    for element in content.select(STRIPPED_ELEMENTS):
+        element.decompose()
+    return {'title': title or 'Untitled', 'content': content, 'url': f'{BASE}/guide'}
+
+
+LAYOUT = '''<!DOCTYPE html><html><head><title> Guide | Docs </title><style>p {{}}</style></head>
+<body><header><h1>Docs site</h1><nav><a href="/">Home</a></nav></header>
+<div class="layout"><aside>Sidebar</aside>
+<article class="docs-content"><div id="content">
+<h2>Setup</h2><p>Install <code>pkg</code> &amp; run it.</p>
+<ul><li>One</li><li><a href="/api/auth" title="Auth">Two</a></li></ul>
+<pre><code>pip install  pkg
+</code></pre><img src="/diagram.png" alt="Diagram">
+<button aria-label="Copy code">Copy</button><script>track()</script>
+</div></article></div>
+<main><p>Main text</p></main>
+<footer>Footer</footer></body></html>'''
+
+
+@pytest.mark.parametrize('content_selector', [
+    'main', 'article.docs-content', 'article > div#content', 'div#content', '.layout article',
+    'section', 'aside ~ article',
+])
+def test_subtree_extraction_matches_the_full_parse(make_scraper, content_selector):
+    scraper = make_scraper(content_selector=content_selector)
+    expected = baseline_extract(LAYOUT, content_selector)
+    actual = scraper.extract_content(LAYOUT, f'{BASE}/guide')
+    assert actual['title'] == expected['title']
+    assert scraper.convert_to_markdown(actual) == scraper.convert_to_markdown(expected)
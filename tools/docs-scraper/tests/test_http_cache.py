@@ -0,0 +1,115 @@
+import pytest
+import requests
+
+import http_cache
+from http_cache import CacheMiss, ResponseCache, cached_get
+
+URL = 'https://example.com/page'
+
+
+class FakeSession:
+    """Origin that serves one body per URL and answers validators with 304"""
+
+    def __init__(self, etag='"v1"'):
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        headers = headers or {}
+        self.requests.append((url, headers))
+        response = requests.Response()
+        response.url = url
+        response.headers['ETag'] = self.etag
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        if headers.get('If-None-Match') == self.etag:
+            response.status_code = 304
+            response._content = b''
+        else:
+            response.status_code = 200
+            response._content = f'body of {url} at {self.etag}'.encode()
+        return response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(http_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_fresh_entry_is_served_without_a_request(tmp_path, clock):
+    cache, session = ResponseCache(tmp_path, ttl=60), FakeSession()
+    assert cached_get(session, cache, URL).text == f'body of {URL} at "v1"'
+    clock[0] += 30
+    response = cached_get(session, cache, URL)
+    assert response.from_cache and response.status_code == 200
+    assert len(session.requests) == 1
+
+
+def test_stale_entry_is_revalidated(tmp_path, clock):
+    cache, session = ResponseCache(tmp_path, ttl=60), FakeSession()
+    cached_get(session, cache, URL)
+    clock[0] += 61
+    response = cached_get(session, cache, URL)
+    assert response.status_code == 200 and response.text == f'body of {URL} at "v1"'
+    assert session.requests[1][1]['If-None-Match'] == '"v1"'
+    # The 304 restarted the TTL
+    clock[0] += 30
+    cached_get(session, cache, URL)
+    assert len(session.requests) == 2
+
+
+def test_ttl_zero_always_revalidates_and_sees_changes(tmp_path, clock):
+    cache, session = ResponseCache(tmp_path, ttl=3600), FakeSession()
+    cached_get(session, cache, URL, ttl=0)
+    session.etag = '"v2"'
+    response = cached_get(session, cache, URL, ttl=0)
+    assert response.text == f'body of {URL} at "v2"'
+    assert len(session.requests) == 2
+
+
+def test_caller_validators_get_a_local_304(tmp_path, clock):
+    cache, session = ResponseCache(tmp_path, ttl=60), FakeSession()
+    cached_get(session, cache, URL)
+    response = cached_get(session, cache, URL, headers={'If-None-Match': '"v1"'})
+    assert response.status_code == 304 and response.content == b''
+    response = cached_get(session, cache, URL, headers={'If-None-Match': '"old"'})
+    assert response.status_code == 200
+    assert len(session.requests) == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache, session = ResponseCache(tmp_path, ttl=60, max_bytes=130), FakeSession()
+    urls = [f'https://example.com/{n}' for n in range(3)]
+    for url in urls:
+        cached_get(session, cache, url)
+        clock[0] += 1
+    # Touch the first entry so the second is the least recently used
+    assert cache.lookup(urls[0]) is not None
+    clock[0] += 1
+    cached_get(session, cache, 'https://example.com/3')
+    assert cache.lookup(urls[1]) is None
+    assert cache.lookup(urls[0]) is not None
+
+
+def test_offline_replays_stale_entries_and_raises_on_misses(tmp_path, clock):
+    cached_get(FakeSession(), ResponseCache(tmp_path, ttl=60), URL)
+    clock[0] += 10_000
+    offline, session = ResponseCache(tmp_path, ttl=60, offline=True), FakeSession()
+    assert cached_get(session, offline, URL).text == f'body of {URL} at "v1"'
+    with pytest.raises(CacheMiss):
+        cached_get(session, offline, 'https://example.com/missing')
+    assert session.requests == []
+
+
+def test_partial_entries_need_allow_partial(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.store(URL, 200, {'ETag': '"v1"'}, b'half', complete=False)
+    assert cache.lookup(URL) is None
+    assert cache.lookup(URL, allow_partial=True).body == b'half'
+
+
+def test_without_a_cache_requests_go_straight_through():
+    session = FakeSession()
+    assert cached_get(session, None, URL).status_code == 200
+    assert len(session.requests) == 1
@@ -0,0 +1,70 @@
+import functools
+
+import pytest
+
+BASE = 'https://docs.example.com/api'
+
+
+@pytest.fixture
+def make_scraper(make_scraper):
+    return functools.partial(make_scraper, locale_filter='/api',
+                             internal_link_pattern=r'^https://docs\.example\.com/api')
+
+
+def test_saved_pages_become_relative_paths(make_scraper):
+    scraper = make_scraper([f'{BASE}/quickstart', f'{BASE}/guides/auth', f'{BASE}'])
+    markdown = ('[Auth](/api/guides/auth#keys) [Start](quickstart/) [Home](https://docs.example.com/api) '
+                '[Top](#intro) [Site](https://other.example.com/x)')
+    assert scraper.rewrite_links(markdown, f'{BASE}/quickstart') == (
+        '[Auth](guides/auth.md#keys) [Start](quickstart.md) [Home](index.md) '
+        '[Top](#intro) [Site](https://other.example.com/x)'
+    )
+    assert scraper.rewrite_links('[Start](../quickstart)', f'{BASE}/guides/auth') == '[Start](../quickstart.md)'
+
+
+def test_pages_that_were_not_saved_stay_absolute(make_scraper):
+    scraper = make_scraper([f'{BASE}/quickstart'])
+    scraper.manifest['urls'][f'{BASE}/failed'] = {'error': 'timeout'}
+    markdown, links = scraper._rewrite_links('[A](/api/failed) [B](/api/never-scraped#x)', f'{BASE}/quickstart')
+    assert markdown == f'[A]({BASE}/failed) [B]({BASE}/never-scraped#x)'
+    # Still recorded, so the page is relinked once they are saved
+    assert links == {f'{BASE}/failed', f'{BASE}/never-scraped'}
+
+
+def test_relative_links_outside_the_docs_become_absolute(make_scraper):
+    scraper = make_scraper([f'{BASE}/quickstart'])
+    assert scraper.rewrite_links('[Blog](/blog/post)', f'{BASE}/quickstart') == (
+        '[Blog](https://docs.example.com/blog/post)'
+    )
+
+
+def test_images_are_not_rewritten(make_scraper):
+    scraper = make_scraper([f'{BASE}/quickstart'])
+    markdown = '![diagram](/api/quickstart) [![logo](/logo.svg)](/api/quickstart)'
+    assert scraper.rewrite_links(markdown, f'{BASE}/quickstart') == (
+        '![diagram](/api/quickstart) [![logo](/logo.svg)](quickstart.md)'
+    )
+
+
+def test_relink_only_touches_pages_linking_to_added_pages(make_scraper):
+    scraper = make_scraper()
+    pages = {'a': ('[B](/api/b)', [f'{BASE}/b']), 'c': ('[Other](/api/other)', [f'{BASE}/other'])}
+    for name, (markdown, links) in pages.items():
+        path = scraper.url_to_filepath(f'{BASE}/{name}')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(markdown)
+        scraper.manifest['urls'][f'{BASE}/{name}'] = {'filepath': str(path), 'links': links}
+
+    # b is saved later; only a links to it
+    b = scraper.url_to_filepath(f'{BASE}/b')
+    b.write_text('# B')
+    scraper.manifest['urls'][f'{BASE}/b'] = {'filepath': str(b), 'links': []}
+    scraper.build_link_index()
+    assert scraper.relink_pages({f'{BASE}/b'}) == 1
+    assert scraper.url_to_filepath(f'{BASE}/a').read_text() == '[B](b.md)'
+    assert scraper.url_to_filepath(f'{BASE}/c').read_text() == '[Other](/api/other)'
+
+    # A full pass rewrites every page once, then finds nothing left to change
+    assert scraper.relink_pages() == 1
+    assert scraper.url_to_filepath(f'{BASE}/c').read_text() == f'[Other]({BASE}/other)'
+    assert scraper.relink_pages() == 0
@@ -0,0 +1,59 @@
+import json
+
+
+def entry(n):
+    return {'filepath': f'docs/test/pages/{n}.md', 'content_hash': str(n)}
+
+
+def test_interrupted_run_is_recovered(make_scraper):
+    scraper = make_scraper()
+    scraper._start_journal({'urls': ['u1', 'u2', 'u3'], 'force': False})
+    scraper._journal('u1', entry(1))
+    scraper._journal('u2')
+    scraper._flush_journal()
+    # Buffered but never flushed: lost with the crash
+    scraper._journal('u3', entry(3))
+
+    recovered = make_scraper()
+    assert recovered.manifest['urls'] == {'u1': entry(1)}
+    assert recovered.journal_done == {'u1', 'u2'}
+    assert recovered.journal_run['urls'] == ['u1', 'u2', 'u3']
+
+
+def test_torn_last_line_is_ignored(make_scraper):
+    scraper = make_scraper()
+    scraper._start_journal({'urls': ['u1', 'u2']})
+    scraper._journal('u1', entry(1))
+    scraper._flush_journal()
+    with open(scraper.journal_path, 'a') as f:
+        f.write('{"url": "u2", "entry": {"filep')
+
+    recovered = make_scraper()
+    assert recovered.manifest['urls'] == {'u1': entry(1)}
+    assert recovered.journal_done == {'u1'}
+
+
+def test_compaction_keeps_the_run_and_finished_urls(make_scraper):
+    scraper = make_scraper()
+    scraper._start_journal({'urls': ['u1', 'u2']})
+    scraper._journal('u1', entry(1))
+    scraper._flush_journal()
+    scraper.save_manifest()
+
+    assert json.loads(scraper.manifest_path.read_text())['urls'] == {'u1': entry(1)}
+    lines = [json.loads(line) for line in scraper.journal_path.read_text().splitlines()]
+    assert lines == [{'run': {'urls': ['u1', 'u2']}}, {'url': 'u1'}]
+    assert make_scraper().journal_done == {'u1'}
+
+
+def test_finished_run_removes_the_journal(make_scraper):
+    scraper = make_scraper()
+    scraper._start_journal({'urls': ['u1']})
+    scraper._journal('u1', entry(1))
+    scraper.journal_run = None
+    scraper.save_manifest()
+
+    assert not scraper.journal_path.exists()
+    recovered = make_scraper()
+    assert recovered.journal_run is None
+    assert recovered.manifest['urls'] == {'u1': entry(1)}
@@ -0,0 +1,39 @@
+from bs4 import BeautifulSoup
+
+from scrape_models import _div_texts, _parse_fal_models, _parse_runware_models
+
+
+def test_div_texts_match_get_text():
+    html = ('<section><div>a<div>b<!-- hidden --><script>x()</script>'
+            '<div>c<![CDATA[d]]></div></div>e</div><p>f</p><div></div></section>')
+    root = BeautifulSoup(html, 'lxml').section
+    assert _div_texts(root) == [(div, div.get_text()) for div in root.find_all('div')]
+
+
+def test_div_texts_handle_deep_nesting():
+    html = '<main>' + '<div>x' * 2000 + '</div>' * 2000 + '</main>'
+    texts = _div_texts(BeautifulSoup(html, 'lxml').main)
+    assert len(texts) == 2000 and texts[0][1] == 'x' * 2000 and texts[-1][1] == 'x'
+
+
+def test_fal_cards_are_deduplicated():
+    card = ('<a href="/models/fal-ai/flux"><div><div>fal-ai/flux\nFLUX</div>'
+            '<div>text-to-image</div><div class="tag">fast</div>'
+            f'<div>{"A fast text to image model with a long description. " * 2}</div></div></a>')
+    models = _parse_fal_models(f'<html><body>{card}{card}</body></html>'.encode())
+    assert len(models) == 1
+    model = models[0]
+    assert model['model_id'] == 'fal-ai/flux'
+    assert model['name'] == 'fal-ai/flux'
+    assert model['tags'] == ['fast']
+
+
+def test_runware_cards_stop_at_shared_containers():
+    def card(n):
+        return (f'<div><a href="/models/{n}"><img src="/{n}.png"></a><code>civitai:{n}@1</code>'
+                f'<div>Checkpoint {n}.2k\nModel {n}A fine model</div></div>')
+
+    models = _parse_runware_models(f'<html><body><div>{card(1)}{card(2)}{card(1)}</div></body></html>'.encode())
+    assert [model['model_id'] for model in models] == ['civitai:1@1', 'civitai:2@1']
+    assert models[0]['image_url'] == '/1.png' and models[1]['playground_url'] == '/models/2'
+    assert models[0]['category'] == 'Checkpoint' and models[0]['usage_count'] == '1.2k'
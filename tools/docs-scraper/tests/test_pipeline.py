@@ -0,0 +1,35 @@
+import pytest
+
+import scraper as scraper_module
+
+BASE = 'https://docs.example.com'
+
+
+def page(n):
+    return f'<html><head><title>Page {n}</title></head><body><main><h1>Page {n}</h1><p>Body {n}.</p></main></body></html>'
+
+
+def test_pages_are_rendered_in_workers_and_written_in_batches(make_scraper, monkeypatch):
+    scraper = make_scraper()
+    urls = [f'{BASE}/page-{n}' for n in range(5)]
+    monkeypatch.setattr(scraper, '_fetch_for_update',
+                        lambda url, force: (page(url.rsplit('-', 1)[1]), {'etag': f'"{url}"'}))
+    monkeypatch.setattr(scraper_module, 'WRITE_BATCH_SIZE', 2)
+    batches = []
+    write_batch = scraper._write_batch
+    monkeypatch.setattr(scraper, '_write_batch', lambda batch: (batches.append(len(batch)), write_batch(batch)))
+
+    scraper._start_journal({'urls': urls, 'force': False})
+    assert scraper._scrape_pages(urls, force=False, fetch_workers=2, render_workers=2) == 5
+    assert sorted(batches, reverse=True) == [2, 2, 1]
+    for n, url in enumerate(urls):
+        assert f'Body {n}.' in scraper.url_to_filepath(url).read_text(encoding='utf-8')
+        assert scraper.manifest['urls'][url]['etag'] == f'"{url}"'
+        assert scraper.manifest['urls'][url]['content_hash']
+
+
+def test_no_pools_without_pending_pages(make_scraper, monkeypatch):
+    scraper = make_scraper()
+    monkeypatch.setattr(scraper_module, 'ThreadPoolExecutor', pytest.fail)
+    monkeypatch.setattr(scraper_module, 'ProcessPoolExecutor', pytest.fail)
+    assert scraper._scrape_pages([], force=False) == 0
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+import rate_limit
+from rate_limit import HostLimiter, RateLimiter, ThrottledSession, backoff_delay, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('-1') == 0.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_backoff_is_capped():
+    assert all(0 <= backoff_delay(attempt, base=1, cap=4) <= 4 for attempt in range(20))
+
+
+def test_full_window_waits_for_a_release_instead_of_a_delay():
+    limiter = HostLimiter(rate=None, max_rate=None, max_concurrency=1)
+    assert limiter.try_acquire(0.0) == 0
+    assert limiter.try_acquire(0.0) is None
+    limiter.release(0.0, overloaded=False, retry_after=None)
+    assert limiter.try_acquire(0.0) == 0
+
+
+def test_token_bucket_and_retry_after_give_a_delay():
+    limiter = HostLimiter(rate=2.0, max_rate=None, max_concurrency=8, burst=1)
+    now = limiter.updated
+    assert limiter.try_acquire(now) == 0
+    assert limiter.try_acquire(now) == 0.5
+    limiter.release(now, overloaded=True, retry_after=10)
+    assert limiter.try_acquire(now + 1) == 9
+
+
+def test_overload_halves_rate_and_window_once_per_cooldown():
+    limiter = HostLimiter(rate=8.0, max_rate=None, max_concurrency=8)
+    limiter.release(100.0, overloaded=True, retry_after=None)
+    limiter.release(100.1, overloaded=True, retry_after=None)
+    assert (limiter.rate, limiter.window) == (4.0, 4.0)
+
+
+def run_threads(limiter, n, hold):
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        limiter.acquire('https://example.com/')
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(hold)
+        with lock:
+            active[0] -= 1
+        limiter.release('https://example.com/', 200)
+
+    threads = [threading.Thread(target=work) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return peak[0]
+
+
+def test_threads_respect_the_concurrency_window():
+    assert run_threads(RateLimiter(max_concurrency=3), 30, 0.005) == 3
+
+
+def test_coroutines_are_woken_by_release():
+    limiter = RateLimiter(max_concurrency=2)
+    active, peak = [0], [0]
+
+    async def work():
+        await limiter.acquire_async('https://example.com/')
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.005)
+        active[0] -= 1
+        limiter.release('https://example.com/', 200)
+
+    async def main():
+        await asyncio.wait_for(asyncio.gather(*(work() for _ in range(20))), timeout=10)
+
+    asyncio.run(main())
+    assert peak[0] == 2
+    assert limiter.host('https://example.com/').waiters == []
+
+
+def test_cancelled_waiters_do_not_block_others():
+    limiter = RateLimiter(max_concurrency=1)
+
+    async def main():
+        await limiter.acquire_async('https://example.com/')
+        waiter = asyncio.create_task(limiter.acquire_async('https://example.com/'))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        limiter.release('https://example.com/', 200)
+        await asyncio.wait_for(limiter.acquire_async('https://example.com/'), timeout=1)
+
+    asyncio.run(main())
+
+
+class FailingSession:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+@pytest.mark.parametrize('error', [
+    requests.exceptions.ChunkedEncodingError(), requests.TooManyRedirects(), requests.exceptions.InvalidURL(),
+    requests.exceptions.ContentDecodingError(), KeyboardInterrupt(),
+])
+def test_session_errors_free_the_slot_without_a_retry(error):
+    limiter = RateLimiter(max_concurrency=1)
+    session = ThrottledSession(FailingSession(error), limiter)
+    for _ in range(3):
+        with pytest.raises(type(error)):
+            session.get('https://example.com/')
+    assert session.session.calls == 3
+    host = limiter.host('https://example.com/')
+    assert host.in_flight == 0 and host.window == 1.0
+
+
+def test_connection_errors_are_retried_and_free_the_slot(monkeypatch):
+    monkeypatch.setattr(rate_limit.time, 'sleep', lambda seconds: None)
+    limiter = RateLimiter(max_concurrency=1)
+    session = ThrottledSession(FailingSession(requests.ConnectionError()), limiter, max_retries=2)
+    with pytest.raises(requests.ConnectionError):
+        session.get('https://example.com/')
+    assert session.session.calls == 3
+    assert limiter.host('https://example.com/').in_flight == 0
@@ -0,0 +1,102 @@
+import requests
+from requests.structures import CaseInsensitiveDict
+
+BASE = 'https://docs.example.com'
+
+
+class FakeHttp:
+    """Stands in for the scraper's throttled session; serves one page version"""
+
+    def __init__(self, etag, body=b'<html><body><main><p>New</p></main></body></html>'):
+        self.etag = etag
+        self.body = body
+        self.calls = []
+
+    def respond(self, method, headers):
+        self.calls.append((method, dict(headers or {})))
+        response = requests.Response()
+        response.headers = CaseInsensitiveDict({'ETag': self.etag})
+        if method == 'GET' and (headers or {}).get('If-None-Match') == self.etag:
+            response.status_code = 304
+            response._content = b''
+        else:
+            response.status_code = 200
+            response._content = self.body if method == 'GET' else b''
+        return response
+
+    def get(self, url, headers=None, **kwargs):
+        return self.respond('GET', headers)
+
+    def head(self, url, headers=None, **kwargs):
+        return self.respond('HEAD', headers)
+
+
+def save(scraper, url, entry):
+    path = scraper.url_to_filepath(url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('# Saved\n', encoding='utf-8')
+    scraper.manifest['urls'][url] = entry
+    return path
+
+
+def test_pages_saved_under_another_root_are_found(make_scraper):
+    scraper = make_scraper(check_etag=True)
+    url = f'{BASE}/guides/auth'
+    save(scraper, url, {'filepath': '/home/ubuntu/docs-repo/docs/test/pages/guides/auth.md',
+                        'etag': '"v1"', 'content_hash': 'abc'})
+    assert scraper._saved_entry(url) is not None
+    assert scraper._validator_headers(url) == {'If-None-Match': '"v1"'}
+    assert scraper._previous_hash(url, force=False) == 'abc'
+
+
+def test_relative_manifest_paths_are_found(make_scraper):
+    scraper = make_scraper()
+    url = f'{BASE}/quickstart'
+    save(scraper, url, {'filepath': 'docs/test/pages/quickstart.md', 'content_hash': 'abc'})
+    assert scraper._previous_hash(url, force=False) == 'abc'
+
+
+def test_deleted_pages_count_as_unsaved(make_scraper):
+    scraper = make_scraper()
+    url = f'{BASE}/quickstart'
+    save(scraper, url, {'filepath': '/elsewhere/docs/test/pages/quickstart.md'}).unlink()
+    assert scraper._saved_entry(url) is None
+
+
+def saved_scraper(make_scraper, etag, **config):
+    scraper = make_scraper(check_etag=True, **config)
+    url = f'{BASE}/quickstart'
+    save(scraper, url, {'filepath': str(scraper.url_to_filepath(url)), 'etag': '"v1"'})
+    scraper.http = FakeHttp(etag)
+    return scraper, url
+
+
+def test_unchanged_page_is_answered_with_304(make_scraper):
+    scraper, url = saved_scraper(make_scraper, '"v1"')
+    assert scraper._fetch_for_update(url, force=False) == (None, {'not_modified': True})
+    assert scraper.http.calls == [('GET', {'If-None-Match': '"v1"'})]
+
+
+def test_changed_page_is_downloaded(make_scraper):
+    scraper, url = saved_scraper(make_scraper, '"v2"')
+    html, metadata = scraper._fetch_for_update(url, force=False)
+    assert 'New' in html and metadata['etag'] == '"v2"'
+
+
+def test_forced_update_sends_no_validators(make_scraper):
+    scraper, url = saved_scraper(make_scraper, '"v1"', change_probe='head')
+    html, _ = scraper._fetch_for_update(url, force=True)
+    assert html and scraper.http.calls == [('GET', {})]
+
+
+def test_head_probe_skips_unchanged_pages_without_a_get(make_scraper):
+    scraper, url = saved_scraper(make_scraper, '"v1"', change_probe='head')
+    assert scraper._fetch_for_update(url, force=False) == (None, {'not_modified': True})
+    assert [method for method, _ in scraper.http.calls] == ['HEAD']
+
+
+def test_head_probe_downloads_changed_pages(make_scraper):
+    scraper, url = saved_scraper(make_scraper, '"v2"', change_probe='head')
+    html, metadata = scraper._fetch_for_update(url, force=False)
+    assert 'New' in html and metadata['etag'] == '"v2"'
+    assert [method for method, _ in scraper.http.calls] == ['HEAD', 'GET']
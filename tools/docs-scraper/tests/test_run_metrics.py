@@ -0,0 +1,69 @@
+import json
+import re
+
+import pytest
+
+from run_metrics import RunMetrics
+
+
+def sample_run():
+    metrics = RunMetrics('test-tool')
+    with metrics.phase('pages'):
+        for status in (200, 304, 200):
+            with metrics.request('https://docs.example.com/page', 'page') as record:
+                record.status = status
+                record.bytes = 100 if status == 200 else 0
+                record.cached = status == 304
+    with pytest.raises(TimeoutError):
+        with metrics.request('https://api.example.com/x', 'schema'):
+            raise TimeoutError
+    with metrics.timer('render'):
+        pass
+    metrics.add_time('render', 0.5)
+    metrics.count('pages_saved', 2)
+    return metrics
+
+
+def test_report_summarizes_requests_phases_and_counters(tmp_path):
+    report = sample_run().report()
+    assert [phase['name'] for phase in report['phases']] == ['pages']
+    assert report['timings']['render']['count'] == 2
+    assert report['timings']['render']['seconds'] >= 0.5
+    assert report['counters'] == {'pages_saved': 2}
+    assert report['requests']['page'] == {
+        'count': 3, 'bytes': 200, 'seconds': report['requests']['page']['seconds'], 'retries': 0,
+        'queueWaitSeconds': 0.0, 'cached': 1, 'errors': 0, 'status': {'200': 2, '304': 1},
+    }
+    assert report['requests']['schema']['errors'] == 1
+    assert report['requests']['schema']['status'] == {'TimeoutError': 1}
+    assert report['hosts'] == {'docs.example.com': 3, 'api.example.com': 1}
+    assert len(report['trace']) == 4
+
+
+def test_cancelled_requests_are_not_errors():
+    metrics = RunMetrics('test-tool')
+
+    class CancelledError(BaseException):
+        pass
+
+    with pytest.raises(CancelledError):
+        with metrics.request('https://example.com/', 'page'):
+            raise CancelledError
+    assert metrics.report()['requests']['page']['errors'] == 0
+
+
+def test_report_round_trips_as_json(tmp_path):
+    path = tmp_path / 'out' / 'report.json'
+    sample_run().write_report(path, include_requests=False)
+    report = json.loads(path.read_text())
+    assert report['tool'] == 'test-tool' and 'trace' not in report
+
+
+def test_prometheus_text_is_well_formed():
+    text = sample_run().prometheus_text()
+    sample = re.compile(r'^[a-z_]+\{[a-z]+="[^"]*"(,[a-z]+="[^"]*")*\} -?[0-9.e+-]+$')
+    for line in text.splitlines():
+        assert line.startswith('# ') or sample.match(line), line
+    assert 'scraper_requests_total{tool="test-tool",kind="page",status="304"} 1' in text
+    assert 'scraper_events_total{tool="test-tool",event="pages_saved"} 2' in text
+    assert 'scraper_cache_hits_total{tool="test-tool",kind="page"} 1' in text
@@ -0,0 +1,93 @@
+from search_index import Document, SearchIndex, markdown_text, search_indexes, tokenize
+
+DOCS = {
+    'webhooks': Document('Webhooks', 'Receive a webhook callback when a queued request completes.'),
+    'queue': Document('Queue API', 'Submit requests to the queue and poll their status.'),
+    'lipsync': Document('Lipsync', 'Sync lips in a video to an audio track.'),
+}
+
+
+def build(path, docs):
+    index = SearchIndex(path)
+    loaded = []
+
+    def load(doc_id):
+        loaded.append(doc_id)
+        return docs.get(doc_id)
+
+    result = index.update({doc_id: str(hash(doc)) for doc_id, doc in docs.items()}, load)
+    return index, result, loaded
+
+
+def ids(hits):
+    return [hit.id for hit in hits]
+
+
+def test_tokenize_splits_snake_case():
+    assert list(tokenize('image_size A 4k')) == ['image_size', 'image', 'size', '4k']
+
+
+def test_markdown_text_drops_frontmatter_and_link_targets():
+    text = markdown_text('---\ntitle: x\n---\nSee [the docs](https://example.com/secret)')
+    assert 'secret' not in text and 'title' not in text and 'the docs' in text
+
+
+def test_search_ranks_title_matches_first(tmp_path):
+    index, (indexed, removed), _ = build(tmp_path / 'i.idx', DOCS)
+    assert (indexed, removed) == (3, 0)
+    assert ids(index.search('queue'))[0] == 'queue'
+    assert ids(index.search('webhook callback')) == ['webhooks']
+    assert index.search('nonexistent') == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index, _, _ = build(tmp_path / 'i.idx', DOCS)
+    index.save()
+    loaded = SearchIndex(tmp_path / 'i.idx')
+    assert loaded.docs == index.docs
+    assert loaded.search('video audio') == index.search('video audio')
+
+
+def test_unchanged_documents_are_not_reloaded(tmp_path):
+    index, _, _ = build(tmp_path / 'i.idx', DOCS)
+    index.save()
+    again, result, loaded = build(tmp_path / 'i.idx', DOCS)
+    assert result == (0, 0) and loaded == []
+
+
+def test_removed_documents_leave_the_index(tmp_path):
+    index, _, _ = build(tmp_path / 'i.idx', DOCS)
+    index.save()
+    remaining = {key: DOCS[key] for key in ('queue', 'lipsync')}
+    index, result, loaded = build(tmp_path / 'i.idx', remaining)
+    assert result == (0, 1) and loaded == []
+    assert index.search('webhook') == []
+    # Kept documents were renumbered but still match
+    assert ids(index.search('lips video')) == ['lipsync']
+    assert ids(index.search('queue'))[0] == 'queue'
+
+
+def test_replaced_documents_lose_their_old_terms(tmp_path):
+    index, _, _ = build(tmp_path / 'i.idx', DOCS)
+    index.save()
+    changed = {**DOCS, 'lipsync': Document('Lipsync', 'Dub speech onto a talking head.')}
+    index, result, loaded = build(tmp_path / 'i.idx', changed)
+    assert result == (1, 0) and loaded == ['lipsync']
+    assert ids(index.search('talking head')) == ['lipsync']
+    assert index.search('audio track') == []
+    assert len(index) == 3
+
+
+def test_documents_the_loader_skips_are_left_out(tmp_path):
+    index, result, _ = build(tmp_path / 'i.idx', {**DOCS, 'ghost': None})
+    assert result == (3, 0) and len(index) == 3
+
+
+def test_search_indexes_merges_by_score(tmp_path):
+    first, _, _ = build(tmp_path / 'a.idx', {'a': DOCS['queue']})
+    second, _, _ = build(tmp_path / 'b.idx', {'b': DOCS['webhooks']})
+    first.save()
+    second.save()
+    hits = search_indexes([tmp_path / 'a.idx', tmp_path / 'b.idx'], 'webhook queue', limit=2)
+    assert sorted(ids(hits)) == ['a', 'b']
+    assert {hit.index for hit in hits} == {'a.idx', 'b.idx'}
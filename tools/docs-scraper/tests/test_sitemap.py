@@ -0,0 +1,83 @@
+import gzip
+
+import requests
+
+BASE = 'https://docs.example.com'
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(*pages):
+    entries = ''.join(f'<url><loc>{BASE}/{page}</loc><lastmod>{lastmod}</lastmod></url>' for page, lastmod in pages)
+    return f'<?xml version="1.0"?><urlset {NS}>{entries}</urlset>'.encode()
+
+
+def index(*sitemaps):
+    entries = ''.join(f'<sitemap><loc>{BASE}/{name}</loc><lastmod>{lastmod}</lastmod></sitemap>'
+                      for name, lastmod in sitemaps)
+    return f'<?xml version="1.0"?><sitemapindex {NS}>{entries}</sitemapindex>'.encode()
+
+
+class FakeHttp:
+    def __init__(self, documents):
+        self.documents = documents
+        self.fetched = []
+
+    def get(self, url, **kwargs):
+        self.fetched.append(url)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.documents[url]
+        return response
+
+
+def sitemap_scraper(make_scraper, guides_lastmod='2024-01-01'):
+    scraper = make_scraper(discovery_method='sitemap', sitemap_url=f'{BASE}/sitemap.xml',
+                           check_sitemap_lastmod=True)
+    scraper.http = FakeHttp({
+        f'{BASE}/sitemap.xml': index(('sitemap-docs.xml', guides_lastmod), ('sitemap-blog.xml.gz', '2024-01-01')),
+        # Nested index, pointing back at the root: followed once. An index's
+        # <lastmod> moves with its children's
+        f'{BASE}/sitemap-docs.xml': index(('sitemap-guides.xml.gz', guides_lastmod), ('sitemap.xml', '2024-01-01')),
+        f'{BASE}/sitemap-guides.xml.gz': gzip.compress(urlset(('guides/auth', '2024-01-02'),
+                                                              ('guides/keys', '2024-01-03'))),
+        f'{BASE}/sitemap-blog.xml.gz': gzip.compress(urlset(('blog/post', '2024-01-04'))),
+    })
+    return scraper
+
+
+def test_nested_and_gzipped_sitemaps_are_read(make_scraper):
+    scraper = sitemap_scraper(make_scraper)
+    assert scraper.discover_urls() == [f'{BASE}/guides/auth', f'{BASE}/guides/keys', f'{BASE}/blog/post']
+    assert scraper.sitemap_lastmod[f'{BASE}/guides/keys'] == '2024-01-03'
+    assert scraper.http.fetched.count(f'{BASE}/sitemap.xml') == 1
+
+
+def test_child_sitemaps_with_unchanged_lastmod_are_not_fetched(make_scraper):
+    first = sitemap_scraper(make_scraper)
+    urls = first.discover_urls()
+
+    again = sitemap_scraper(make_scraper)
+    again.manifest['sitemaps'] = first.manifest['sitemaps']
+    assert again.discover_urls() == urls
+    assert f'{BASE}/sitemap-guides.xml.gz' not in again.http.fetched
+
+    changed = sitemap_scraper(make_scraper, guides_lastmod='2024-02-01')
+    changed.manifest['sitemaps'] = first.manifest['sitemaps']
+    changed.discover_urls()
+    assert f'{BASE}/sitemap-guides.xml.gz' in changed.http.fetched
+    assert f'{BASE}/sitemap-blog.xml.gz' not in changed.http.fetched
+
+
+def test_saved_pages_with_unchanged_lastmod_are_skipped(make_scraper):
+    scraper = sitemap_scraper(make_scraper)
+    scraper.discover_urls()
+    for page, lastmod in (('guides/auth', '2024-01-02'), ('guides/keys', '2024-01-01')):
+        url = f'{BASE}/{page}'
+        path = scraper.url_to_filepath(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('# Saved\n', encoding='utf-8')
+        scraper.manifest['urls'][url] = {'filepath': str(path), 'lastmod': lastmod}
+    assert scraper._lastmod_unchanged(f'{BASE}/guides/auth')
+    assert not scraper._lastmod_unchanged(f'{BASE}/guides/keys')
+    # Not saved yet
+    assert not scraper._lastmod_unchanged(f'{BASE}/blog/post')